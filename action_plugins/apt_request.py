@@ -0,0 +1,56 @@
+from typing import Dict, List
+
+from ansible.errors import AnsibleActionFail
+from ansible.plugins.action import ActionBase
+
+__metaclass__ = type
+
+REQUESTS_FACT = "apt_transaction_requests"
+
+
+def merge_request(
+    requests: Dict[str, List[str]], requester: str, packages: List[str]
+) -> Dict[str, List[str]]:
+    """
+    Adds the packages to the ones already requested by `requester`.
+    """
+    merged = {name: list(requested) for name, requested in requests.items()}
+    requested = merged.setdefault(requester, [])
+    for package in packages:
+        if package not in requested:
+            requested.append(package)
+    return merged
+
+
+class ActionModule(ActionBase):
+    """
+    Records APT packages a role needs, without installing them.
+
+    The requests are collected in the `apt_transaction_requests` fact
+    (keyed by the requesting role) and get installed by the apt_transaction role
+    in a single APT transaction.
+    """
+
+    TRANSFERS_FILES = False
+
+    def run(self, tmp=None, task_vars=None):
+        result = super().run(tmp, task_vars)
+        del tmp
+
+        packages = self._task.args.get("packages")
+        if isinstance(packages, str):
+            packages = [packages]
+        if not isinstance(packages, list):
+            raise AnsibleActionFail("packages must be a list of package names")
+
+        requester = self._task.args.get("requester")
+        if not requester:
+            requester = self._task._role.get_name() if self._task._role else "play"
+
+        result["changed"] = False
+        result["ansible_facts"] = {
+            REQUESTS_FACT: merge_request(
+                (task_vars or {}).get(REQUESTS_FACT, {}), requester, packages
+            )
+        }
+        return result
@@ -0,0 +1,63 @@
+from typing import Dict, List
+
+from ansible.errors import AnsibleActionFail
+from ansible.plugins.action import ActionBase
+
+__metaclass__ = type
+
+REQUESTS_FACT = "bundle_requests"
+
+
+def merge_request(
+    requests: Dict[str, List[Dict]], requester: str, artifacts: List[Dict]
+) -> Dict[str, List[Dict]]:
+    """
+    Adds the artifacts to the ones already requested by `requester`.
+    Artifacts are identified by their checksum, since that is how the bundle stores them.
+    """
+    merged = {name: list(requested) for name, requested in requests.items()}
+    requested = merged.setdefault(requester, [])
+    for artifact in artifacts:
+        if all(r["checksum"] != artifact["checksum"] for r in requested):
+            requested.append(dict(url=artifact["url"], checksum=artifact["checksum"]))
+    return merged
+
+
+class ActionModule(ActionBase):
+    """
+    Records artifacts a role downloads, without downloading them.
+
+    The requests are collected in the `bundle_requests` fact (keyed by the
+    requesting role) and get downloaded into the bundle by bundle.yml.
+    """
+
+    TRANSFERS_FILES = False
+
+    def run(self, tmp=None, task_vars=None):
+        result = super().run(tmp, task_vars)
+        del tmp
+
+        artifacts = self._task.args.get("artifacts")
+        if isinstance(artifacts, dict):
+            artifacts = [artifacts]
+        if not isinstance(artifacts, list) or not all(
+            isinstance(artifact, dict)
+            and artifact.get("url")
+            and artifact.get("checksum")
+            for artifact in artifacts
+        ):
+            raise AnsibleActionFail(
+                "artifacts must be a list of dicts with a url and a checksum"
+            )
+
+        requester = self._task.args.get("requester")
+        if not requester:
+            requester = self._task._role.get_name() if self._task._role else "play"
+
+        result["changed"] = False
+        result["ansible_facts"] = {
+            REQUESTS_FACT: merge_request(
+                (task_vars or {}).get(REQUESTS_FACT, {}), requester, artifacts
+            )
+        }
+        return result
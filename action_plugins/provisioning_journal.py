@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Tuple
+
+from ansible import constants as C
+from ansible.errors import AnsibleActionFail, AnsibleError
+from ansible.plugins.action import ActionBase
+
+__metaclass__ = type
+
+SKIPPED_ROLES_FACT = "journal_skipped_roles"
+RECORDED_ROLES_FACT = "journal_recorded_roles"
+INPUTS_FACT = "journal_inputs"
+ROLE_VARIABLES_FILES = ("defaults/main.yml", "vars/main.yml")
+
+
+def select_inputs(
+    role_variables: Dict[str, Any], variables: Dict[str, Any], names: List[str]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Picks a role's inputs: every variable its defaults and vars files define, at the value
+    it is overridden with if any, and the variables named in `names`.
+    Returns the inputs and the names that aren't defined.
+    """
+    inputs = {
+        name: variables.get(name, value) for name, value in role_variables.items()
+    }
+    inputs.update({name: variables[name] for name in names if name in variables})
+    return inputs, [name for name in names if name not in variables]
+
+
+def digest_inputs(inputs: Dict[str, Any], resolve: Callable[[Any], Any]) -> str:
+    """
+    Hashes the resolved values of a role's inputs.
+    """
+    resolved = {name: resolve(value) for name, value in inputs.items()}
+    return hashlib.sha256(
+        json.dumps(resolved, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class ActionModule(ActionBase):
+    """
+    Keeps a journal of the roles that ran, so that unchanged roles can be skipped.
+
+    `check` hashes every role's inputs on the controller,
+    then has the module add the role's host probes and compare against the journal.
+    A role's inputs are the variables of the roles it lists in `roles` (itself by default)
+    and the ones it names in `vars`. The check runs before any role, so their defaults
+    are read from the roles' files rather than from the task's variables.
+    The roles whose fingerprint matches are listed in the `journal_skipped_roles` fact.
+    `record` stores the fingerprint of one or more roles, once they succeeded.
+    """
+
+    TRANSFERS_FILES = False
+
+    def _load_role_variables(
+        self, roles_paths: List[str], role_name: str
+    ) -> Dict[str, Any]:
+        role_variables = {}
+        for roles_path in roles_paths:
+            role_path = os.path.join(roles_path, role_name)
+            if not os.path.isdir(role_path):
+                continue
+            for filename in ROLE_VARIABLES_FILES:
+                path = os.path.join(role_path, filename)
+                if os.path.exists(path):
+                    role_variables.update(self._loader.load_from_file(path) or {})
+            break
+        return role_variables
+
+    def _check_inputs(self, roles: List[Dict], task_vars: Dict) -> Dict[str, str]:
+        # The Playbook's roles, then the Galaxy ones
+        roles_paths = [
+            os.path.join(task_vars.get("playbook_dir", ""), "roles"),
+            *C.DEFAULT_ROLES_PATH,
+        ]
+        role_variables = {
+            role_name: self._load_role_variables(roles_paths, role_name)
+            for role_name in {
+                role_name
+                for role in roles
+                for role_name in role.get("roles", [role["name"]])
+            }
+        }
+        # Defaults may refer to each other, the task's variables take precedence
+        templar = self._templar.copy_with_new_env(
+            available_variables={
+                **{
+                    name: value
+                    for variables in role_variables.values()
+                    for name, value in variables.items()
+                },
+                **task_vars,
+            }
+        )
+
+        def resolve(value: Any) -> Any:
+            try:
+                return templar.template(value)
+            except AnsibleError:
+                return value
+
+        digests = {}
+        for role in roles:
+            inputs, undefined = select_inputs(
+                {
+                    name: value
+                    for role_name in role.get("roles", [role["name"]])
+                    for name, value in role_variables[role_name].items()
+                },
+                task_vars,
+                role.get("vars", []),
+            )
+            if undefined:
+                raise AnsibleActionFail(
+                    f"{role['name']}'s journal inputs are not defined: {', '.join(undefined)}"
+                )
+            digests[role["name"]] = digest_inputs(inputs, resolve)
+        return digests
+
+    def run(self, tmp=None, task_vars=None):
+        result = super().run(tmp, task_vars)
+        del tmp
+        task_vars = task_vars or {}
+
+        operation = self._task.args.get("operation")
+        roles = self._task.args.get("roles") or []
+        if operation not in ("check", "record"):
+            raise AnsibleActionFail("operation must be either check or record")
+        if not all(
+            isinstance(role.get("vars", []), list)
+            and isinstance(role.get("roles", []), list)
+            for role in roles
+        ):
+            raise AnsibleActionFail(
+                "a role's vars and roles must be lists of variable and role names"
+            )
+
+        if operation == "check":
+            inputs = self._check_inputs(roles, task_vars)
+        else:
+            names = self._task.args.get("role")
+            if isinstance(names, str):
+                names = [names]
+            checked = task_vars.get(INPUTS_FACT, {})
+            # A role that wasn't checked has nothing to record
+            roles = [
+                role
+                for role in roles
+                if role["name"] in (names or []) and role["name"] in checked
+            ]
+            if not roles:
+                result["changed"] = False
+                return result
+            inputs = {role["name"]: checked[role["name"]] for role in roles}
+
+        module_result = self._execute_module(
+            module_name="provisioning_journal",
+            module_args=dict(
+                operation=operation,
+                path=self._task.args.get("path"),
+                force=self._task.args.get("force", False),
+                roles=[
+                    dict(
+                        name=role["name"],
+                        inputs=inputs[role["name"]],
+                        paths=role.get("paths", []),
+                        packages=role.get("packages", []),
+                    )
+                    for role in roles
+                ],
+            ),
+            task_vars=task_vars,
+        )
+        result.update(module_result)
+        if module_result.get("failed"):
+            return result
+        if operation == "check":
+            result["ansible_facts"] = {
+                SKIPPED_ROLES_FACT: module_result["unchanged"],
+                RECORDED_ROLES_FACT: [],
+                INPUTS_FACT: inputs,
+            }
+        else:
+            recorded = task_vars.get(RECORDED_ROLES_FACT, [])
+            result["ansible_facts"] = {
+                RECORDED_ROLES_FACT: recorded
+                + [role["name"] for role in roles if role["name"] not in recorded]
+            }
+        return result
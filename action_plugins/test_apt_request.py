@@ -0,0 +1,14 @@
+import apt_request
+
+
+__metaclass__ = type
+
+
+def test_merge_request() -> None:
+    requests = {"packages": ["git", "vim"]}
+
+    merged = apt_request.merge_request(requests, "packages", ["vim", "htop"])
+    merged = apt_request.merge_request(merged, "pyenv", ["make"])
+
+    assert merged == {"packages": ["git", "vim", "htop"], "pyenv": ["make"]}
+    assert requests == {"packages": ["git", "vim"]}
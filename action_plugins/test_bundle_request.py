@@ -0,0 +1,30 @@
+import bundle_request
+
+
+__metaclass__ = type
+
+
+def test_merge_request() -> None:
+    pyenv_installer = {"url": "https://example.com/pyenv", "checksum": "sha256:aa"}
+    requests = {"pyenv": [pyenv_installer]}
+
+    merged = bundle_request.merge_request(
+        requests,
+        "pyenv",
+        [
+            {"url": "https://mirror.example.com/pyenv", "checksum": "sha256:aa"},
+            {"url": "https://example.com/pyenv-doctor", "checksum": "sha256:bb"},
+        ],
+    )
+    merged = bundle_request.merge_request(
+        merged, "nvm", [{"url": "https://example.com/nvm", "checksum": "sha256:cc"}]
+    )
+
+    assert merged == {
+        "pyenv": [
+            pyenv_installer,
+            {"url": "https://example.com/pyenv-doctor", "checksum": "sha256:bb"},
+        ],
+        "nvm": [{"url": "https://example.com/nvm", "checksum": "sha256:cc"}],
+    }
+    assert requests == {"pyenv": [pyenv_installer]}
@@ -0,0 +1,239 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+import yaml
+import provisioning_journal
+from ansible.errors import AnsibleActionFail
+from ansible.parsing.dataloader import DataLoader
+
+
+__metaclass__ = type
+
+REPO_PATH = Path(__file__).resolve().parents[1]
+
+
+def build_action(args: Dict) -> provisioning_journal.ActionModule:
+    task = MagicMock(args=args, async_val=0, check_mode=False)
+    templar = MagicMock()
+    templar.template.side_effect = lambda value: value
+    templar.copy_with_new_env.return_value = templar
+    return provisioning_journal.ActionModule(
+        task, MagicMock(), MagicMock(), DataLoader(), templar, MagicMock()
+    )
+
+
+def check_inputs(roles: List[Dict], task_vars: Dict) -> Dict[str, str]:
+    with patch.object(
+        provisioning_journal.ActionModule,
+        "_execute_module",
+        return_value=dict(changed=False, unchanged=[]),
+    ) as mock_execute_module:
+        build_action(dict(operation="check", path="/journal.json", roles=roles)).run(
+            task_vars=task_vars
+        )
+    return {
+        role["name"]: role["inputs"]
+        for role in mock_execute_module.call_args.kwargs["module_args"]["roles"]
+    }
+
+
+def test_select_inputs__overrides_the_roles_variables_and_adds_the_named_ones() -> None:
+    role_variables = {"nerd_fonts_release": "v3.0.2", "nerd_fonts_font_list": []}
+    variables = {
+        "nerd_fonts_release": "v3.1.0",
+        "bundle_files_url": "",
+        "starship_release": "v1.16.0",
+    }
+
+    assert provisioning_journal.select_inputs(
+        role_variables, variables, ["bundle_files_url", "packages"]
+    ) == (
+        {
+            "nerd_fonts_release": "v3.1.0",
+            "nerd_fonts_font_list": [],
+            "bundle_files_url": "",
+        },
+        ["packages"],
+    )
+
+
+def test_digest_inputs__depends_on_the_resolved_values() -> None:
+    inputs = {
+        "nerd_fonts_release": "{{ release }}",
+        "nerd_fonts_fonts_path": "/home/dev/.local/share/fonts",
+    }
+
+    def digest(resolved_release: str, **overrides) -> str:
+        return provisioning_journal.digest_inputs(
+            {**inputs, **overrides},
+            lambda value: value.replace("{{ release }}", resolved_release),
+        )
+
+    assert digest("v3.0.2") == digest("v3.0.2")
+    assert digest("v3.0.2") != digest("v3.1.0")
+    assert digest("v3.0.2") != digest("v3.0.2", nerd_fonts_fonts_path="/fonts")
+
+
+def test_run__fingerprints_the_roles_defaults_before_they_are_loaded(
+    tmp_path: Path,
+) -> None:
+    (tmp_path / "roles" / "nerd_fonts" / "defaults").mkdir(parents=True)
+    defaults_path = tmp_path / "roles" / "nerd_fonts" / "defaults" / "main.yml"
+    roles = [dict(name="nerd_fonts")]
+    task_vars = {"playbook_dir": str(tmp_path)}
+
+    defaults_path.write_text("nerd_fonts_release: v3.0.2\n")
+    released = check_inputs(roles, task_vars)["nerd_fonts"]
+    defaults_path.write_text("nerd_fonts_release: v3.1.0\n")
+    upgraded = check_inputs(roles, task_vars)["nerd_fonts"]
+    configured = check_inputs(roles, {**task_vars, "nerd_fonts_release": "v3.0.2"})[
+        "nerd_fonts"
+    ]
+
+    assert released != upgraded
+    assert configured == released
+
+
+def test_run__when_a_named_variable_is_undefined__fails(tmp_path: Path) -> None:
+    roles = [dict(name="packages", vars=["flatpaks"])]
+
+    with pytest.raises(AnsibleActionFail, match="flatpaks"):
+        check_inputs(roles, {"playbook_dir": str(tmp_path)})
+
+
+def test_run__when_a_role_registered_variables__fingerprints_stay_the_same() -> None:
+    roles = [dict(name="dev_tools", vars=["dev_tools_install_nvm", "nvm_path"])]
+    variables = {
+        "playbook_dir": "/nonexistent",
+        "dev_tools_install_nvm": True,
+        "nvm_path": "/home/dev/nvm",
+    }
+    # What the role registers and sets while it runs
+    run_time_variables = {
+        "dev_tools_jobs": [{"ansible_job_id": "1"}],
+        "nvm_path_stat_result": {"stat": {"exists": True}},
+    }
+
+    with patch.object(
+        provisioning_journal.ActionModule,
+        "_execute_module",
+        return_value=dict(changed=False, unchanged=[]),
+    ) as mock_execute_module:
+        check_result = build_action(
+            dict(operation="check", path="/journal.json", roles=roles)
+        ).run(task_vars=variables)
+        build_action(
+            dict(
+                operation="record", path="/journal.json", roles=roles, role="dev_tools"
+            )
+        ).run(
+            task_vars={
+                **variables,
+                **run_time_variables,
+                **check_result["ansible_facts"],
+            }
+        )
+        rechecked_result = build_action(
+            dict(operation="check", path="/journal.json", roles=roles)
+        ).run(task_vars={**variables, **run_time_variables})
+
+    checked, recorded, rechecked = (
+        call.kwargs["module_args"]["roles"][0]["inputs"]
+        for call in mock_execute_module.call_args_list
+    )
+    assert checked == recorded == rechecked
+
+
+def test_journal_roles__do_not_fingerprint_variables_set_while_the_roles_run() -> None:
+    with open(REPO_PATH / "config" / "helper.config.yml") as f:
+        journal_roles = yaml.safe_load(f)["journal_roles"]
+    run_time_names = set()
+    for tasks_path in REPO_PATH.glob("roles/*/tasks/*.yml"):
+        content = tasks_path.read_text()
+        run_time_names.update(re.findall(r"^\s*register:\s*(\w+)", content, re.M))
+        for facts in re.findall(r"set_fact:\n((?:\s{4,}\w+:.*\n)+)", content, re.M):
+            run_time_names.update(re.findall(r"^\s*(\w+):", facts, re.M))
+
+    assert "dev_tools_jobs" in run_time_names
+    for role in journal_roles:
+        assert not run_time_names.intersection(role.get("vars", [])), role["name"]
+
+
+def find_included_roles(role_name: str, tasks_from: str = "main") -> set:
+    """
+    The roles a role's tasks file includes, transitively. A role name looped over
+    a variable, e.g. apt_transaction's requesters, is taken from the role's defaults.
+    Other templated role names are left out.
+    """
+    role_path = REPO_PATH / "roles" / role_name
+    with open(role_path / "defaults" / "main.yml") if (
+        role_path / "defaults" / "main.yml"
+    ).exists() else open(os.devnull) as f:
+        defaults = yaml.safe_load(f) or {}
+    with open(role_path / "tasks" / f"{tasks_from}.yml") as f:
+        tasks = yaml.safe_load(f) or []
+
+    included = set()
+    while tasks:
+        task = tasks.pop()
+        for key in ("block", "rescue", "always"):
+            tasks.extend(task.get(key, []))
+        for key in ("import_tasks", "include_tasks"):
+            if key in task:
+                included |= find_included_roles(role_name, task[key][: -len(".yml")])
+        include = task.get("include_role") or task.get("import_role")
+        if include is None:
+            continue
+        names = [include["name"]]
+        if "{{" in include["name"]:
+            names = defaults.get(task.get("loop", "").strip("{} "), [])
+        for name in names:
+            included.add(name)
+            # Galaxy roles aren't part of the repository
+            if (REPO_PATH / "roles" / name).exists():
+                included |= find_included_roles(name, include.get("tasks_from", "main"))
+    return included
+
+
+def test_journal_roles__list_the_roles_they_include() -> None:
+    with open(REPO_PATH / "config" / "helper.config.yml") as f:
+        journal_roles = yaml.safe_load(f)["journal_roles"]
+
+    for role in journal_roles:
+        assert find_included_roles(role["name"]) <= set(
+            role.get("roles", [role["name"]])
+        ), role["name"]
+
+
+def test_run__record__records_every_named_role_and_lists_them() -> None:
+    roles = [dict(name="update"), dict(name="apt_transaction"), dict(name="starship")]
+    task_vars = {
+        "journal_inputs": {"update": "1", "apt_transaction": "2", "starship": "3"},
+        "journal_recorded_roles": ["apt_transaction"],
+    }
+
+    with patch.object(
+        provisioning_journal.ActionModule,
+        "_execute_module",
+        return_value=dict(changed=True),
+    ) as mock_execute_module:
+        result = build_action(
+            dict(
+                operation="record",
+                path="/journal.json",
+                roles=roles,
+                role=["apt_transaction", "update"],
+            )
+        ).run(task_vars=task_vars)
+
+    assert [
+        role["name"]
+        for role in mock_execute_module.call_args.kwargs["module_args"]["roles"]
+    ] == ["update", "apt_transaction"]
+    assert result["ansible_facts"] == {
+        "journal_recorded_roles": ["apt_transaction", "update"]
+    }
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the extrepo_repository module's hot paths.
+
+Every benchmark runs against a generated sources.list.d directory and a fake `extrepo`
+executable, whose search output holds as many repositories as there are .sources files.
+
+Usage:
+    python bench_extrepo_repository.py                    # compare against baseline.json
+    python bench_extrepo_repository.py --update-baseline  # record a new baseline
+    python bench_extrepo_repository.py --sizes 10 100 --extrepo-latency 0.05
+
+Exits with 1 when any benchmark regressed against the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+from unittest.mock import patch
+
+sys.path.insert(
+    0,
+    str(
+        Path(__file__).resolve().parent.parent.parent / "roles" / "extrepo" / "library"
+    ),
+)
+
+import extrepo_repository  # noqa: E402
+from ansible.module_utils import basic  # noqa: E402
+from ansible.module_utils.basic import AnsibleModule  # noqa: E402
+from ansible.module_utils.common.text.converters import to_bytes  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+FAKE_EXTREPO = """\
+#!{python}
+import os
+import sys
+import time
+
+time.sleep(float(os.environ.get("FAKE_EXTREPO_LATENCY", "0")))
+if sys.argv[1] == "search":
+    with open(os.environ["FAKE_EXTREPO_SEARCH_OUTPUT"]) as f:
+        sys.stdout.write(f.read())
+"""
+
+REPOSITORY_DEFINITION = """\
+---
+description: Benchmark repository {name}
+gpg-key-file: {name}.asc
+policy: main
+source:
+  Components: main
+  Suites: bookworm
+  Types: deb
+  URIs: https://example.com/{name}
+"""
+
+SOURCES_FILE = """\
+Components: main
+Uris: https://example.com/{name}
+Suites: bookworm
+Types: deb
+Signed-By: {key_path}
+"""
+
+
+class ModuleExit(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise ModuleExit(kwargs)
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps({"ANSIBLE_MODULE_ARGS": args}))
+
+
+def compute_repository_name(index: int) -> str:
+    return f"bench_{index:05d}"
+
+
+def generate_tree(base_path: Path, size: int, metadata_size: int) -> List[str]:
+    """
+    Writes `size` .sources files (a third each enabled implicitly, explicitly and disabled),
+    the fake extrepo's search output and a local index.yaml for `metadata_size` repositories.
+    Returns the names of the repositories that have a .sources file.
+    """
+    sources_list_d = base_path / "sources.list.d"
+    sources_list_d.mkdir()
+    key_path = base_path / "key.asc"
+    key_path.touch()
+
+    names = [compute_repository_name(index) for index in range(size)]
+    for index, name in enumerate(names):
+        content = SOURCES_FILE.format(name=name, key_path=key_path)
+        if index % 3 == 1:
+            content += "Enabled: yes\n"
+        elif index % 3 == 2:
+            content += "Enabled: no\n"
+        (sources_list_d / extrepo_repository.compute_sources_filename(name)).write_text(
+            content
+        )
+
+    definitions = [
+        (name, REPOSITORY_DEFINITION.format(name=name))
+        for name in map(compute_repository_name, range(metadata_size))
+    ]
+    (base_path / "search_output").write_text(
+        "".join(f"Found {name}:\n{definition}\n" for name, definition in definitions)
+    )
+    metadata_path = base_path / "extrepo-data" / "debian" / "bookworm" / "index.yaml"
+    metadata_path.parent.mkdir(parents=True)
+    metadata_path.write_text(
+        "".join(
+            f"{name}:\n"
+            + "".join(f"  {line}\n" for line in definition.splitlines()[1:])
+            for name, definition in definitions
+        )
+    )
+    return names
+
+
+@contextmanager
+def benchmark_environment(
+    base_path: Path, latency: float, local_metadata: bool
+) -> Iterator[None]:
+    """
+    Points the module at the generated tree and the fake extrepo.
+    """
+    fake_extrepo = base_path / "extrepo"
+    fake_extrepo.write_text(FAKE_EXTREPO.format(python=sys.executable))
+    fake_extrepo.chmod(0o755)
+    if local_metadata:
+        (base_path / "config.yaml").write_text(
+            f"url: file://{base_path / 'extrepo-data'}\ndist: debian\nversion: bookworm\n"
+        )
+    attributes = dict(
+        APT_SOURCES_LIST_D=str(base_path / "sources.list.d"),
+        EXTREPO_EXECUTABLE=str(fake_extrepo),
+        EXTREPO_CONFIG_PATH=str(base_path / "config.yaml"),
+        EXTREPO_OFFLINE_DATA_PATH=str(base_path / "offline-data"),
+        EXTREPO_INDEX_CACHE_PATH=str(base_path / "cache" / "index.json"),
+    )
+    environment = dict(
+        FAKE_EXTREPO_LATENCY=str(latency),
+        FAKE_EXTREPO_SEARCH_OUTPUT=str(base_path / "search_output"),
+    )
+    with patch.multiple(extrepo_repository, **attributes), patch.dict(
+        os.environ, environment
+    ), patch.multiple(AnsibleModule, exit_json=mock_exit_json):
+        yield
+
+
+def measure(fn: Callable[[], None], repeat: int) -> Dict[str, float]:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return dict(
+        median=statistics.median(durations), min=min(durations), max=max(durations)
+    )
+
+
+def calibrate(repeat: int) -> float:
+    """
+    Times a fixed workload, so that baselines recorded on other machines can be scaled.
+    """
+
+    def workload() -> None:
+        index = {f"repository_{i}": {"suites": [str(i)]} for i in range(100_000)}
+        json.loads(json.dumps(index))
+
+    return measure(workload, repeat)["median"]
+
+
+def run_module(args: Dict) -> Dict:
+    set_module_args(args)
+    try:
+        extrepo_repository.run_module()
+    except ModuleExit as e:
+        return e.args[0]
+    raise AssertionError("The module did not exit")
+
+
+def run_benchmarks(
+    size: int, metadata_size: int, latency: float, repeat: int
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for local_metadata in [False, True]:
+        with tempfile.TemporaryDirectory() as base_dir:
+            base_path = Path(base_dir)
+            names = generate_tree(base_path, size, metadata_size)
+            with benchmark_environment(base_path, latency, local_metadata):
+                set_module_args({})
+                module = AnsibleModule(argument_spec={}, supports_check_mode=True)
+                metadata = "local" if local_metadata else "search"
+                last_name = names[-1]
+
+                if not local_metadata:
+                    results[f"get_source_file_state[{size}]"] = measure(
+                        lambda: [
+                            extrepo_repository.get_source_file_state(
+                                extrepo_repository.compute_sources_filename(name)
+                            )
+                            for name in names
+                        ],
+                        repeat,
+                    )
+                results[f"is_in_extrepo_metadata[{size},{metadata}]"] = measure(
+                    lambda: extrepo_repository.is_in_extrepo_metadata(
+                        module, last_name
+                    ),
+                    repeat,
+                )
+                results[f"get_repository_details[{size},{metadata}]"] = measure(
+                    lambda: extrepo_repository.get_repository_details(
+                        module, last_name
+                    ),
+                    repeat,
+                )
+                results[f"run_module_reconcile_unchanged[{size},{metadata}]"] = measure(
+                    lambda: run_module(
+                        {
+                            "repositories": [
+                                dict(name=name, state="disabled")
+                                if index % 3 == 2
+                                else name
+                                for index, name in enumerate(names)
+                            ]
+                        }
+                    ),
+                    repeat,
+                )
+
+                # Every repetition flips every tenth repository
+                flipped = names[::10]
+                states = iter(["disabled", "enabled"] * repeat)
+                results[f"run_module_reconcile_flip[{size},{metadata}]"] = measure(
+                    lambda: run_module(
+                        {"repositories": flipped, "state": next(states)}
+                    ),
+                    repeat,
+                )
+    return results
+
+
+def find_regressions(
+    baseline: Dict, current: Dict, tolerance: float, min_seconds: float
+) -> List[str]:
+    """
+    Compares the medians after scaling both runs by their calibration time.
+    Benchmarks missing from either run are ignored.
+    """
+    scale = current["calibration"] / baseline["calibration"]
+    regressions = []
+    for name, result in current["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            continue
+        expected = baseline_result["median"] * scale
+        if (
+            result["median"] > expected * (1 + tolerance)
+            and result["median"] - expected > min_seconds
+        ):
+            regressions.append(
+                f"{name}: {result['median'] * 1000:.2f}ms, expected {expected * 1000:.2f}ms"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--metadata-size",
+        type=int,
+        help="Repositories in extrepo's metadata (default: the tree's size)",
+    )
+    parser.add_argument(
+        "--extrepo-latency",
+        type=float,
+        default=0.0,
+        help="Seconds the fake extrepo sleeps before responding",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown against the baseline, as a fraction",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.002,
+        help="Slowdowns below this many seconds are never reported",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    current = dict(
+        python=platform.python_version(),
+        yaml_loader=extrepo_repository.YamlLoader.__name__
+        if extrepo_repository.HAS_YAML
+        else None,
+        extrepo_latency=args.extrepo_latency,
+        calibration=calibrate(args.repeat),
+        results={},
+    )
+    for size in args.sizes:
+        results = run_benchmarks(
+            size, args.metadata_size or size, args.extrepo_latency, args.repeat
+        )
+        for name, result in results.items():
+            print(f"{name:<55} {result['median'] * 1000:>10.2f}ms")
+        current["results"].update(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+    if args.update_baseline or not args.baseline.exists():
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("extrepo_latency") != args.extrepo_latency:
+        print("The baseline was recorded with a different extrepo latency, skipping")
+        return 0
+    regressions = find_regressions(baseline, current, args.tolerance, args.min_seconds)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
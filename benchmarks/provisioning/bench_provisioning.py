@@ -0,0 +1,760 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of playbook.yml, without internet access.
+
+Every run provisions a fresh container twice (cold, then warm) with ansible_connection=local,
+against local stand-ins:
+- a file-backed APT repository with dummy packages for everything the roles request,
+  including fake `extrepo`, `flatpak`, `code` and `codium` executables
+- fake extrepo metadata, whose repositories point at empty local APT repositories
+- an HTTP server with dummy Nerd Fonts, Starship, pyenv and nvm artifacts,
+  whose checksums replace the configured ones
+- a Node release on the same server, used as nvm's mirror
+- a prebuilt Python on the same server, which the stand-in pyenv installs instead of building one
+- an Open VSX stand-in on the same server, from which both editors' extensions are prefetched
+  into the VSIX cache
+- a local dotfiles repository
+
+Per-role durations are read from the profile_timeline callback's timeline.json.
+
+The image needs python3, ansible-core, sudo and git, see Containerfile.
+The repository's Galaxy requirements have to be installed into .collections and .roles.
+
+Usage:
+    python bench_provisioning.py                    # compare against baseline.json, or record it when missing
+    python bench_provisioning.py --update-baseline  # record a new baseline
+    python bench_provisioning.py --runtime docker --image ansible-dev-pc-bench --repeat 3
+
+Exits with 1 when any role regressed against the baseline.
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+REPOSITORY_PATH = Path(__file__).resolve().parent.parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Where the container sees the repository and the stand-ins
+CONTAINER_REPOSITORY_PATH = "/srv/ansible-dev-pc"
+CONTAINER_WORK_PATH = "/srv/bench"
+
+DUMMY_VERSION = "0~bench1"
+PYTHON_VERSION = "3.12.1"
+NODE_VERSION = "v20.11.0"
+
+# platform.machine() -> the architecture in Node's tarball names, the container shares the host's
+NODE_ARCHS = {"x86_64": "x64", "aarch64": "arm64"}
+
+# APT packages requested by the roles, besides the ones read from the configuration
+STATIC_PACKAGES = [
+    "extrepo",
+    "flatpak",
+    "flatpak-xdg-utils",
+    "code",
+    "codium",
+    "pipx",
+]
+
+FAKE_EXTREPO = f"""\
+#!/usr/bin/python3
+import json
+import os
+import sys
+
+SOURCES_LIST_D = "/etc/apt/sources.list.d"
+with open("{CONTAINER_WORK_PATH}/extrepo/repositories.json") as f:
+    repositories = json.load(f)
+
+command, *args = sys.argv[1:]
+if command == "search":
+    for name, definition in repositories.items():
+        print(f"Found {{name}}:")
+        print(definition)
+elif command in ("enable", "disable") and args[0] in repositories:
+    path = os.path.join(SOURCES_LIST_D, f"extrepo_{{args[0]}}.sources")
+    with open(path, "w") as f:
+        f.write(
+            "Types: deb\\n"
+            f"URIs: file:{CONTAINER_WORK_PATH}/extrepo/{{args[0]}}\\n"
+            "Suites: ./\\n"
+            "Trusted: yes\\n"
+            + ("Enabled: no\\n" if command == "disable" else "")
+        )
+else:
+    sys.exit(f"Unsupported: {{' '.join(sys.argv[1:])}}")
+"""
+
+EXTREPO_DEFINITION = """\
+---
+description: Benchmark stand-in for {name}
+policy: main
+source:
+  Types: deb
+  URIs: file:{work_path}/extrepo/{name}
+  Suites: ./
+"""
+
+EXTREPO_CONFIG = """\
+---
+url: https://extrepo-team.pages.debian.net/extrepo-data
+dist: debian
+version: bookworm
+enabled_policies:
+- main
+# - contrib
+# - non-free
+"""
+
+# Keeps its remotes and apps in a JSON file, enough for flatpak_apps and community.general.flatpak_remote
+FAKE_FLATPAK = """\
+#!/usr/bin/python3
+import json
+import os
+import sys
+
+STATE_PATH = os.path.expanduser("~/.local/share/flatpak/bench-state.json")
+try:
+    with open(STATE_PATH) as f:
+        state = json.load(f)
+except OSError:
+    state = dict(remotes={}, apps=[])
+
+args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+if "--version" in sys.argv:
+    print("Flatpak 1.14.4")
+elif args[0] == "remote-list":
+    for name, url in state["remotes"].items():
+        print(f"{name}\\t{url}\\tuser")
+elif args[0] == "remote-add":
+    state["remotes"][args[1]] = args[2]
+elif args[0] == "list":
+    print("\\n".join(state["apps"]))
+elif args[0] == "install":
+    state["apps"] = sorted(set(state["apps"]) | {ref.split("/")[-3] if "/" in ref else ref for ref in args[2:]})
+else:
+    sys.exit(f"Unsupported: {' '.join(sys.argv[1:])}")
+os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+with open(STATE_PATH, "w") as f:
+    json.dump(state, f)
+"""
+
+# Keeps the installed extensions in a JSON file, enough for editor_extensions
+FAKE_EDITOR = """\
+#!/usr/bin/python3
+import json
+import os
+import sys
+
+STATE_PATH = os.path.expanduser("~/.{name}-bench-extensions.json")
+try:
+    with open(STATE_PATH) as f:
+        extensions = json.load(f)
+except OSError:
+    extensions = {{}}
+
+args = iter(sys.argv[1:])
+for arg in args:
+    if arg == "--list-extensions":
+        for extension, version in sorted(extensions.items()):
+            print(f"{{extension}}@{{version}}")
+    elif arg == "--install-extension":
+        # Either an ID or a cached VSIX, named 'publisher.name@version.vsix'
+        extension = next(args)
+        if extension.endswith(".vsix"):
+            extension = os.path.basename(extension)[: -len(".vsix")]
+        extension, _, version = extension.partition("@")
+        extensions[extension] = version or "1.0.0"
+    elif arg == "--uninstall-extension":
+        extensions.pop(next(args).partition("@")[0], None)
+with open(STATE_PATH, "w") as f:
+    json.dump(extensions, f)
+"""
+
+# Lets ansible.builtin.service start and enable docker without systemd
+FAKE_DOCKER_INIT_SCRIPT = """\
+#!/bin/sh
+### BEGIN INIT INFO
+# Provides:          docker
+# Required-Start:
+# Required-Stop:
+# Default-Start:     2 3 4 5
+# Default-Stop:      0 1 6
+# Short-Description: Benchmark stand-in for the Docker daemon
+### END INIT INFO
+exit 0
+"""
+
+# `pyenv install` unpacks a prebuilt Python from the artifact server instead of building it
+FAKE_PYENV = """\
+#!/usr/bin/python3
+import io
+import os
+import sys
+import tarfile
+import urllib.request
+
+args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+if args[:1] == ["install"]:
+    version_path = os.path.join(os.environ["PYENV_ROOT"], "versions", args[1])
+    if not os.path.isdir(version_path):
+        with urllib.request.urlopen(f"{python_url}/Python-{{args[1]}}.tar.gz") as response:
+            with tarfile.open(fileobj=io.BytesIO(response.read())) as tar:
+                tar.extractall(version_path)
+"""
+
+PYENV_INSTALLER = """\
+#!/bin/sh
+set -e
+mkdir -p "${{PYENV_ROOT}}/bin" "${{PYENV_ROOT}}/versions"
+cat > "${{PYENV_ROOT}}/bin/pyenv" <<'EOF'
+{fake_pyenv}EOF
+chmod +x "${{PYENV_ROOT}}/bin/pyenv"
+"""
+
+NVM_INSTALLER = """\
+#!/bin/sh
+set -e
+mkdir -p "${NVM_DIR}/versions/node"
+printf '# Benchmark stand-in for nvm\\n' > "${NVM_DIR}/nvm.sh"
+"""
+
+# Runs in the fresh container, before the cold run
+PREPARE_SCRIPT = f"""\
+#!/bin/sh
+set -e
+mkdir -p /etc/apt/bench-disabled
+find /etc/apt/sources.list /etc/apt/sources.list.d -maxdepth 1 -type f \\
+    -exec mv {{}} /etc/apt/bench-disabled/ \\;
+cat > /etc/apt/sources.list.d/bench.sources <<EOF
+Types: deb
+URIs: file:{CONTAINER_WORK_PATH}/apt
+Suites: ./
+Trusted: yes
+EOF
+rm -rf /tmp/dotfiles.git && git init -q /tmp/dotfiles.git
+cd /tmp/dotfiles.git
+printf '#!/bin/sh\\necho "Bootstrapping dotfiles"\\n' > install
+chmod +x install
+git add install
+git -c user.name=bench -c user.email=bench@localhost commit -q -m "Benchmark dotfiles"
+git branch -M master
+"""
+
+
+def build_ar_archive(members: List[Tuple[str, bytes]]) -> bytes:
+    archive = io.BytesIO()
+    archive.write(b"!<arch>\n")
+    for name, content in members:
+        header = f"{name:<16}{0:<12}{0:<6}{0:<6}{100644:<8}{len(content):<10}`\n"
+        archive.write(header.encode())
+        archive.write(content)
+        if len(content) % 2:
+            archive.write(b"\n")
+    return archive.getvalue()
+
+
+def build_tarball(files: Dict[str, Tuple[bytes, int]], mode: str = "w:gz") -> bytes:
+    """
+    Packs {path: (content, file mode)} into a tarball.
+    """
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as tar:
+        for path, (content, file_mode) in sorted(files.items()):
+            info = tarfile.TarInfo(path)
+            info.size = len(content)
+            info.mode = file_mode
+            info.mtime = 0
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def build_deb(
+    name: str,
+    files: Optional[Dict[str, Tuple[bytes, int]]] = None,
+    postinst: Optional[str] = None,
+) -> bytes:
+    """
+    Builds a dummy package without dpkg-deb, so that the host needs no Debian tooling.
+    """
+    control = (
+        f"Package: {name}\n"
+        f"Version: {DUMMY_VERSION}\n"
+        "Architecture: all\n"
+        "Maintainer: Benchmark <bench@localhost>\n"
+        f"Description: Benchmark stand-in for {name}\n"
+    )
+    control_files = {"./control": (control.encode(), 0o644)}
+    if postinst:
+        control_files["./postinst"] = (postinst.encode(), 0o755)
+    return build_ar_archive(
+        [
+            ("debian-binary", b"2.0\n"),
+            ("control.tar.gz", build_tarball(control_files)),
+            (
+                "data.tar.gz",
+                build_tarball(
+                    {f"./{path}": file for path, file in (files or {}).items()}
+                ),
+            ),
+        ]
+    )
+
+
+def compute_stanza(deb_path: Path, repository_path: Path) -> str:
+    content = deb_path.read_bytes()
+    name = deb_path.name.split("_")[0]
+    return (
+        f"Package: {name}\n"
+        f"Version: {DUMMY_VERSION}\n"
+        "Architecture: all\n"
+        "Maintainer: Benchmark <bench@localhost>\n"
+        f"Filename: ./{deb_path.relative_to(repository_path)}\n"
+        f"Size: {len(content)}\n"
+        f"SHA256: {hashlib.sha256(content).hexdigest()}\n"
+        f"Description: Benchmark stand-in for {name}\n"
+    )
+
+
+def write_flat_repository(repository_path: Path, debs: Dict[str, bytes]) -> None:
+    """
+    Writes the packages with their Packages index and Release file, as a flat repository.
+    """
+    repository_path.mkdir(parents=True, exist_ok=True)
+    stanzas = []
+    for name, content in sorted(debs.items()):
+        deb_path = repository_path / f"{name}_{DUMMY_VERSION}_all.deb"
+        deb_path.write_bytes(content)
+        stanzas.append(compute_stanza(deb_path, repository_path))
+    packages = "\n".join(stanzas).encode()
+    indexes = {"Packages": packages, "Packages.gz": gzip.compress(packages, mtime=0)}
+    for filename, content in indexes.items():
+        (repository_path / filename).write_bytes(content)
+    (repository_path / "Release").write_text(
+        "Origin: bench\nLabel: bench\nSuite: bench\nCodename: bench\n"
+        f"Date: {time.strftime('%a, %d %b %Y %H:%M:%S UTC', time.gmtime())}\n"
+        "Architectures: all\nSHA256:\n"
+        + "".join(
+            f" {hashlib.sha256(content).hexdigest()} {len(content)} {filename}\n"
+            for filename, content in indexes.items()
+        )
+    )
+
+
+def read_config(path: Path) -> Dict:
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def list_requested_packages() -> List[str]:
+    """
+    Every package the configuration and the roles' requirements can request.
+    """
+    default_config = read_config(REPOSITORY_PATH / "config" / "default.config.yml")
+    packages = list(default_config["_common_packages"])
+    for filename, key in [
+        ("vm.config.yml", "_vm_only_packages"),
+        ("physical.config.yml", "_physical_only_packages"),
+    ]:
+        packages += read_config(REPOSITORY_PATH / "config" / filename).get(key, [])
+    packages += read_config(
+        REPOSITORY_PATH / "roles" / "docker" / "defaults" / "main.yml"
+    )["docker_packages"]
+    packages += read_config(
+        REPOSITORY_PATH / "roles" / "pyenv" / "defaults" / "main.yml"
+    )["pyenv_python_build_dependencies"]
+    return sorted(set(packages + STATIC_PACKAGES))
+
+
+def list_extrepo_repositories() -> List[str]:
+    default_config = read_config(REPOSITORY_PATH / "config" / "default.config.yml")
+    return sorted(
+        set(default_config["default_extrepo_repositories"])
+        | {"vscode", "vscodium", "docker-ce"}
+    )
+
+
+def build_apt_stand_ins(work_path: Path) -> None:
+    debs = {name: build_deb(name) for name in list_requested_packages()}
+    debs["extrepo"] = build_deb(
+        "extrepo",
+        {
+            "usr/bin/extrepo": (FAKE_EXTREPO.encode(), 0o755),
+            "etc/extrepo/config.yaml": (EXTREPO_CONFIG.encode(), 0o644),
+        },
+    )
+    debs["flatpak"] = build_deb(
+        "flatpak", {"usr/bin/flatpak": (FAKE_FLATPAK.encode(), 0o755)}
+    )
+    for editor in ["code", "codium"]:
+        debs[editor] = build_deb(
+            editor,
+            {f"usr/bin/{editor}": (FAKE_EDITOR.format(name=editor).encode(), 0o755)},
+        )
+    debs["docker-ce"] = build_deb(
+        "docker-ce",
+        {"etc/init.d/docker": (FAKE_DOCKER_INIT_SCRIPT.encode(), 0o755)},
+        postinst="#!/bin/sh\ngetent group docker >/dev/null || groupadd docker\n",
+    )
+    write_flat_repository(work_path / "apt", debs)
+
+    repositories = list_extrepo_repositories()
+    for name in repositories:
+        write_flat_repository(work_path / "extrepo" / name, {})
+    (work_path / "extrepo" / "repositories.json").write_text(
+        json.dumps(
+            {
+                name: EXTREPO_DEFINITION.format(
+                    name=name, work_path=CONTAINER_WORK_PATH
+                )
+                for name in repositories
+            }
+        )
+    )
+
+
+def store_artifact(files_path: Path, content: bytes) -> str:
+    """
+    Stores an artifact the way the bundle does, under its digest.
+    Returns its checksum, as the roles expect it.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    (files_path / digest).write_bytes(content)
+    return f"sha256:{digest}"
+
+
+def build_node_mirror(mirror_path: Path) -> None:
+    """
+    Writes a Node release with its SHASUMS256.txt, laid out like https://nodejs.org/dist.
+    """
+    release_path = mirror_path / NODE_VERSION
+    release_path.mkdir(parents=True, exist_ok=True)
+    name = f"node-{NODE_VERSION}-linux-{NODE_ARCHS[platform.machine()]}"
+    tarball = build_tarball({f"{name}/bin/node": (b"#!/bin/sh\n", 0o755)}, mode="w:xz")
+    (release_path / f"{name}.tar.xz").write_bytes(tarball)
+    (release_path / "SHASUMS256.txt").write_text(
+        f"{hashlib.sha256(tarball).hexdigest()}  {name}.tar.xz\n"
+    )
+
+
+def build_open_vsx(gallery_path: Path, files_url: str) -> None:
+    """
+    Writes the metadata Open VSX returns for the latest version of every configured extension,
+    next to the VSIX it points at.
+    """
+    default_config = read_config(REPOSITORY_PATH / "config" / "default.config.yml")
+    for extension in default_config["vscode_extensions"]:
+        publisher, _, name = extension.partition(".")
+        vsix_name = f"{extension}-1.0.0.vsix"
+        (gallery_path / publisher).mkdir(parents=True, exist_ok=True)
+        (gallery_path / publisher / name).write_text(
+            json.dumps(
+                dict(
+                    version="1.0.0",
+                    files=dict(download=f"{files_url}open-vsx/{vsix_name}"),
+                )
+            )
+        )
+        vsix = io.BytesIO()
+        with zipfile.ZipFile(vsix, "w") as archive:
+            archive.writestr("extension.vsixmanifest", "<PackageManifest/>")
+        (gallery_path / vsix_name).write_bytes(vsix.getvalue())
+
+
+def build_artifact_stand_ins(work_path: Path, files_url: str) -> Dict:
+    """
+    Returns the extra vars that point the roles at the dummy artifacts.
+    """
+    files_path = work_path / "files"
+    files_path.mkdir(parents=True, exist_ok=True)
+    store = partial(store_artifact, files_path)
+    nerd_fonts_defaults = read_config(
+        REPOSITORY_PATH / "roles" / "nerd_fonts" / "defaults" / "main.yml"
+    )
+    build_node_mirror(files_path / "node")
+    build_open_vsx(files_path / "open-vsx", files_url)
+    (files_path / "python").mkdir(exist_ok=True)
+    (files_path / "python" / f"Python-{PYTHON_VERSION}.tar.gz").write_bytes(
+        build_tarball({"bin/python3": (b"#!/bin/sh\n", 0o755)})
+    )
+    pyenv_installer = PYENV_INSTALLER.format(
+        fake_pyenv=FAKE_PYENV.format(python_url=f"{files_url}python")
+    )
+    return dict(
+        bundle_files_url=files_url,
+        pyenv_installer_script_checksum=store(pyenv_installer.encode()),
+        nvm_installer_script_checksum=store(NVM_INSTALLER.encode()),
+        starship_archive_checksum=store(
+            build_tarball({"starship": (b"#!/bin/sh\n", 0o755)})
+        ),
+        nerd_fonts_font_list=[
+            dict(
+                name=font["name"],
+                hash=store(
+                    build_tarball(
+                        {f"{font['name']}NerdFont-Regular.ttf": (b"\0", 0o644)},
+                        mode="w:xz",
+                    )
+                ),
+            )
+            for font in nerd_fonts_defaults["nerd_fonts_font_list"]
+        ],
+        python_versions=[PYTHON_VERSION],
+        # Kept in the container, so that every cold run installs Python from scratch
+        pyenv_python_store_path="/var/tmp/bench-python-store",
+        node_versions=[NODE_VERSION],
+        node_default_version=NODE_VERSION,
+        nvm_node_mirror_url=f"{files_url}node",
+        dotfiles_repo="file:///tmp/dotfiles.git",
+        # The stand-in can't answer the Marketplace's POST queries, so VS Code uses Open VSX as well
+        dev_tools_vscode_extensions_gallery="open-vsx",
+        dev_tools_vscode_extensions_gallery_url=f"{files_url}open-vsx",
+        dev_tools_vscodium_extensions_gallery_url=f"{files_url}open-vsx",
+        # Installed by the diodonfrost.jetbrains_toolbox role straight from JetBrains,
+        # for which there is no stand-in
+        install_jetbrains_toolbox=False,
+    )
+
+
+class ArtifactServer:
+    """
+    Serves the artifacts over HTTP, from a thread of its own.
+    """
+
+    def __init__(self, files_path: Path):
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            partial(QuietRequestHandler, directory=str(files_path)),
+        )
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self) -> "ArtifactServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class QuietRequestHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@contextmanager
+def run_container(
+    runtime: str, image: str, work_path: Path, name: str
+) -> Iterator[None]:
+    """
+    Starts a disposable container, which sees the repository read-only and the stand-ins read-write.
+    The host's network is shared, so that the artifact server is reachable on 127.0.0.1.
+    """
+    subprocess.run(
+        [
+            runtime,
+            "run",
+            "--detach",
+            "--rm",
+            "--name",
+            name,
+            "--network",
+            "host",
+            "--volume",
+            f"{REPOSITORY_PATH}:{CONTAINER_REPOSITORY_PATH}:ro",
+            "--volume",
+            f"{work_path}:{CONTAINER_WORK_PATH}",
+            image,
+            "sleep",
+            "infinity",
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        yield
+    finally:
+        subprocess.run(
+            [runtime, "rm", "--force", name],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+def run_playbook(runtime: str, name: str, runs_path: str, verbose: bool) -> None:
+    subprocess.run(
+        [
+            runtime,
+            "exec",
+            "--workdir",
+            CONTAINER_REPOSITORY_PATH,
+            "--env",
+            f"PROFILE_TIMELINE_RUNS_PATH={runs_path}",
+            "--env",
+            "ANSIBLE_RETRY_FILES_ENABLED=false",
+            name,
+            "ansible-playbook",
+            "playbook.yml",
+            "--extra-vars",
+            f"@{CONTAINER_WORK_PATH}/extra-vars.json",
+        ],
+        check=True,
+        stdout=None if verbose else subprocess.DEVNULL,
+    )
+
+
+def read_timeline(runs_path: Path) -> Dict[str, float]:
+    """
+    Sums up a run's durations per role, with the whole run under 'total'.
+    """
+    timelines = sorted(runs_path.glob("*/timeline.json"))
+    if not timelines:
+        raise RuntimeError(f"No timeline was written to {runs_path}")
+    timeline = json.loads(timelines[-1].read_text())
+    durations = {"total": timeline["duration"]}
+    for key, duration in timeline["summary"]["roles"].items():
+        role = key.partition(" | ")[2]
+        durations[role] = round(durations.get(role, 0.0) + duration, 3)
+    return durations
+
+
+def run_benchmarks(
+    runtime: str, image: str, repeat: int, verbose: bool
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Returns {phase: {role: {median, min, max}}} for the cold and warm runs.
+    """
+    durations = dict(cold=[], warm=[])
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_path = Path(work_dir)
+        work_path.chmod(0o755)
+        build_apt_stand_ins(work_path)
+        (work_path / "prepare.sh").write_text(PREPARE_SCRIPT)
+        with ArtifactServer(work_path / "files") as server:
+            (work_path / "extra-vars.json").write_text(
+                json.dumps(build_artifact_stand_ins(work_path, f"{server.url}/"))
+            )
+            for index in range(repeat):
+                name = f"ansible-dev-pc-bench-{index}"
+                with run_container(runtime, image, work_path, name):
+                    subprocess.run(
+                        [
+                            runtime,
+                            "exec",
+                            name,
+                            "sh",
+                            f"{CONTAINER_WORK_PATH}/prepare.sh",
+                        ],
+                        check=True,
+                    )
+                    for phase in ["cold", "warm"]:
+                        runs_path = f"runs/{index}/{phase}"
+                        run_playbook(
+                            runtime, name, f"{CONTAINER_WORK_PATH}/{runs_path}", verbose
+                        )
+                        durations[phase].append(read_timeline(work_path / runs_path))
+        # Files written in the container may belong to its root
+        shutil.rmtree(work_path, ignore_errors=True)
+
+    results = {}
+    for phase, runs in durations.items():
+        roles = sorted({role for run in runs for role in run})
+        results[phase] = {}
+        for role in roles:
+            values = [run.get(role, 0.0) for run in runs]
+            results[phase][role] = dict(
+                median=statistics.median(values), min=min(values), max=max(values)
+            )
+    return results
+
+
+def find_regressions(
+    baseline: Dict, current: Dict, tolerance: float, min_seconds: float
+) -> List[str]:
+    """
+    Compares every role's median per phase. Roles missing from either run are ignored.
+    """
+    regressions = []
+    for phase, roles in current["results"].items():
+        for role, result in roles.items():
+            baseline_result = baseline["results"].get(phase, {}).get(role)
+            if baseline_result is None:
+                continue
+            expected = baseline_result["median"]
+            if (
+                result["median"] > expected * (1 + tolerance)
+                and result["median"] - expected > min_seconds
+            ):
+                regressions.append(
+                    f"{phase} {role}: {result['median']:.1f}s, expected {expected:.1f}s"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runtime", default="podman", help="podman or docker")
+    parser.add_argument("--image", default="ansible-dev-pc-bench")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown against the baseline, as a fraction",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=2.0,
+        help="Slowdowns below this many seconds are never reported",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="Also write the results here")
+    parser.add_argument("--verbose", action="store_true", help="Show Ansible's output")
+    args = parser.parse_args()
+
+    current = dict(
+        image=args.image,
+        results=run_benchmarks(args.runtime, args.image, args.repeat, args.verbose),
+    )
+    for phase, roles in current["results"].items():
+        for role, result in roles.items():
+            print(f"{phase:<5} {role:<30} {result['median']:>8.1f}s")
+
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+    if args.update_baseline or not args.baseline.exists():
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = find_regressions(baseline, current, args.tolerance, args.min_seconds)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
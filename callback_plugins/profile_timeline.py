@@ -0,0 +1,391 @@
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ansible.plugins.callback import CallbackBase
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+    name: profile_timeline
+    type: aggregate
+    short_description: Records how long every task, loop item, role and host took
+    description:
+      - Writes a JSON timeline and a flamegraph-compatible folded-stack file
+        into a directory of their own for every run.
+      - Warns about tasks that got slower than in the previous run.
+      - In fleet mode, shows which role every host is in as the run goes,
+        and ends with a table of every host's duration, changed and failed tasks and slowest roles.
+    requirements:
+      - enable in configuration
+    options:
+      runs_path:
+        description:
+          - Directory in which every run gets a directory of its own.
+          - A relative path is relative to the playbook's directory.
+        default: .profile
+        env:
+          - name: PROFILE_TIMELINE_RUNS_PATH
+        ini:
+          - section: callback_profile_timeline
+            key: runs_path
+        type: str
+      regression_ratio:
+        description: How many times slower than in the previous run a task needs to be, to be reported.
+        default: 1.5
+        env:
+          - name: PROFILE_TIMELINE_REGRESSION_RATIO
+        ini:
+          - section: callback_profile_timeline
+            key: regression_ratio
+        type: float
+      regression_min_seconds:
+        description: How many seconds slower a task needs to be, to be reported. Keeps short tasks' jitter out.
+        default: 2.0
+        env:
+          - name: PROFILE_TIMELINE_REGRESSION_MIN_SECONDS
+        ini:
+          - section: callback_profile_timeline
+            key: regression_min_seconds
+        type: float
+      fleet:
+        description: Show every host's progress and a summary table, for runs against many hosts.
+        default: false
+        env:
+          - name: PROFILE_TIMELINE_FLEET
+        ini:
+          - section: callback_profile_timeline
+            key: fleet
+        type: bool
+      fleet_slowest_roles:
+        description: How many of every host's slowest roles the summary table lists.
+        default: 3
+        env:
+          - name: PROFILE_TIMELINE_FLEET_SLOWEST_ROLES
+        ini:
+          - section: callback_profile_timeline
+            key: fleet_slowest_roles
+        type: int
+"""
+
+TIMELINE_FILENAME = "timeline.json"
+FOLDED_STACKS_FILENAME = "stacks.folded"
+
+
+def compute_task_key(entry: Dict) -> str:
+    """
+    Identifies a task across runs. Task paths contain line numbers, which change
+    with unrelated edits, so the role and name are used instead.
+    Example: 'extrepo : Enable repositories'
+    """
+    return f"{entry['role']} : {entry['task']}" if entry["role"] else entry["task"]
+
+
+def summarize(entries: List[Dict]) -> Dict[str, Dict[str, float]]:
+    """
+    Sums up the durations of every task, role and host.
+    Tasks that share a name (e.g. included multiple times) are added together.
+    """
+    summary = dict(tasks={}, roles={}, hosts={})
+    for entry in entries:
+        for group, key in (
+            ("tasks", f"{entry['host']} | {compute_task_key(entry)}"),
+            ("roles", f"{entry['host']} | {entry['role'] or '(play)'}"),
+            ("hosts", entry["host"]),
+        ):
+            summary[group][key] = round(
+                summary[group].get(key, 0.0) + entry["duration"], 3
+            )
+    return summary
+
+
+def build_folded_stacks(entries: List[Dict]) -> List[str]:
+    """
+    Builds a line per task (or loop item) in the format flamegraph.pl expects,
+    with frames for the host, play, role and task, weighed in milliseconds.
+    Example: 'localhost;Dev PC;extrepo;Enable repositories;jellyfin 1520'
+    """
+
+    def frame(name: str) -> str:
+        return name.replace(";", ",").replace("\n", " ")
+
+    lines = []
+    for entry in entries:
+        frames = [
+            entry["host"],
+            entry["play"],
+            entry["role"] or "(play)",
+            entry["task"],
+        ]
+        items = entry["items"] or [dict(label=None, duration=entry["duration"])]
+        for item in items:
+            stack = frames + ([item["label"]] if item["label"] is not None else [])
+            lines.append(
+                f"{';'.join(frame(name) for name in stack)} {round(item['duration'] * 1000)}"
+            )
+    return lines
+
+
+def find_regressions(
+    previous: Dict[str, float],
+    current: Dict[str, float],
+    ratio: float,
+    min_seconds: float,
+) -> List[Dict]:
+    """
+    Lists the tasks that took at least `ratio` times and `min_seconds` longer
+    than they did in the previous run, sorted by how many seconds they lost, most first.
+    """
+    regressions = []
+    for key, duration in current.items():
+        previous_duration = previous.get(key)
+        if previous_duration is None:
+            continue
+        if (
+            duration - previous_duration >= min_seconds
+            and duration >= previous_duration * ratio
+        ):
+            regressions.append(
+                dict(task=key, previous=previous_duration, current=duration)
+            )
+    return sorted(regressions, key=lambda r: r["current"] - r["previous"], reverse=True)
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Example: 83.4 -> '1:23'
+    """
+    minutes, seconds = divmod(round(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def build_fleet_summary(
+    entries: List[Dict], host_stats: Dict[str, Dict[str, int]], slowest_roles: int
+) -> List[str]:
+    """
+    Builds a table with a row per host, slowest host first: how long the host took,
+    how many of its tasks changed and failed, and its slowest roles.
+    """
+    spans, roles = {}, {}
+    for entry in entries:
+        start, end = spans.get(entry["host"], (entry["start"], entry["end"]))
+        spans[entry["host"]] = (min(start, entry["start"]), max(end, entry["end"]))
+        host_roles = roles.setdefault(entry["host"], {})
+        role = entry["role"] or "(play)"
+        host_roles[role] = host_roles.get(role, 0.0) + entry["duration"]
+    durations = {
+        host: spans[host][1] - spans[host][0] if host in spans else 0.0
+        for host in host_stats
+    }
+
+    rows = [("Host", "Duration", "Changed", "Failed", "Slowest roles")]
+    for host in sorted(host_stats, key=lambda host: -durations[host]):
+        stats = host_stats[host]
+        slowest = sorted(roles.get(host, {}).items(), key=lambda role: -role[1])
+        rows.append(
+            (
+                host,
+                format_duration(durations[host]),
+                str(stats.get("changed", 0)),
+                str(stats.get("failures", 0) + stats.get("unreachable", 0)),
+                ", ".join(
+                    f"{role} ({format_duration(duration)})"
+                    for role, duration in slowest[:slowest_roles]
+                ),
+            )
+        )
+    widths = [max(len(row[column]) for row in rows) for column in range(4)]
+    return [
+        "  ".join(
+            [cell.ljust(width) for cell, width in zip(row, widths)] + [row[4]]
+        ).rstrip()
+        for row in rows
+    ]
+
+
+def compute_run_name(started_at: float, pid: int) -> str:
+    """
+    Names a run after its start time, down to the microsecond, and the controller's PID,
+    so that runs started in the same second get directories of their own and still sort by start time.
+    Example: (1704272400.25, 4242) -> '20240103T100000.250000-4242'
+    """
+    return f"{datetime.fromtimestamp(started_at).strftime('%Y%m%dT%H%M%S.%f')}-{pid}"
+
+
+def resolve_runs_path(runs_path: str, playbook_dir: str) -> str:
+    return os.path.join(playbook_dir, os.path.expanduser(runs_path))
+
+
+def find_previous_timeline(runs_path: str, run_name: str) -> Optional[Dict]:
+    """
+    Run directories are named after their start time, so the previous run is the
+    latest directory that sorts before the current one and has a timeline.
+    """
+    try:
+        names = sorted(name for name in os.listdir(runs_path) if name < run_name)
+    except OSError:
+        return None
+    for name in reversed(names):
+        try:
+            with open(os.path.join(runs_path, name, TIMELINE_FILENAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+class CallbackModule(CallbackBase):
+    """
+    Records a timeline of the run, to tell where provisioning time is spent.
+    """
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "profile_timeline"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super().__init__()
+        self._started_at = time.time()
+        self._play_name = ""
+        self._entries = []
+        # Keyed by (host, task uuid)
+        self._running = {}
+        # Every host's current role, in fleet mode
+        self._host_roles = {}
+
+    def v2_playbook_on_start(self, playbook):
+        self._started_at = time.time()
+        self._playbook = os.path.basename(playbook._file_name)
+        self._playbook_dir = os.path.dirname(os.path.abspath(playbook._file_name))
+
+    def v2_playbook_on_play_start(self, play):
+        self._play_name = play.get_name().strip()
+
+    def v2_runner_on_start(self, host, task):
+        now = time.time()
+        role = task._role.get_name() if task._role else None
+        if self.get_option("fleet") and self._host_roles.get(host.get_name()) != role:
+            self._host_roles[host.get_name()] = role
+            self._display.display(
+                f"[{format_duration(now - self._started_at)}] {host.get_name()}: {role or self._play_name}"
+            )
+        self._running[(host.get_name(), task._uuid)] = dict(
+            host=host.get_name(),
+            play=self._play_name,
+            role=role,
+            task=task.get_name().strip(),
+            path=task.get_path(),
+            start=now,
+            last_mark=now,
+            items=[],
+        )
+
+    def _record_item(self, result, status: str) -> None:
+        running = self._running.get((result._host.get_name(), result._task._uuid))
+        if running is None:
+            return
+        now = time.time()
+        running["items"].append(
+            dict(
+                label=str(self._get_item_label(result._result)),
+                duration=round(now - running["last_mark"], 3),
+                status=status,
+            )
+        )
+        running["last_mark"] = now
+
+    def _record(self, result, status: str) -> None:
+        running = self._running.pop((result._host.get_name(), result._task._uuid), None)
+        if running is None:
+            return
+        end = time.time()
+        del running["last_mark"]
+        running.update(
+            start=round(running["start"] - self._started_at, 3),
+            end=round(end - self._started_at, 3),
+            duration=round(end - running["start"], 3),
+            status=status,
+        )
+        self._entries.append(running)
+
+    def v2_runner_item_on_ok(self, result):
+        self._record_item(result, "ok")
+
+    def v2_runner_item_on_failed(self, result):
+        self._record_item(result, "failed")
+
+    def v2_runner_item_on_skipped(self, result):
+        self._record_item(result, "skipped")
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, "ok")
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, "failed")
+
+    def v2_runner_on_skipped(self, result):
+        self._record(result, "skipped")
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, "unreachable")
+
+    def v2_playbook_on_stats(self, stats):
+        if self.get_option("fleet"):
+            for line in build_fleet_summary(
+                self._entries,
+                {host: stats.summarize(host) for host in sorted(stats.processed)},
+                self.get_option("fleet_slowest_roles"),
+            ):
+                self._display.display(line)
+
+        runs_path = resolve_runs_path(
+            self.get_option("runs_path"), getattr(self, "_playbook_dir", os.getcwd())
+        )
+        run_name = compute_run_name(self._started_at, os.getpid())
+        run_path = os.path.join(runs_path, run_name)
+
+        summary = summarize(self._entries)
+        previous = find_previous_timeline(runs_path, run_name)
+        regressions = (
+            find_regressions(
+                previous["summary"]["tasks"],
+                summary["tasks"],
+                self.get_option("regression_ratio"),
+                self.get_option("regression_min_seconds"),
+            )
+            if previous is not None
+            else []
+        )
+
+        try:
+            os.makedirs(run_path, exist_ok=True)
+            with open(os.path.join(run_path, TIMELINE_FILENAME), "w") as f:
+                json.dump(
+                    dict(
+                        playbook=getattr(self, "_playbook", None),
+                        started_at=self._started_at,
+                        duration=round(time.time() - self._started_at, 3),
+                        entries=self._entries,
+                        summary=summary,
+                        previous_run=previous["run"] if previous else None,
+                        regressions=regressions,
+                        run=run_name,
+                    ),
+                    f,
+                    indent=2,
+                )
+            with open(os.path.join(run_path, FOLDED_STACKS_FILENAME), "w") as f:
+                f.writelines(f"{line}\n" for line in build_folded_stacks(self._entries))
+        except OSError as e:
+            self._display.warning(f"Could not write the run's timeline: {e}")
+            return
+
+        self._display.display(f"Timeline written to {run_path}")
+        for regression in regressions:
+            self._display.warning(
+                f"{regression['task']} took {regression['current']:.1f}s, "
+                f"{regression['previous']:.1f}s in the previous run"
+            )
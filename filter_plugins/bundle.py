@@ -0,0 +1,56 @@
+import re
+from typing import Dict, List
+
+__metaclass__ = type
+
+# Example: install_package "Python-3.12.1" "https://www.python.org/ftp/python/3.12.1/Python-3.12.1.tar.xz#8dfb..." standard
+PYTHON_BUILD_PACKAGE_URL_REGEX = re.compile(
+    r'"(?P<url>[a-z]+://[^"#]+)#(?P<digest>[0-9a-f]{64})"'
+)
+
+
+def compute_bundle_filename(checksum: str) -> str:
+    """
+    Artifacts are stored in the bundle under the digest of their checksum.
+    Example: 'sha256:76c1...' -> '76c1...'
+    """
+    return checksum.partition(":")[2].lower()
+
+
+def bundled(url: str, checksum: str, bundle_files_url: str) -> str:
+    """
+    Points a download at its copy in the bundle, when provisioning from one.
+    Example: '{{ starship_release_archive_url | bundled(starship_archive_checksum, bundle_files_url) }}'
+    """
+    if not bundle_files_url:
+        return url
+    return f"{bundle_files_url.rstrip('/')}/{compute_bundle_filename(checksum)}"
+
+
+def bundle_checksums(manifest: Dict) -> Dict[str, str]:
+    """
+    Maps the url of every artifact in a bundle's manifest.json to its checksum.
+    Example: "{{ lookup('file', bundle_path ~ '/manifest.json') | from_json | bundle_checksums }}"
+    """
+    return {artifact["url"]: artifact["checksum"] for artifact in manifest["artifacts"]}
+
+
+def python_build_artifacts(definition: str) -> List[Dict[str, str]]:
+    """
+    Lists the checksummed packages of a python-build definition, e.g. the CPython sources,
+    which python-build looks up by their checksum in a bundle's files.
+    Example: "{{ lookup('file', 'plugins/python-build/share/python-build/3.12.1') | python_build_artifacts }}"
+    """
+    return [
+        dict(url=match["url"], checksum=f"sha256:{match['digest']}")
+        for match in PYTHON_BUILD_PACKAGE_URL_REGEX.finditer(definition)
+    ]
+
+
+class FilterModule:
+    def filters(self):
+        return {
+            "bundled": bundled,
+            "bundle_checksums": bundle_checksums,
+            "python_build_artifacts": python_build_artifacts,
+        }
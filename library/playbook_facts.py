@@ -0,0 +1,177 @@
+#!/usr/bin/python
+import json
+import os
+import platform
+import pwd
+import re
+import time
+from typing import Dict, List, Optional
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.facts.system.distribution import DistributionFactCollector
+
+__metaclass__ = type
+
+SYS_VENDOR_PATH = "/sys/devices/virtual/dmi/id/sys_vendor"
+DISK_BY_LABEL_PATH = "/dev/disk/by-label/"
+GNOME_SESSION_PATH = "/usr/bin/gnome-session"
+CD_DEVICE_PATH = "/dev/sr0"
+
+# The facts of Ansible's distribution collector the Playbook uses, e.g. ansible_distribution
+DISTRIBUTION_FACTS = [
+    "os_family",
+    "distribution",
+    "distribution_release",
+    "distribution_version",
+    "distribution_major_version",
+]
+# Bumped whenever the cached facts change, which invalidates older caches
+CACHE_VERSION = 2
+UDEV_ESCAPE_REGEX = re.compile(rb"\\x([0-9a-fA-F]{2})")
+
+
+def read_sys_vendor() -> str:
+    try:
+        with open(SYS_VENDOR_PATH) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def collect_distribution_facts(module: AnsibleModule) -> Dict[str, str]:
+    """
+    Identifies the distribution with Ansible's own fact collector, so that the facts match
+    what `setup` reports and what third-party roles expect, e.g. 'Linux Mint' for Linux Mint.
+    """
+    facts = DistributionFactCollector().collect(module)
+    return {name: facts.get(name, "") for name in DISTRIBUTION_FACTS}
+
+
+def unescape_udev_label(label: str) -> str:
+    """
+    udev escapes special characters as '\\xNN', e.g. spaces are '\\x20'.
+    Both escaped and unescaped bytes are UTF-8.
+    Example: 'Caf\\xc3\\xa9\\x20Disk' -> 'Café Disk'
+    """
+    return UDEV_ESCAPE_REGEX.sub(
+        lambda match: bytes([int(match[1], 16)]), os.fsencode(label)
+    ).decode("utf-8", errors="replace")
+
+
+def get_device_label(device_path: str) -> str:
+    """
+    Looks up a device's filesystem label through udev's /dev/disk/by-label/ symlinks.
+    udev escapes special characters, e.g. spaces are '\\x20'.
+    """
+    try:
+        labels = os.listdir(DISK_BY_LABEL_PATH)
+    except OSError:
+        return ""
+    for label in sorted(labels):
+        if os.path.realpath(os.path.join(DISK_BY_LABEL_PATH, label)) == device_path:
+            return unescape_udev_label(label)
+    return ""
+
+
+def collect_static_facts(
+    module: AnsibleModule, virtual_machine_vendors: List[str]
+) -> Dict:
+    """
+    Collects the facts that don't change between runs, which makes them safe to cache.
+    """
+    sys_vendor = read_sys_vendor()
+    return dict(
+        sys_vendor=sys_vendor,
+        is_virtual_machine=sys_vendor in virtual_machine_vendors,
+        system=platform.system(),
+        architecture=platform.machine(),
+        has_gnome_session=os.path.exists(GNOME_SESSION_PATH),
+        **collect_distribution_facts(module),
+    )
+
+
+def collect_volatile_facts() -> Dict:
+    """
+    Collects the facts that may change at any time. These are cheap and never cached.
+    """
+    return dict(
+        user_id=pwd.getpwuid(os.getuid()).pw_name,
+        env=dict(os.environ),
+        sr0_label=get_device_label(CD_DEVICE_PATH),
+    )
+
+
+def read_cache(
+    cache_path: str, ttl: int, virtual_machine_vendors: List[str]
+) -> Optional[Dict]:
+    if ttl <= 0:
+        return None
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or time.time() - cache.get("collected_at", 0) > ttl:
+        return None
+    if cache.get("version") != CACHE_VERSION:
+        return None
+    if cache.get("virtual_machine_vendors") != virtual_machine_vendors:
+        return None
+    return cache.get("facts")
+
+
+def write_cache(
+    cache_path: str, facts: Dict, virtual_machine_vendors: List[str]
+) -> None:
+    # The cache is merely an optimisation, so failing to write it is not an error
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(
+                dict(
+                    version=CACHE_VERSION,
+                    collected_at=time.time(),
+                    virtual_machine_vendors=virtual_machine_vendors,
+                    facts=facts,
+                ),
+                f,
+            )
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
+
+def run_module():
+    module_args = dict(
+        cache_path=dict(type="path", default="~/.cache/ansible-dev-pc/facts.json"),
+        cache_ttl=dict(type="int", default=86400),
+        virtual_machine_vendors=dict(
+            type="list", elements="str", default=["QEMU", "innotek GmbH"]
+        ),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    cache_path = module.params["cache_path"]
+    vendors = module.params["virtual_machine_vendors"]
+    static_facts = read_cache(cache_path, module.params["cache_ttl"], vendors)
+    cached = static_facts is not None
+    if not cached:
+        static_facts = collect_static_facts(module, vendors)
+        if module.params["cache_ttl"] > 0:
+            write_cache(cache_path, static_facts, vendors)
+
+    module.exit_json(
+        changed=False,
+        cached=cached,
+        ansible_facts=dict(static_facts, **collect_volatile_facts()),
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/python
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from ansible.module_utils.basic import AnsibleModule
+
+__metaclass__ = type
+
+DPKG_QUERY_EXECUTABLE = "dpkg-query"
+
+
+def read_journal(path: str) -> Dict[str, Dict]:
+    try:
+        with open(path) as f:
+            journal = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return journal if isinstance(journal, dict) else {}
+
+
+def write_journal(path: str, journal: Dict[str, Dict]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(journal, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def probe_path(path: str) -> Optional[List[int]]:
+    """
+    A path's modification time and size, or None when it doesn't exist.
+    """
+    try:
+        stat = os.stat(os.path.expanduser(path))
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def probe_packages(module: AnsibleModule, packages: List[str]) -> Dict[str, str]:
+    """
+    The installed versions of the packages, in a single dpkg-query call.
+    Packages that are not installed are left out.
+    """
+    if not packages:
+        return {}
+    cmd = [
+        DPKG_QUERY_EXECUTABLE,
+        "--show",
+        "--showformat",
+        "${Package} ${db:Status-Status} ${Version}\n",
+        *sorted(set(packages)),
+    ]
+    # Exits with 1 when any of the packages is unknown, which is no error here
+    rc, out, err = module.run_command(cmd)
+    if rc not in (0, 1):
+        module.fail_json(
+            msg=f"Error attempting to look up package versions [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+    versions = {}
+    for line in out.splitlines():
+        parts = line.split(" ")
+        if len(parts) == 3 and parts[1] == "installed":
+            versions[parts[0]] = parts[2]
+    return versions
+
+
+def compute_fingerprint(
+    role: Dict, path_probes: Dict[str, Optional[List[int]]], versions: Dict[str, str]
+) -> str:
+    """
+    Hashes the role's resolved variables together with the state of its declared host probes.
+    """
+    return hashlib.sha256(
+        json.dumps(
+            dict(
+                inputs=role["inputs"],
+                paths={path: path_probes[path] for path in role["paths"]},
+                packages={
+                    package: versions.get(package) for package in role["packages"]
+                },
+            ),
+            sort_keys=True,
+        ).encode()
+    ).hexdigest()
+
+
+def compute_fingerprints(module: AnsibleModule, roles: List[Dict]) -> Dict[str, str]:
+    paths = {path for role in roles for path in role["paths"]}
+    path_probes = {path: probe_path(path) for path in paths}
+    versions = probe_packages(
+        module, [package for role in roles for package in role["packages"]]
+    )
+    return {
+        role["name"]: compute_fingerprint(role, path_probes, versions) for role in roles
+    }
+
+
+def run_module():
+    module_args = dict(
+        operation=dict(type="str", required=True, choices=["check", "record"]),
+        path=dict(type="path", required=True),
+        roles=dict(
+            type="list",
+            elements="dict",
+            required=True,
+            options=dict(
+                name=dict(type="str", required=True),
+                inputs=dict(type="str", required=True),
+                paths=dict(type="list", elements="str", default=[]),
+                packages=dict(type="list", elements="str", default=[]),
+            ),
+        ),
+        force=dict(type="bool", default=False),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    path = module.params["path"]
+    roles = module.params["roles"]
+    journal = read_journal(path)
+    fingerprints = compute_fingerprints(module, roles)
+
+    if module.params["operation"] == "check":
+        unchanged = [
+            role["name"]
+            for role in roles
+            if not module.params["force"]
+            and journal.get(role["name"], {}).get("fingerprint")
+            == fingerprints[role["name"]]
+        ]
+        module.exit_json(
+            changed=False,
+            unchanged=unchanged,
+            pending=[role["name"] for role in roles if role["name"] not in unchanged],
+        )
+
+    changed = any(
+        journal.get(name, {}).get("fingerprint") != fingerprint
+        for name, fingerprint in fingerprints.items()
+    )
+    if changed and not module.check_mode:
+        for name, fingerprint in fingerprints.items():
+            journal[name] = dict(fingerprint=fingerprint, recorded_at=int(time.time()))
+        write_journal(path, journal)
+    module.exit_json(changed=changed, fingerprints=fingerprints)
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import playbook_facts
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+@pytest.fixture(autouse=True)
+def system_paths(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    sys_vendor = tmp_path / "sys_vendor"
+    sys_vendor.write_text("innotek GmbH\n")
+    by_label = tmp_path / "by-label"
+    by_label.mkdir()
+    monkeypatch.setattr(playbook_facts, "SYS_VENDOR_PATH", str(sys_vendor))
+    # What Ansible's collector reports on Linux Mint
+    monkeypatch.setattr(
+        playbook_facts.DistributionFactCollector,
+        "collect",
+        lambda self, module: {
+            "distribution": "Linux Mint",
+            "distribution_release": "virginia",
+            "distribution_version": "21.3",
+            "distribution_major_version": "21",
+            "distribution_file_path": "/etc/os-release",
+            "os_family": "Debian",
+        },
+    )
+    monkeypatch.setattr(playbook_facts, "DISK_BY_LABEL_PATH", str(by_label))
+    monkeypatch.setattr(
+        playbook_facts, "GNOME_SESSION_PATH", str(tmp_path / "gnome-session")
+    )
+    monkeypatch.setattr(playbook_facts, "CD_DEVICE_PATH", str(tmp_path / "sr0"))
+    return tmp_path
+
+
+def run_module(args: Dict) -> Dict:
+    set_module_args(args)
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ):
+        with pytest.raises(AnsibleExitJson) as exc_info:
+            playbook_facts.run_module()
+    return exc_info.value.args[0]
+
+
+def test_get_device_label__unescapes_the_label(system_paths: Path) -> None:
+    (system_paths / "sr0").touch()
+    (system_paths / "by-label" / "VBox_GAs_7.0.12").symlink_to(system_paths / "sr0")
+    (system_paths / "by-label" / "My\\x20Disk").symlink_to(system_paths / "sda1")
+
+    assert (
+        playbook_facts.get_device_label(str(system_paths / "sr0")) == "VBox_GAs_7.0.12"
+    )
+    assert playbook_facts.get_device_label(str(system_paths / "sda1")) == "My Disk"
+    assert playbook_facts.get_device_label(str(system_paths / "sr1")) == ""
+
+
+def test_get_device_label__decodes_utf8_labels(system_paths: Path) -> None:
+    (system_paths / "by-label" / "Café\\x20Disk").symlink_to(system_paths / "sda1")
+    (system_paths / "by-label" / "\\xc3\\xa9t\\xc3\\xa9").symlink_to(
+        system_paths / "sda2"
+    )
+
+    assert playbook_facts.get_device_label(str(system_paths / "sda1")) == "Café Disk"
+    assert playbook_facts.get_device_label(str(system_paths / "sda2")) == "été"
+
+
+def test_run_module__collects_the_facts(system_paths: Path) -> None:
+    result = run_module({"cache_path": str(system_paths / "cache" / "facts.json")})
+
+    facts = result["ansible_facts"]
+    assert result["changed"] is False
+    assert result["cached"] is False
+    assert facts["sys_vendor"] == "innotek GmbH"
+    assert facts["is_virtual_machine"] is True
+    assert facts["os_family"] == "Debian"
+    assert facts["distribution"] == "Linux Mint"
+    assert facts["distribution_release"] == "virginia"
+    assert facts["distribution_major_version"] == "21"
+    assert "distribution_file_path" not in facts
+    assert facts["has_gnome_session"] is False
+    assert facts["sr0_label"] == ""
+    assert facts["env"]["HOME"] == os.environ["HOME"]
+    assert facts["user_id"]
+
+
+def test_run_module__when_cache_is_fresh__does_not_collect_static_facts(
+    system_paths: Path,
+) -> None:
+    cache_path = system_paths / "cache" / "facts.json"
+    run_module({"cache_path": str(cache_path)})
+    (system_paths / "sys_vendor").write_text("LENOVO\n")
+    (system_paths / "gnome-session").touch()
+
+    result = run_module({"cache_path": str(cache_path)})
+
+    assert result["cached"] is True
+    assert result["ansible_facts"]["is_virtual_machine"] is True
+    assert result["ansible_facts"]["has_gnome_session"] is False
+
+
+def test_run_module__when_cache_expired__collects_static_facts(
+    system_paths: Path,
+) -> None:
+    cache_path = system_paths / "cache" / "facts.json"
+    run_module({"cache_path": str(cache_path)})
+    (system_paths / "sys_vendor").write_text("LENOVO\n")
+    cache = json.loads(cache_path.read_text())
+    cache["collected_at"] = time.time() - 7200
+    cache_path.write_text(json.dumps(cache))
+
+    result = run_module({"cache_path": str(cache_path), "cache_ttl": 3600})
+
+    assert result["cached"] is False
+    assert result["ansible_facts"]["is_virtual_machine"] is False
+
+
+def test_run_module__when_cache_was_written_by_an_older_version__ignores_it(
+    system_paths: Path,
+) -> None:
+    cache_path = system_paths / "cache" / "facts.json"
+    run_module({"cache_path": str(cache_path)})
+    cache = json.loads(cache_path.read_text())
+    del cache["version"]
+    cache["facts"]["distribution"] = "Linux"
+    cache_path.write_text(json.dumps(cache))
+
+    result = run_module({"cache_path": str(cache_path)})
+
+    assert result["cached"] is False
+    assert result["ansible_facts"]["distribution"] == "Linux Mint"
+
+
+def test_run_module__when_vendors_change__ignores_the_cache(
+    system_paths: Path,
+) -> None:
+    cache_path = system_paths / "cache" / "facts.json"
+    run_module({"cache_path": str(cache_path)})
+
+    result = run_module(
+        {"cache_path": str(cache_path), "virtual_machine_vendors": ["QEMU"]}
+    )
+
+    assert result["cached"] is False
+    assert result["ansible_facts"]["is_virtual_machine"] is False
+
+
+def test_run_module__when_ttl_is_zero__does_not_write_a_cache(
+    system_paths: Path,
+) -> None:
+    cache_path = system_paths / "cache" / "facts.json"
+
+    result = run_module({"cache_path": str(cache_path), "cache_ttl": 0})
+
+    assert result["cached"] is False
+    assert not cache_path.exists()
+
+
+def test_run_module__never_caches_the_cd_label(system_paths: Path) -> None:
+    cache_path = system_paths / "cache" / "facts.json"
+    run_module({"cache_path": str(cache_path)})
+    (system_paths / "sr0").touch()
+    (system_paths / "by-label" / "VBox_GAs_7.0.12").symlink_to(system_paths / "sr0")
+
+    result = run_module({"cache_path": str(cache_path)})
+
+    assert result["cached"] is True
+    assert result["ansible_facts"]["sr0_label"] == "VBox_GAs_7.0.12"
@@ -0,0 +1,115 @@
+import json
+from pathlib import Path
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import provisioning_journal
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+DPKG_QUERY_OUTPUT = "code installed 1.85.1\ncodium not-installed \n"
+
+
+def run_module(args: Dict, dpkg_query_output: str = DPKG_QUERY_OUTPUT):
+    set_module_args(args)
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(
+        AnsibleModule, "run_command", return_value=(1, dpkg_query_output, "")
+    ) as mock_run_command:
+        with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as exc_info:
+            provisioning_journal.run_module()
+    return exc_info.value.args[0], mock_run_command
+
+
+@pytest.fixture
+def journal_args(tmp_path: Path) -> Dict:
+    (tmp_path / "fonts").mkdir()
+    return dict(
+        path=str(tmp_path / "journal.json"),
+        roles=[
+            dict(name="nerd_fonts", inputs="aa", paths=[str(tmp_path / "fonts")]),
+            dict(name="dev_tools", inputs="bb", packages=["code", "codium"]),
+        ],
+    )
+
+
+def test_run_module__when_journal_is_empty__every_role_is_pending(
+    journal_args: Dict,
+) -> None:
+    result, _ = run_module(dict(operation="check", **journal_args))
+
+    assert result["unchanged"] == []
+    assert result["pending"] == ["nerd_fonts", "dev_tools"]
+
+
+def test_run_module__after_recording__role_is_unchanged(journal_args: Dict) -> None:
+    result, _ = run_module(dict(operation="record", **journal_args))
+    assert result["changed"] is True
+
+    result, mock_run_command = run_module(dict(operation="check", **journal_args))
+
+    assert result["unchanged"] == ["nerd_fonts", "dev_tools"]
+    mock_run_command.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    ("change", "pending"),
+    [
+        ("inputs", ["nerd_fonts"]),
+        ("path", ["nerd_fonts"]),
+        ("package", ["dev_tools"]),
+        ("force", ["nerd_fonts", "dev_tools"]),
+    ],
+)
+def test_run_module__when_inputs_or_probes_change__role_is_pending(
+    journal_args: Dict, tmp_path: Path, change: str, pending: list
+) -> None:
+    run_module(dict(operation="record", **journal_args))
+    dpkg_query_output = DPKG_QUERY_OUTPUT
+    force = False
+    if change == "inputs":
+        journal_args["roles"][0]["inputs"] = "cc"
+    elif change == "path":
+        (tmp_path / "fonts" / "FiraCode.ttf").touch()
+    elif change == "package":
+        dpkg_query_output = "code installed 1.86.0\n"
+    else:
+        force = True
+
+    result, _ = run_module(
+        dict(operation="check", force=force, **journal_args), dpkg_query_output
+    )
+
+    assert result["pending"] == pending
@@ -0,0 +1,314 @@
+#!/usr/bin/python
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from ansible.module_utils.basic import AnsibleModule
+
+try:
+    import yaml
+
+    HAS_YAML = True
+except ImportError:
+    HAS_YAML = False
+
+__metaclass__ = type
+
+APT_GET_EXECUTABLE = "apt-get"
+APT_CACHE_EXECUTABLE = "apt-cache"
+
+FILES_DIRNAME = "files"
+APT_DIRNAME = "apt"
+PACKAGES_FILENAME = "Packages"
+
+# Example: 'http://deb.debian.org/debian/pool/main/h/htop/htop_3.2.2-2_amd64.deb' htop_3.2.2-2_amd64.deb 152840 SHA256:5a3c...
+PRINT_URIS_LINE_REGEX = re.compile(
+    r"^'(?P<uri>[^']+)' (?P<filename>\S+\.deb) (?P<size>\d+) \S+$"
+)
+# extrepo's definitions leave the suite of some repositories to the Debian release
+EXTREPO_SUITE_PLACEHOLDER = "<SUITE>"
+
+
+def build_extrepo_stanza(definition: Dict, release: str, key_path: str) -> str:
+    """
+    Builds the deb822 stanza `extrepo enable` would write for a repository of extrepo's index.yaml,
+    signed by the key the definition carries.
+    Example: {'source': {'Types': 'deb', 'URIs': 'https://brave...', 'Suites': 'stable', ...}, 'gpg-key': '...'}
+    """
+    lines = [
+        f"{field}: {str(value).replace(EXTREPO_SUITE_PLACEHOLDER, release)}"
+        for field, value in definition["source"].items()
+    ]
+    lines.append(f"Signed-By: {key_path}")
+    return "\n".join(lines) + "\n"
+
+
+def write_extrepo_sources(
+    extrepo_index_path: str, repositories: List[str], release: str, root: str
+) -> List[str]:
+    """
+    Writes a .sources file and a key for every requested repository of extrepo's index.yaml.
+    Returns the repositories the index doesn't know.
+    """
+    with open(extrepo_index_path) as f:
+        index = yaml.safe_load(f) or {}
+    unknown = []
+    for repository in repositories:
+        definition = index.get(repository)
+        if not definition or "source" not in definition:
+            unknown.append(repository)
+            continue
+        key_path = os.path.join(root, "keys", f"{repository}.asc")
+        with open(key_path, "w") as f:
+            f.write(definition.get("gpg-key", ""))
+        with open(
+            os.path.join(root, "sources.list.d", f"extrepo_{repository}.sources"), "w"
+        ) as f:
+            f.write(build_extrepo_stanza(definition, release, key_path))
+    return unknown
+
+
+def build_apt_options(root: str, architecture: str) -> List[str]:
+    """
+    Points apt at a root of its own, so that packages get resolved against the given sources
+    and an empty dpkg status, without touching the controller's apt state.
+    """
+    options = {
+        "Dir::Etc::SourceList": os.path.join(root, "sources.list"),
+        "Dir::Etc::SourceParts": os.path.join(root, "sources.list.d"),
+        "Dir::Etc::Preferences": "/dev/null",
+        "Dir::Etc::PreferencesParts": "/dev/null",
+        "Dir::State": os.path.join(root, "state"),
+        "Dir::State::status": os.path.join(root, "status"),
+        "Dir::Cache": os.path.join(root, "cache"),
+        "Debug::NoLocking": "1",
+        "APT::Architecture": architecture,
+        "APT::Architectures": architecture,
+    }
+    return [arg for name, value in options.items() for arg in ("-o", f"{name}={value}")]
+
+
+def prepare_root(root: str, sources: str) -> None:
+    for path in (
+        "sources.list.d",
+        "keys",
+        "state/lists/partial",
+        "cache/archives/partial",
+    ):
+        os.makedirs(os.path.join(root, path), exist_ok=True)
+    with open(os.path.join(root, "sources.list.d", "bundle.sources"), "w") as f:
+        f.write(sources)
+    for path in ("sources.list", "status"):
+        open(os.path.join(root, path), "w").close()
+
+
+def run_apt(
+    module: AnsibleModule, executable: str, args: List[str], description: str
+) -> str:
+    cmd = [executable, *args]
+    rc, out, err = module.run_command(cmd)
+    if rc != 0:
+        module.fail_json(
+            msg=f"Error attempting to {description} [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+    return out
+
+
+def parse_print_uris_output(out: str) -> List[Dict]:
+    return [
+        dict(uri=match["uri"], filename=match["filename"], size=int(match["size"]))
+        for match in map(PRINT_URIS_LINE_REGEX.match, out.splitlines())
+        if match
+    ]
+
+
+def parse_deb_filename(filename: str) -> Tuple[str, str, str]:
+    """
+    Example: 'libfoo1_1%3a2.0-1_amd64.deb' -> ('libfoo1', '1:2.0-1', 'amd64')
+    """
+    name, version, arch = filename[: -len(".deb")].split("_")
+    return name, version.replace("%3a", ":"), arch
+
+
+def parse_stanzas(out: str) -> List[List[str]]:
+    """
+    Splits `apt-cache show` output into its stanzas, each a list of lines.
+    """
+    stanzas, lines = [], []
+    for line in out.splitlines() + [""]:
+        if line.strip():
+            lines.append(line)
+        elif lines:
+            stanzas.append(lines)
+            lines = []
+    return stanzas
+
+
+def get_field(stanza: List[str], name: str) -> Optional[str]:
+    for line in stanza:
+        field, _, value = line.partition(":")
+        if not line.startswith((" ", "\t")) and field.lower() == name.lower():
+            return value.strip()
+    return None
+
+
+def find_stanza(stanzas: List[List[str]], uri: str) -> Optional[List[str]]:
+    """
+    Picks the stanza a download came from. The same version may be offered by several sources,
+    but its (unquoted) uri ends with the Filename of the stanza it got resolved from.
+    """
+    uri = unquote(uri)
+    for stanza in stanzas:
+        filename = get_field(stanza, "Filename")
+        if filename and uri.endswith(f"/{filename}"):
+            return stanza
+    return None
+
+
+def bundle_stanza(stanza: List[str], digest: str) -> str:
+    """
+    Points a stanza's Filename at the bundle's copy of the package, which is stored under its digest.
+    """
+    lines = [
+        f"Filename: {FILES_DIRNAME}/{digest}"
+        if line.lower().startswith("filename:")
+        else line
+        for line in stanza
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def resolve(
+    module: AnsibleModule, options: List[str], packages: List[str]
+) -> List[Dict]:
+    """
+    Lists every package, with its dependencies, that installing `packages` on an empty system downloads.
+
+    Steps:
+    - Run `apt-get update` against the bundle's sources
+    - List the downloads with `apt-get install --print-uris`
+    - Look up the stanza of every download with a single `apt-cache show name=version...`
+    """
+    run_apt(
+        module,
+        APT_GET_EXECUTABLE,
+        [*options, "-q", "update"],
+        "update the package lists",
+    )
+    downloads = parse_print_uris_output(
+        run_apt(
+            module,
+            APT_GET_EXECUTABLE,
+            [*options, "-qq", "install", "--print-uris", *packages],
+            "resolve the packages",
+        )
+    )
+    if not downloads:
+        return []
+    specs = []
+    for download in downloads:
+        name, version, _ = parse_deb_filename(download["filename"])
+        specs.append(f"{name}={version}")
+    stanzas = parse_stanzas(
+        run_apt(
+            module,
+            APT_CACHE_EXECUTABLE,
+            [*options, "show", *specs],
+            "describe the packages",
+        )
+    )
+    resolved = []
+    for download in downloads:
+        stanza = find_stanza(stanzas, download["uri"])
+        digest = get_field(stanza, "SHA256") if stanza else None
+        if not digest:
+            module.fail_json(
+                msg=f"Error attempting to describe {download['filename']}: no SHA256 for {download['uri']}"
+            )
+        resolved.append(dict(uri=download["uri"], digest=digest.lower(), stanza=stanza))
+    return resolved
+
+
+def write_packages_index(path: str, resolved: List[Dict]) -> bool:
+    """
+    Writes the flat repository's Packages file, unless it is up to date.
+    Returns whether it changed.
+    """
+    content = "\n".join(
+        bundle_stanza(package["stanza"], package["digest"]) for package in resolved
+    )
+    packages_path = os.path.join(path, APT_DIRNAME, PACKAGES_FILENAME)
+    try:
+        with open(packages_path) as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(packages_path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(packages_path), prefix=".")
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, packages_path)
+    return True
+
+
+def run_module():
+    module_args = dict(
+        path=dict(type="path", required=True),
+        packages=dict(type="list", elements="str", required=True),
+        sources=dict(type="str", required=True),
+        architecture=dict(type="str", default="amd64"),
+        release=dict(type="str"),
+        extrepo_index=dict(type="path"),
+        extrepo_repositories=dict(type="list", elements="str", default=[]),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    root = tempfile.mkdtemp(dir=module.tmpdir)
+    prepare_root(root, module.params["sources"])
+    if module.params["extrepo_repositories"]:
+        if not module.params["extrepo_index"] or not module.params["release"]:
+            module.fail_json(
+                msg="extrepo_index and release are required by extrepo_repositories"
+            )
+        if not HAS_YAML:
+            module.fail_json(msg="PyYAML is required to read extrepo's index.yaml")
+        unknown = write_extrepo_sources(
+            module.params["extrepo_index"],
+            module.params["extrepo_repositories"],
+            module.params["release"],
+            root,
+        )
+        if unknown:
+            module.fail_json(
+                msg=f"Repositories {', '.join(unknown)} are not present in extrepo's metadata"
+            )
+
+    resolved = resolve(
+        module,
+        build_apt_options(root, module.params["architecture"]),
+        module.params["packages"],
+    )
+    changed = False
+    if not module.check_mode:
+        changed = write_packages_index(module.params["path"], resolved)
+
+    module.exit_json(
+        changed=changed,
+        artifacts=[
+            dict(url=package["uri"], checksum=f"sha256:{package['digest']}")
+            for package in resolved
+        ],
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/python
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.urls import open_url
+
+__metaclass__ = type
+
+FILES_DIRNAME = "files"
+MANIFEST_FILENAME = "manifest.json"
+SHA256SUMS_FILENAME = "SHA256SUMS"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+def parse_checksum(checksum: str):
+    """
+    Example: 'sha256:76c1...' -> ('sha256', '76c1...')
+    """
+    algorithm, _, digest = checksum.partition(":")
+    return algorithm, digest.lower()
+
+
+def compute_file_digest(path: str, algorithm: str) -> Optional[str]:
+    digest = hashlib.new(algorithm)
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def is_bundled(files_path: str, artifact: Dict) -> bool:
+    algorithm, expected_digest = parse_checksum(artifact["checksum"])
+    path = os.path.join(files_path, expected_digest)
+    return compute_file_digest(path, algorithm) == expected_digest
+
+
+def fetch_artifact(files_path: str, artifact: Dict) -> None:
+    """
+    Streams an artifact into a temporary file while hashing it,
+    which only replaces the bundled file once the checksum matched.
+    """
+    algorithm, expected_digest = parse_checksum(artifact["checksum"])
+    fd, temp_path = tempfile.mkstemp(dir=files_path, prefix=f".{expected_digest}.")
+    try:
+        digest = hashlib.new(algorithm)
+        with os.fdopen(fd, "wb") as f, open_url(
+            artifact["url"], timeout=60
+        ) as response:
+            for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                f.write(chunk)
+        if digest.hexdigest() != expected_digest:
+            raise ChecksumMismatch(
+                f"Checksum mismatch for {artifact['url']}: expected {expected_digest}, got {digest.hexdigest()}"
+            )
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, os.path.join(files_path, expected_digest))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def fetch_artifacts(
+    files_path: str, artifacts: List[Dict], max_workers: int
+) -> Dict[str, Optional[str]]:
+    """
+    Downloads the artifacts concurrently. Returns the error of each artifact's url, if any.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            artifact["url"]: executor.submit(fetch_artifact, files_path, artifact)
+            for artifact in artifacts
+        }
+    errors = {}
+    for url, future in futures.items():
+        exception = future.exception()
+        errors[url] = None if exception is None else str(exception)
+    return errors
+
+
+def write_manifest(path: str, artifacts: List[Dict]) -> None:
+    """
+    Describes the bundle's content. SHA256SUMS allows verifying a copied bundle
+    with `sha256sum -c SHA256SUMS` from within its `files` directory.
+    """
+    entries = [
+        dict(
+            url=artifact["url"],
+            checksum=artifact["checksum"],
+            filename=os.path.join(
+                FILES_DIRNAME, parse_checksum(artifact["checksum"])[1]
+            ),
+        )
+        for artifact in artifacts
+    ]
+    with open(os.path.join(path, MANIFEST_FILENAME), "w") as f:
+        json.dump(dict(artifacts=entries), f, indent=2)
+    with open(os.path.join(path, FILES_DIRNAME, SHA256SUMS_FILENAME), "w") as f:
+        for artifact in artifacts:
+            algorithm, digest = parse_checksum(artifact["checksum"])
+            if algorithm == "sha256":
+                f.write(f"{digest}  {digest}\n")
+
+
+def run_module():
+    module_args = dict(
+        artifacts=dict(
+            type="list",
+            elements="dict",
+            required=True,
+            options=dict(
+                url=dict(type="str", required=True),
+                checksum=dict(type="str", required=True),
+            ),
+        ),
+        path=dict(type="path", required=True),
+        max_workers=dict(type="int", default=4),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    path = module.params["path"]
+    files_path = os.path.join(path, FILES_DIRNAME)
+    artifacts = module.params["artifacts"]
+    for artifact in artifacts:
+        if parse_checksum(artifact["checksum"])[0] not in hashlib.algorithms_available:
+            module.fail_json(
+                msg=f"Unsupported checksum {artifact['checksum']} for {artifact['url']}"
+            )
+    missing = [
+        artifact for artifact in artifacts if not is_bundled(files_path, artifact)
+    ]
+
+    if not module.check_mode:
+        os.makedirs(files_path, exist_ok=True)
+        if missing:
+            errors = fetch_artifacts(files_path, missing, module.params["max_workers"])
+            failed = {url: error for url, error in errors.items() if error is not None}
+            if failed:
+                module.fail_json(
+                    msg=f"Error attempting to download artifacts: {', '.join(f'{url} ({error})' for url, error in failed.items())}",
+                )
+        write_manifest(path, artifacts)
+
+    module.exit_json(
+        changed=bool(missing),
+        fetched=[artifact["url"] for artifact in missing],
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/python
+import os
+from typing import Dict, List
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.urls import open_url
+
+__metaclass__ = type
+
+FLATPAK_EXECUTABLE = "flatpak"
+FLATPAK_DIRNAME = "flatpak"
+# Where `flatpak create-usb` writes its repository, which targets pass to `--sideload-repo`
+SIDELOAD_REPO_PATH = os.path.join(".ostree", "repo")
+
+
+def add_collection_id(flatpakrepo: str, collection_id: str) -> str:
+    """
+    Sets the DeployCollectionID of a .flatpakrepo file: sideloaded refs are only
+    accepted for a remote that has the collection ID they were bundled with.
+    """
+    lines = [
+        line
+        for line in flatpakrepo.splitlines()
+        if not line.startswith("DeployCollectionID=")
+    ]
+    return "\n".join(lines + [f"DeployCollectionID={collection_id}"]) + "\n"
+
+
+def list_bundled_refs(repo_path: str) -> Dict[str, str]:
+    """
+    Maps every ref of the bundle's repository to the commit it points to.
+    """
+    refs = {}
+    refs_path = os.path.join(repo_path, "refs")
+    for dirpath, _, filenames in os.walk(refs_path):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            with open(path) as f:
+                refs[os.path.relpath(path, refs_path)] = f.read().strip()
+    return refs
+
+
+def run_flatpak(
+    module: AnsibleModule, args: List[str], installation_path: str, description: str
+) -> str:
+    cmd = [FLATPAK_EXECUTABLE, *args]
+    rc, out, err = module.run_command(
+        cmd, environ_update=dict(FLATPAK_USER_DIR=installation_path)
+    )
+    if rc != 0:
+        module.fail_json(
+            msg=f"Error attempting to {description} [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+    return out
+
+
+def write_flatpakrepo(path: str, content: str) -> bool:
+    try:
+        with open(path) as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    with open(path, "w") as f:
+        f.write(content)
+    return True
+
+
+def run_module():
+    module_args = dict(
+        path=dict(type="path", required=True),
+        refs=dict(type="list", elements="str", required=True),
+        remote=dict(type="str", default="flathub"),
+        flatpakrepo_url=dict(
+            type="str", default="https://dl.flathub.org/repo/flathub.flatpakrepo"
+        ),
+        collection_id=dict(type="str", default="org.flathub.Stable"),
+        installation_path=dict(type="path", required=True),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    refs = module.params["refs"]
+    remote = module.params["remote"]
+    installation_path = module.params["installation_path"]
+    flatpak_path = os.path.join(module.params["path"], FLATPAK_DIRNAME)
+    repo_path = os.path.join(flatpak_path, SIDELOAD_REPO_PATH)
+    if not refs or module.check_mode:
+        module.exit_json(changed=False, refs=list_bundled_refs(repo_path))
+
+    with open_url(module.params["flatpakrepo_url"], timeout=60) as response:
+        flatpakrepo = add_collection_id(
+            response.read().decode(), module.params["collection_id"]
+        )
+    os.makedirs(installation_path, exist_ok=True)
+    os.makedirs(flatpak_path, exist_ok=True)
+    bundled_refs = list_bundled_refs(repo_path)
+
+    # The refs are installed into an installation of the bundle's own, which `create-usb` copies them from
+    run_flatpak(
+        module,
+        [
+            "remote-add",
+            "--user",
+            "--if-not-exists",
+            remote,
+            module.params["flatpakrepo_url"],
+        ],
+        installation_path,
+        f"add the {remote} remote",
+    )
+    run_flatpak(
+        module,
+        [
+            "remote-modify",
+            "--user",
+            f"--collection-id={module.params['collection_id']}",
+            remote,
+        ],
+        installation_path,
+        f"set the collection ID of the {remote} remote",
+    )
+    run_flatpak(
+        module,
+        ["install", "--user", "--noninteractive", "--or-update", remote, *refs],
+        installation_path,
+        "install the apps",
+    )
+    run_flatpak(
+        module,
+        ["create-usb", "--user", flatpak_path, *refs],
+        installation_path,
+        "copy the apps into the bundle",
+    )
+    flatpakrepo_changed = write_flatpakrepo(
+        os.path.join(flatpak_path, f"{remote}.flatpakrepo"), flatpakrepo
+    )
+
+    refs_after = list_bundled_refs(repo_path)
+    module.exit_json(
+        changed=flatpakrepo_changed or refs_after != bundled_refs,
+        refs=refs_after,
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import json
+from pathlib import Path
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import bundle_apt
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+HTOP_SHA256 = "5a3c" * 16
+LIBNL_SHA256 = "9b1e" * 16
+
+PRINT_URIS_OUTPUT = f"""\
+'http://deb.debian.org/debian/pool/main/libn/libnl3/libnl-3-200_3.7.0-0.2%2bb1_amd64.deb' libnl-3-200_3.7.0-0.2+b1_amd64.deb 63908 SHA256:{LIBNL_SHA256}
+'http://deb.debian.org/debian/pool/main/h/htop/htop_3.2.2-2_amd64.deb' htop_3.2.2-2_amd64.deb 152840 SHA256:{HTOP_SHA256}
+"""
+
+SHOW_OUTPUT = f"""\
+Package: libnl-3-200
+Version: 3.7.0-0.2+b1
+Architecture: amd64
+Filename: pool/main/libn/libnl3/libnl-3-200_3.7.0-0.2+b1_amd64.deb
+Size: 63908
+SHA256: {LIBNL_SHA256}
+Description: library for dealing with netlink sockets
+ This is a library for applications dealing with netlink sockets.
+
+Package: htop
+Version: 3.2.2-2
+Architecture: amd64
+Depends: libc6 (>= 2.34), libnl-3-200 (>= 3.2.7)
+Filename: pool/main/h/htop/htop_3.2.2-2_amd64.deb
+Size: 152840
+SHA256: {HTOP_SHA256}
+Description: interactive processes viewer
+
+"""
+
+
+def run_module(args: Dict, print_uris_output: str = PRINT_URIS_OUTPUT):
+    def run_command(cmd, **kwargs):
+        if "--print-uris" in cmd:
+            return 0, print_uris_output, ""
+        if cmd[0] == bundle_apt.APT_CACHE_EXECUTABLE:
+            return 0, SHOW_OUTPUT, ""
+        return 0, "", ""
+
+    set_module_args(args)
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(
+        AnsibleModule, "run_command", side_effect=run_command
+    ) as mock_run_command:
+        with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as exc_info:
+            bundle_apt.run_module()
+    return exc_info.value.args[0], [c.args[0] for c in mock_run_command.call_args_list]
+
+
+@pytest.mark.parametrize(
+    ("filename", "expected"),
+    [
+        ("htop_3.2.2-2_amd64.deb", ("htop", "3.2.2-2", "amd64")),
+        ("libfoo1_1%3a2.0-1_amd64.deb", ("libfoo1", "1:2.0-1", "amd64")),
+    ],
+)
+def test_parse_deb_filename(filename: str, expected) -> None:
+    assert bundle_apt.parse_deb_filename(filename) == expected
+
+
+def test_build_extrepo_stanza__fills_in_the_release_and_the_key() -> None:
+    definition = {
+        "source": {
+            "Types": "deb",
+            "URIs": "https://download.docker.com/linux/debian",
+            "Suites": "<SUITE>",
+            "Components": "stable",
+        },
+        "gpg-key": "-----BEGIN PGP PUBLIC KEY BLOCK-----",
+    }
+
+    assert bundle_apt.build_extrepo_stanza(
+        definition, "bookworm", "/tmp/keys/docker-ce.asc"
+    ) == (
+        "Types: deb\n"
+        "URIs: https://download.docker.com/linux/debian\n"
+        "Suites: bookworm\n"
+        "Components: stable\n"
+        "Signed-By: /tmp/keys/docker-ce.asc\n"
+    )
+
+
+def test_find_stanza__picks_the_stanza_of_the_downloaded_uri() -> None:
+    stanzas = [
+        ["Package: htop", "Filename: pool/main/h/htop/htop_3.2.2-2_amd64.deb"],
+        ["Package: htop", "Filename: ./htop_3.2.2-2_amd64.deb"],
+    ]
+
+    assert (
+        bundle_apt.find_stanza(stanzas, "file:/srv/repo/./htop_3.2.2-2_amd64.deb")
+        == stanzas[1]
+    )
+    assert bundle_apt.find_stanza(stanzas, "http://example.com/other.deb") is None
+
+
+def test_bundle_stanza__points_the_filename_at_the_bundled_file() -> None:
+    stanza = ["Package: htop", "Filename: pool/main/h/htop/htop_3.2.2-2_amd64.deb"]
+
+    assert (
+        bundle_apt.bundle_stanza(stanza, HTOP_SHA256)
+        == f"Package: htop\nFilename: files/{HTOP_SHA256}\n"
+    )
+
+
+def test_run_module__writes_a_flat_repository_and_returns_the_artifacts(
+    tmp_path: Path,
+) -> None:
+    result, commands = run_module(
+        dict(path=str(tmp_path), packages=["htop"], sources="Types: deb\n")
+    )
+
+    assert result["changed"] is True
+    assert result["artifacts"] == [
+        dict(
+            url="http://deb.debian.org/debian/pool/main/libn/libnl3/libnl-3-200_3.7.0-0.2%2bb1_amd64.deb",
+            checksum=f"sha256:{LIBNL_SHA256}",
+        ),
+        dict(
+            url="http://deb.debian.org/debian/pool/main/h/htop/htop_3.2.2-2_amd64.deb",
+            checksum=f"sha256:{HTOP_SHA256}",
+        ),
+    ]
+    assert commands[-1][-2:] == ["libnl-3-200=3.7.0-0.2+b1", "htop=3.2.2-2"]
+    packages = (tmp_path / "apt" / "Packages").read_text()
+    assert f"Filename: files/{LIBNL_SHA256}\n" in packages
+    assert f"Filename: files/{HTOP_SHA256}\n" in packages
+    assert (
+        " This is a library for applications dealing with netlink sockets.\n"
+        in packages
+    )
+
+
+def test_run_module__when_the_index_is_up_to_date__reports_no_change(
+    tmp_path: Path,
+) -> None:
+    args = dict(path=str(tmp_path), packages=["htop"], sources="Types: deb\n")
+    run_module(args)
+
+    result, _ = run_module(args)
+
+    assert result["changed"] is False
+
+
+def test_run_module__resolves_against_an_empty_dpkg_status(tmp_path: Path) -> None:
+    _, commands = run_module(
+        dict(path=str(tmp_path), packages=["htop"], sources="Types: deb\n")
+    )
+
+    status_options = [
+        option for option in commands[0] if option.startswith("Dir::State::status=")
+    ]
+    assert len(status_options) == 1
+    assert status_options[0] != "Dir::State::status=/var/lib/dpkg/status"
+
+
+def test_run_module__when_an_extrepo_repository_is_unknown__fails(
+    tmp_path: Path,
+) -> None:
+    index_path = tmp_path / "index.yaml"
+    index_path.write_text("brave_release:\n  source:\n    Types: deb\n")
+
+    result, commands = run_module(
+        dict(
+            path=str(tmp_path),
+            packages=["code"],
+            sources="Types: deb\n",
+            release="bookworm",
+            extrepo_index=str(index_path),
+            extrepo_repositories=["brave_release", "vscode"],
+        )
+    )
+
+    assert result["failed"] is True
+    assert result["msg"] == "Repositories vscode are not present in extrepo's metadata"
+    assert commands == []
@@ -0,0 +1,139 @@
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import bundle_fetch
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+def compute_checksum(content: bytes) -> str:
+    return f"sha256:{hashlib.sha256(content).hexdigest()}"
+
+
+def serve(contents: Dict[str, bytes]):
+    def mock_open_url(url, **kwargs):
+        return io.BytesIO(contents[url])
+
+    return patch.object(bundle_fetch, "open_url", side_effect=mock_open_url)
+
+
+def test_fetch_artifact(tmp_path: Path) -> None:
+    artifact = {
+        "url": "https://example.com/install.sh",
+        "checksum": compute_checksum(b"#!/bin/sh\n"),
+    }
+
+    with serve({artifact["url"]: b"#!/bin/sh\n"}):
+        bundle_fetch.fetch_artifact(str(tmp_path), artifact)
+
+    digest = artifact["checksum"].partition(":")[2]
+    assert [path.name for path in tmp_path.iterdir()] == [digest]
+    assert bundle_fetch.is_bundled(str(tmp_path), artifact)
+
+
+def test_fetch_artifact__when_checksum_does_not_match__keeps_nothing(
+    tmp_path: Path,
+) -> None:
+    artifact = {
+        "url": "https://example.com/install.sh",
+        "checksum": compute_checksum(b"expected"),
+    }
+
+    with serve({artifact["url"]: b"tampered"}):
+        with pytest.raises(bundle_fetch.ChecksumMismatch):
+            bundle_fetch.fetch_artifact(str(tmp_path), artifact)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fetch_artifact__when_the_request_fails__closes_and_removes_the_temporary_file(
+    tmp_path: Path,
+) -> None:
+    artifact = {
+        "url": "https://example.com/install.sh",
+        "checksum": compute_checksum(b"#!/bin/sh\n"),
+    }
+    open_fds = set(os.listdir("/proc/self/fd"))
+
+    with patch.object(
+        bundle_fetch, "open_url", side_effect=OSError("Connection refused")
+    ), pytest.raises(OSError):
+        bundle_fetch.fetch_artifact(str(tmp_path), artifact)
+
+    assert list(tmp_path.iterdir()) == []
+    assert set(os.listdir("/proc/self/fd")) <= open_fds
+
+
+def test_run_module__downloads_only_missing_artifacts(tmp_path: Path) -> None:
+    bundled = {"url": "https://example.com/a", "checksum": compute_checksum(b"a")}
+    missing = {"url": "https://example.com/b", "checksum": compute_checksum(b"b")}
+    (tmp_path / "files").mkdir()
+    (tmp_path / "files" / bundled["checksum"].partition(":")[2]).write_bytes(b"a")
+    set_module_args({"artifacts": [bundled, missing], "path": str(tmp_path)})
+
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), serve({missing["url"]: b"b"}) as mock_open_url:
+        with pytest.raises(AnsibleExitJson) as exc_info:
+            bundle_fetch.run_module()
+
+    assert exc_info.value.args[0]["changed"] is True
+    assert exc_info.value.args[0]["fetched"] == [missing["url"]]
+    assert mock_open_url.call_count == 1
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert [artifact["url"] for artifact in manifest["artifacts"]] == [
+        bundled["url"],
+        missing["url"],
+    ]
+    assert (tmp_path / "files" / "SHA256SUMS").read_text().count("\n") == 2
+
+
+def test_run_module__when_a_download_fails__returns_an_error(tmp_path: Path) -> None:
+    artifact = {"url": "https://example.com/a", "checksum": compute_checksum(b"a")}
+    set_module_args({"artifacts": [artifact], "path": str(tmp_path)})
+
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), serve({artifact["url"]: b"not a"}):
+        with pytest.raises(AnsibleFailJson) as exc_info:
+            bundle_fetch.run_module()
+
+    assert exc_info.value.args[0]["msg"].startswith(
+        "Error attempting to download artifacts: https://example.com/a (Checksum mismatch"
+    )
+    assert not (tmp_path / "manifest.json").exists()
@@ -0,0 +1,141 @@
+import io
+import json
+from pathlib import Path
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import bundle_flatpak
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+FLATHUB_FLATPAKREPO = """\
+[Flatpak Repo]
+Title=Flathub
+Url=https://dl.flathub.org/repo/
+Homepage=https://flathub.org/
+"""
+
+
+def run_module(args: Dict, check_mode: bool = False):
+    set_module_args(dict(args, _ansible_check_mode=check_mode))
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(
+        AnsibleModule, "run_command", return_value=(0, "", "")
+    ) as mock_run_command, patch.object(
+        bundle_flatpak,
+        "open_url",
+        side_effect=lambda url, **kwargs: io.BytesIO(FLATHUB_FLATPAKREPO.encode()),
+    ):
+        with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as exc_info:
+            bundle_flatpak.run_module()
+    return exc_info.value.args[0], mock_run_command
+
+
+def test_add_collection_id__replaces_an_existing_one() -> None:
+    assert bundle_flatpak.add_collection_id(
+        "[Flatpak Repo]\nDeployCollectionID=org.example\n", "org.flathub.Stable"
+    ) == ("[Flatpak Repo]\nDeployCollectionID=org.flathub.Stable\n")
+
+
+def test_list_bundled_refs(tmp_path: Path) -> None:
+    ref_path = tmp_path / "refs" / "mirrors" / "org.flathub.Stable" / "app"
+    ref_path.mkdir(parents=True)
+    (ref_path / "com.slack.Slack").write_text("4f2a\n")
+
+    assert bundle_flatpak.list_bundled_refs(str(tmp_path)) == {
+        "mirrors/org.flathub.Stable/app/com.slack.Slack": "4f2a"
+    }
+
+
+def test_run_module__copies_the_installed_refs_into_the_bundle(tmp_path: Path) -> None:
+    installation_path = str(tmp_path / "installation")
+
+    result, mock_run_command = run_module(
+        dict(
+            path=str(tmp_path / "bundle"),
+            refs=["com.slack.Slack", "org.remmina.Remmina"],
+            installation_path=installation_path,
+        )
+    )
+
+    assert result["changed"] is True
+    assert [c.args[0][1] for c in mock_run_command.call_args_list] == [
+        "remote-add",
+        "remote-modify",
+        "install",
+        "create-usb",
+    ]
+    assert mock_run_command.call_args_list[-1].args[0] == [
+        "flatpak",
+        "create-usb",
+        "--user",
+        str(tmp_path / "bundle" / "flatpak"),
+        "com.slack.Slack",
+        "org.remmina.Remmina",
+    ]
+    assert all(
+        c.kwargs["environ_update"] == {"FLATPAK_USER_DIR": installation_path}
+        for c in mock_run_command.call_args_list
+    )
+    assert (tmp_path / "bundle" / "flatpak" / "flathub.flatpakrepo").read_text() == (
+        FLATHUB_FLATPAKREPO + "DeployCollectionID=org.flathub.Stable\n"
+    )
+
+
+def test_run_module__when_nothing_changed__reports_no_change(tmp_path: Path) -> None:
+    args = dict(
+        path=str(tmp_path / "bundle"),
+        refs=["com.slack.Slack"],
+        installation_path=str(tmp_path / "installation"),
+    )
+    run_module(args)
+
+    result, _ = run_module(args)
+
+    assert result["changed"] is False
+
+
+def test_run_module__in_check_mode__runs_nothing(tmp_path: Path) -> None:
+    result, mock_run_command = run_module(
+        dict(
+            path=str(tmp_path / "bundle"),
+            refs=["com.slack.Slack"],
+            installation_path=str(tmp_path / "installation"),
+        ),
+        check_mode=True,
+    )
+
+    assert result["changed"] is False
+    assert mock_run_command.call_count == 0
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import tempfile
+from typing import Dict, List
+
+from ansible.errors import AnsibleActionFail
+from ansible.plugins.action import ActionBase
+
+__metaclass__ = type
+
+
+def compute_store_path(store_path: str, deb: Dict) -> str:
+    """
+    The store is content-addressed and keyed by package, version and architecture:
+    <store>/<name>/<version>/<arch>/<sha256>.deb
+    """
+    return os.path.join(
+        store_path, deb["name"], deb["version"], deb["arch"], f"{deb['sha256']}.deb"
+    )
+
+
+def list_stored_debs(store_path: str) -> List[Dict]:
+    """
+    Lists the store's archives by their filename in apt's archives directory, and their size.
+    """
+    stored = []
+    for root, _, filenames in os.walk(store_path):
+        relative_path = os.path.relpath(root, store_path).split(os.sep)
+        if len(relative_path) != 3:
+            continue
+        name, version, arch = relative_path
+        for filename in filenames:
+            if filename.endswith(".deb"):
+                stored.append(
+                    dict(
+                        filename=f"{name}_{version}_{arch}.deb",
+                        size=os.path.getsize(os.path.join(root, filename)),
+                    )
+                )
+    return stored
+
+
+def compute_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ActionModule(ActionBase):
+    """
+    Keeps a store of .deb archives on the controller.
+
+    - mode=seed pushes the archives the target would download for `packages`
+      from the store into the target's apt archives directory
+    - mode=harvest copies archives the target downloaded back into the store
+    """
+
+    TRANSFERS_FILES = True
+
+    def run(self, tmp=None, task_vars=None):
+        result = super().run(tmp, task_vars)
+        del tmp
+
+        mode = self._task.args.get("mode")
+        store_path = self._task.args.get("store_path")
+        if mode not in ["seed", "harvest"]:
+            raise AnsibleActionFail("mode must be one of: seed, harvest")
+        if not store_path:
+            raise AnsibleActionFail("store_path is required")
+        store_path = os.path.expanduser(store_path)
+
+        try:
+            if mode == "seed":
+                result.update(
+                    self._seed(
+                        store_path, self._task.args.get("packages", []), task_vars
+                    )
+                )
+            else:
+                result.update(self._harvest(store_path, task_vars))
+        finally:
+            self._remove_tmp_path(self._connection._shell.tmpdir)
+        return result
+
+    def _run_deb_cache(self, module_args: Dict, task_vars) -> Dict:
+        module_result = self._execute_module(
+            module_name="deb_cache", module_args=module_args, task_vars=task_vars
+        )
+        if module_result.get("failed"):
+            raise AnsibleActionFail(module_result.get("msg"), result=module_result)
+        return module_result
+
+    def _seed(self, store_path: str, packages, task_vars) -> Dict:
+        if not packages:
+            return dict(changed=False, seeded=[], seeded_bytes=0)
+        planned = self._run_deb_cache(
+            dict(operation="plan", packages=packages), task_vars
+        )["debs"]
+        hits = [
+            deb
+            for deb in planned
+            if os.path.isfile(compute_store_path(store_path, deb))
+        ]
+        if not hits or self._play_context.check_mode:
+            return dict(
+                changed=bool(hits),
+                seeded=[deb["filename"] for deb in hits],
+                seeded_bytes=sum(deb["size"] for deb in hits),
+                missed=[deb["filename"] for deb in planned if deb not in hits],
+            )
+
+        staging_path = self._make_tmp_path()
+        remote_paths = []
+        for deb in hits:
+            remote_path = self._connection._shell.join_path(
+                staging_path, deb["filename"]
+            )
+            self._transfer_file(compute_store_path(store_path, deb), remote_path)
+            remote_paths.append(remote_path)
+        self._fixup_perms2([staging_path] + remote_paths, execute=False)
+
+        placed = self._run_deb_cache(
+            dict(
+                operation="place",
+                staging_path=staging_path,
+                files=[dict(filename=d["filename"], sha256=d["sha256"]) for d in hits],
+            ),
+            task_vars,
+        )["placed"]
+        return dict(
+            changed=bool(placed),
+            seeded=placed,
+            seeded_bytes=sum(deb["size"] for deb in hits if deb["filename"] in placed),
+            missed=[deb["filename"] for deb in planned if deb not in hits],
+        )
+
+    def _harvest(self, store_path: str, task_vars) -> Dict:
+        archived = self._run_deb_cache(
+            dict(operation="inventory", stored=list_stored_debs(store_path)),
+            task_vars,
+        )["debs"]
+        missing = [
+            deb
+            for deb in archived
+            if not os.path.isfile(compute_store_path(store_path, deb))
+        ]
+        if self._play_context.check_mode:
+            return dict(
+                changed=bool(missing), harvested=[d["filename"] for d in missing]
+            )
+
+        harvested = []
+        for deb in missing:
+            destination = compute_store_path(store_path, deb)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(destination))
+            os.close(fd)
+            try:
+                self._connection.fetch_file(deb["path"], temp_path)
+                if compute_sha256(temp_path) != deb["sha256"]:
+                    continue
+                os.replace(temp_path, destination)
+                harvested.append(deb["filename"])
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        return dict(
+            changed=bool(harvested),
+            harvested=harvested,
+            harvested_bytes=sum(
+                deb["size"] for deb in missing if deb["filename"] in harvested
+            ),
+        )
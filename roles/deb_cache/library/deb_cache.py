@@ -0,0 +1,218 @@
+#!/usr/bin/python
+import os
+import re
+from typing import Dict, List, Optional
+
+from ansible.module_utils.basic import AnsibleModule
+
+__metaclass__ = type
+
+APT_ARCHIVES_PATH = "/var/cache/apt/archives/"
+APT_GET_EXECUTABLE = "apt-get"
+APT_CACHE_EXECUTABLE = "apt-cache"
+
+# Example: 'http://deb.debian.org/debian/pool/main/h/htop/htop_3.2.2-2_amd64.deb' htop_3.2.2-2_amd64.deb 152840 SHA256:5a3c...
+PRINT_URIS_LINE_REGEX = re.compile(
+    r"^'(?P<uri>[^']+)' (?P<filename>\S+\.deb) (?P<size>\d+) SHA256:(?P<sha256>[0-9a-f]{64})$"
+)
+
+
+def parse_deb_filename(filename: str) -> Optional[Dict[str, str]]:
+    """
+    Splits an archive's filename into its package name, (escaped) version and architecture.
+    Example: 'htop_3.2.2-2_amd64.deb' -> {'name': 'htop', 'version': '3.2.2-2', 'arch': 'amd64'}
+    """
+    if not filename.endswith(".deb"):
+        return None
+    parts = filename[: -len(".deb")].split("_")
+    if len(parts) != 3 or not all(parts):
+        return None
+    return dict(zip(("name", "version", "arch"), parts))
+
+
+def parse_print_uris_output(out: str) -> List[Dict]:
+    debs = []
+    for line in out.splitlines():
+        match = PRINT_URIS_LINE_REGEX.match(line.strip())
+        if not match:
+            continue
+        deb = parse_deb_filename(match["filename"])
+        if deb is None:
+            continue
+        deb.update(
+            filename=match["filename"],
+            size=int(match["size"]),
+            sha256=match["sha256"],
+        )
+        debs.append(deb)
+    return debs
+
+
+def parse_policy_output(out: str) -> List[str]:
+    """
+    Lists the packages from `apt-cache policy` output that have an installation candidate.
+    """
+    packages = []
+    package = None
+    for line in out.splitlines():
+        if line and not line[0].isspace() and line.endswith(":"):
+            package = line[:-1]
+        elif package and line.strip().startswith("Candidate:"):
+            if line.split(":", 1)[1].strip() != "(none)":
+                packages.append(package)
+            package = None
+    return packages
+
+
+def get_available_packages(module: AnsibleModule, packages: List[str]) -> List[str]:
+    """
+    Filters out packages that apt doesn't know about (yet),
+    e.g. because the repository providing them is not enabled.
+    """
+    cmd = [APT_CACHE_EXECUTABLE, "policy", *packages]
+    rc, out, err = module.run_command(cmd)
+    if rc != 0:
+        module.fail_json(
+            msg=f"Error attempting to look up packages [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+    return parse_policy_output(out)
+
+
+def is_archived(archives_path: str, module: AnsibleModule, deb: Dict) -> bool:
+    path = os.path.join(archives_path, deb["filename"])
+    try:
+        if os.path.getsize(path) != deb["size"]:
+            return False
+    except OSError:
+        return False
+    return module.sha256(path) == deb["sha256"]
+
+
+def plan(module: AnsibleModule, packages: List[str], archives_path: str) -> List[Dict]:
+    """
+    Lists the archives apt would download to install the packages,
+    leaving out the ones that already are in apt's archives directory.
+    """
+    available_packages = get_available_packages(module, packages)
+    if not available_packages:
+        return []
+    cmd = [
+        APT_GET_EXECUTABLE,
+        "install",
+        "--print-uris",
+        "-qq",
+        "-y",
+        *available_packages,
+    ]
+    rc, out, err = module.run_command(cmd)
+    if rc != 0:
+        module.fail_json(
+            msg=f"Error attempting to plan package downloads [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+    return [
+        deb
+        for deb in parse_print_uris_output(out)
+        if not is_archived(archives_path, module, deb)
+    ]
+
+
+def place(
+    module: AnsibleModule, files: List[Dict], staging_path: str, archives_path: str
+) -> List[str]:
+    """
+    Moves archives that were pushed to `staging_path` into apt's archives directory.
+    Archives whose checksum does not match are dropped.
+    """
+    placed = []
+    for deb in files:
+        staged_path = os.path.join(staging_path, deb["filename"])
+        if (
+            not os.path.isfile(staged_path)
+            or module.sha256(staged_path) != deb["sha256"]
+        ):
+            continue
+        archived_path = os.path.join(archives_path, deb["filename"])
+        module.atomic_move(staged_path, archived_path)
+        os.chmod(archived_path, 0o644)
+        placed.append(deb["filename"])
+    return placed
+
+
+def inventory(
+    module: AnsibleModule, archives_path: str, stored: Optional[List[Dict]] = None
+) -> List[Dict]:
+    """
+    Lists the archives in apt's archives directory with their checksum.
+    Archives whose filename and size match a `stored` one are left out without being hashed,
+    so that a harvest with nothing new costs a directory listing.
+    """
+    stored_keys = {(deb["filename"], deb["size"]) for deb in stored or []}
+    debs = []
+    for entry in sorted(os.scandir(archives_path), key=lambda entry: entry.name):
+        deb = parse_deb_filename(entry.name)
+        if deb is None or not entry.is_file():
+            continue
+        size = entry.stat().st_size
+        if (entry.name, size) in stored_keys:
+            continue
+        deb.update(
+            filename=entry.name,
+            path=entry.path,
+            size=size,
+            sha256=module.sha256(entry.path),
+        )
+        debs.append(deb)
+    return debs
+
+
+def run_module():
+    module_args = dict(
+        operation=dict(
+            type="str", required=True, choices=["plan", "place", "inventory"]
+        ),
+        packages=dict(type="list", elements="str", default=[]),
+        files=dict(type="list", elements="dict", default=[]),
+        stored=dict(type="list", elements="dict", default=[]),
+        staging_path=dict(type="path"),
+        archives_path=dict(type="path", default=APT_ARCHIVES_PATH),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_if=[("operation", "place", ["staging_path"])],
+        supports_check_mode=True,
+    )
+
+    operation = module.params["operation"]
+    archives_path = module.params["archives_path"]
+    if operation == "plan":
+        module.exit_json(
+            changed=False, debs=plan(module, module.params["packages"], archives_path)
+        )
+    elif operation == "inventory":
+        module.exit_json(
+            changed=False,
+            debs=inventory(module, archives_path, module.params["stored"]),
+        )
+    elif operation == "place":
+        placed = (
+            []
+            if module.check_mode
+            else place(
+                module,
+                module.params["files"],
+                module.params["staging_path"],
+                archives_path,
+            )
+        )
+        module.exit_json(changed=bool(placed), placed=placed)
+    else:
+        raise AssertionError
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+from unittest.mock import call, patch
+import pytest
+import deb_cache
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+@pytest.fixture
+def module_instance() -> AnsibleModule:
+    set_module_args({})
+    module = AnsibleModule(argument_spec={}, supports_check_mode=False)
+    with patch.multiple(module, fail_json=mock_fail_json, exit_json=mock_exit_json):
+        yield module
+
+
+def sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.parametrize(
+    ("filename", "expected"),
+    [
+        (
+            "htop_3.2.2-2_amd64.deb",
+            {"name": "htop", "version": "3.2.2-2", "arch": "amd64"},
+        ),
+        (
+            "docker-ce_5%3a24.0.7-1~debian.12~bookworm_amd64.deb",
+            {
+                "name": "docker-ce",
+                "version": "5%3a24.0.7-1~debian.12~bookworm",
+                "arch": "amd64",
+            },
+        ),
+        ("lock", None),
+        ("partial_amd64.deb", None),
+    ],
+)
+def test_parse_deb_filename(filename: str, expected: Optional[Dict]) -> None:
+    assert deb_cache.parse_deb_filename(filename) == expected
+
+
+def test_parse_print_uris_output() -> None:
+    digest = "a" * 64
+    out = (
+        "'http://deb.debian.org/debian/pool/main/h/htop/htop_3.2.2-2_amd64.deb' "
+        f"htop_3.2.2-2_amd64.deb 152840 SHA256:{digest}\n"
+        "'http://deb.debian.org/debian/pool/main/t/tree/tree_2.1.0-1_amd64.deb' "
+        "tree_2.1.0-1_amd64.deb 47504 MD5Sum:abc\n"
+    )
+
+    assert deb_cache.parse_print_uris_output(out) == [
+        {
+            "name": "htop",
+            "version": "3.2.2-2",
+            "arch": "amd64",
+            "filename": "htop_3.2.2-2_amd64.deb",
+            "size": 152840,
+            "sha256": digest,
+        }
+    ]
+
+
+def test_parse_policy_output() -> None:
+    out = """\
+htop:
+  Installed: (none)
+  Candidate: 3.2.2-2
+  Version table:
+     3.2.2-2 500
+        500 http://deb.debian.org/debian bookworm/main amd64 Packages
+code:
+  Installed: (none)
+  Candidate: (none)
+  Version table:
+"""
+
+    assert deb_cache.parse_policy_output(out) == ["htop"]
+
+
+def test_plan__leaves_out_archives_that_are_already_present(
+    module_instance: AnsibleModule, tmp_path: Path
+) -> None:
+    (tmp_path / "htop_3.2.2-2_amd64.deb").write_bytes(b"htop")
+    print_uris_output = (
+        f"'http://x/htop_3.2.2-2_amd64.deb' htop_3.2.2-2_amd64.deb 4 SHA256:{sha256(b'htop')}\n"
+        f"'http://x/tree_2.1.0-1_amd64.deb' tree_2.1.0-1_amd64.deb 4 SHA256:{sha256(b'tree')}\n"
+    )
+    policy_output = "htop:\n  Candidate: 3.2.2-2\ntree:\n  Candidate: 2.1.0-1\n"
+
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        mock_run_command.side_effect = [
+            (0, policy_output, ""),
+            (0, print_uris_output, ""),
+        ]
+        debs = deb_cache.plan(module_instance, ["htop", "tree", "code"], str(tmp_path))
+
+    assert [deb["filename"] for deb in debs] == ["tree_2.1.0-1_amd64.deb"]
+    assert mock_run_command.call_args_list == [
+        call(["apt-cache", "policy", "htop", "tree", "code"]),
+        call(["apt-get", "install", "--print-uris", "-qq", "-y", "htop", "tree"]),
+    ]
+
+
+def test_place__moves_only_archives_with_a_matching_checksum(
+    module_instance: AnsibleModule, tmp_path: Path
+) -> None:
+    staging_path = tmp_path / "staging"
+    staging_path.mkdir()
+    archives_path = tmp_path / "archives"
+    archives_path.mkdir()
+    (staging_path / "htop_3.2.2-2_amd64.deb").write_bytes(b"htop")
+    (staging_path / "tree_2.1.0-1_amd64.deb").write_bytes(b"corrupted")
+
+    placed = deb_cache.place(
+        module_instance,
+        [
+            {"filename": "htop_3.2.2-2_amd64.deb", "sha256": sha256(b"htop")},
+            {"filename": "tree_2.1.0-1_amd64.deb", "sha256": sha256(b"tree")},
+        ],
+        str(staging_path),
+        str(archives_path),
+    )
+
+    assert placed == ["htop_3.2.2-2_amd64.deb"]
+    assert [path.name for path in archives_path.iterdir()] == ["htop_3.2.2-2_amd64.deb"]
+
+
+def test_inventory(module_instance: AnsibleModule, tmp_path: Path) -> None:
+    (tmp_path / "htop_3.2.2-2_amd64.deb").write_bytes(b"htop")
+    (tmp_path / "lock").write_bytes(b"")
+    (tmp_path / "partial").mkdir()
+
+    assert deb_cache.inventory(module_instance, str(tmp_path)) == [
+        {
+            "name": "htop",
+            "version": "3.2.2-2",
+            "arch": "amd64",
+            "filename": "htop_3.2.2-2_amd64.deb",
+            "path": str(tmp_path / "htop_3.2.2-2_amd64.deb"),
+            "size": 4,
+            "sha256": sha256(b"htop"),
+        }
+    ]
+
+
+def test_inventory__with_stored_archives__hashes_only_the_new_ones(
+    module_instance: AnsibleModule, tmp_path: Path
+) -> None:
+    (tmp_path / "htop_3.2.2-2_amd64.deb").write_bytes(b"htop")
+    (tmp_path / "tree_2.1.0-1_amd64.deb").write_bytes(b"tree")
+    (tmp_path / "curl_7.88.1-10_amd64.deb").write_bytes(b"curl")
+    stored = [
+        {"filename": "htop_3.2.2-2_amd64.deb", "size": 4},
+        {"filename": "tree_2.1.0-1_amd64.deb", "size": 3},
+    ]
+
+    with patch.object(module_instance, "sha256", wraps=module_instance.sha256) as mock:
+        debs = deb_cache.inventory(module_instance, str(tmp_path), stored)
+
+    assert [deb["filename"] for deb in debs] == [
+        "curl_7.88.1-10_amd64.deb",
+        "tree_2.1.0-1_amd64.deb",
+    ]
+    assert mock.call_count == 2
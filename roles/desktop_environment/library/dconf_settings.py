@@ -0,0 +1,347 @@
+#!/usr/bin/python
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from ansible.module_utils.basic import AnsibleModule
+
+__metaclass__ = type
+
+DCONF_EXECUTABLE = "dconf"
+DBUS_RUN_SESSION_EXECUTABLE = "dbus-run-session"
+RUNTIME_DIR_TEMPLATE = "/run/user/{uid}"
+
+# Keywords that prefix a value to set its type, e.g. 'uint32 5' or "objectpath '/org/gnome'"
+TYPE_KEYWORDS = {
+    "boolean",
+    "byte",
+    "int16",
+    "uint16",
+    "int32",
+    "uint32",
+    "int64",
+    "uint64",
+    "handle",
+    "double",
+    "string",
+    "objectpath",
+    "signature",
+}
+NUMERIC_TYPE_KEYWORDS = {
+    "byte",
+    "int16",
+    "uint16",
+    "int32",
+    "uint32",
+    "int64",
+    "uint64",
+    "handle",
+    "double",
+}
+
+GVARIANT_TOKEN_REGEX = re.compile(
+    r"""
+    \s*(?:
+        (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<number>[-+]?(?:0x[0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|inf|nan))
+      | (?P<annotation>@[^\s\[\](){}<>,:]+)
+      | (?P<word>[a-z][a-z0-9]*)
+      | (?P<punctuation>[\[\](){}<>,:])
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+class GVariantSyntaxError(Exception):
+    pass
+
+
+def tokenize_gvariant(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = GVARIANT_TOKEN_REGEX.match(text, position)
+        if not match:
+            raise GVariantSyntaxError(f"Unexpected {text[position:]!r} in {text!r}")
+        position = match.end()
+        tokens.append((match.lastgroup, match[match.lastgroup]))
+    return tokens
+
+
+def unescape_gvariant_string(token: str) -> str:
+    return re.sub(r"\\(.)", r"\1", token[1:-1])
+
+
+def parse_gvariant(text: str) -> Any:
+    """
+    Parses GVariant text format into a comparable structure, so that values
+    that differ only in how they are written compare equal.
+    Type annotations (e.g. '@as []') are dropped, type keywords (e.g. 'uint32 5') are kept.
+    Numbers without a type keyword are tagged 'number', see `values_equal`.
+    Example: "['a', \"b\"]" -> ('array', (('string', 'a'), ('string', 'b')))
+    """
+    tokens = tokenize_gvariant(text)
+    position = 0
+
+    def peek() -> Optional[Tuple[str, str]]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take(expected: Optional[str] = None) -> Tuple[str, str]:
+        nonlocal position
+        token = peek()
+        if token is None or (expected is not None and token[1] != expected):
+            raise GVariantSyntaxError(f"Expected {expected or 'a value'} in {text!r}")
+        position += 1
+        return token
+
+    def parse_sequence(closing: str) -> List:
+        items = []
+        while peek() is not None and peek()[1] != closing:
+            items.append(parse_value())
+            if peek() is not None and peek()[1] == ",":
+                take(",")
+        take(closing)
+        return items
+
+    def parse_value() -> Any:
+        kind, value = take()
+        if kind == "annotation":
+            return parse_value()
+        if kind == "string":
+            return ("string", unescape_gvariant_string(value))
+        if kind == "number":
+            if value.lower().lstrip("+-").startswith("0x"):
+                return ("number", int(value, 16))
+            if re.fullmatch(r"[-+]?\d+", value):
+                return ("number", int(value))
+            return ("number", float(value))
+        if kind == "word":
+            if value in ("true", "false"):
+                return ("boolean", value == "true")
+            if value == "nothing":
+                return ("maybe", None)
+            if value == "just":
+                return ("maybe", parse_value())
+            if value in TYPE_KEYWORDS:
+                inner = parse_value()
+                return (value, inner[1])
+            raise GVariantSyntaxError(f"Unexpected {value!r} in {text!r}")
+        if value == "[":
+            return ("array", tuple(parse_sequence("]")))
+        if value == "(":
+            return ("tuple", tuple(parse_sequence(")")))
+        if value == "<":
+            inner = parse_value()
+            take(">")
+            return ("variant", inner)
+        if value == "{":
+            entries = []
+            while peek() is not None and peek()[1] != "}":
+                key = parse_value()
+                take(":")
+                entries.append((key, parse_value()))
+                if peek() is not None and peek()[1] == ",":
+                    take(",")
+            take("}")
+            return ("dict", tuple(entries))
+        raise GVariantSyntaxError(f"Unexpected {value!r} in {text!r}")
+
+    parsed = parse_value()
+    if peek() is not None:
+        raise GVariantSyntaxError(f"Unexpected {peek()[1]!r} in {text!r}")
+    return parsed
+
+
+def to_gvariant(value: Any) -> str:
+    """
+    Values from YAML are expected to be written in GVariant text format already,
+    except for lists and booleans, which are converted.
+    Example: ['a.desktop', 'b.desktop'] -> "['a.desktop', 'b.desktop']"
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return f"[{', '.join(quote_gvariant(item) for item in value)}]"
+    return str(value)
+
+
+def quote_gvariant(value: Any) -> str:
+    if isinstance(value, str):
+        escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+        return f"'{escaped}'"
+    return to_gvariant(value)
+
+
+def values_equal(a: Any, b: Any) -> bool:
+    """
+    Compares parsed GVariant values. A number without a type keyword equals a typed number
+    of the same value: `dconf dump` shows e.g. a uint32 key as 'uint32 5', while it is configured as '5'.
+    Untyped integers and doubles stay apart: '5' is an int32 and '5.0' a double.
+    """
+    (a_type, a_value), (b_type, b_value) = a, b
+    if a_type == "number" and b_type == "number":
+        return type(a_value) is type(b_value) and a_value == b_value
+    if (a_type == "number" and b_type in NUMERIC_TYPE_KEYWORDS) or (
+        b_type == "number" and a_type in NUMERIC_TYPE_KEYWORDS
+    ):
+        return a_value == b_value
+    if a_type != b_type:
+        return False
+    if a_type in ("array", "tuple"):
+        return len(a_value) == len(b_value) and all(
+            values_equal(a_item, b_item) for a_item, b_item in zip(a_value, b_value)
+        )
+    if a_type == "dict":
+        return len(a_value) == len(b_value) and all(
+            values_equal(a_key, b_key) and values_equal(a_item, b_item)
+            for (a_key, a_item), (b_key, b_item) in zip(a_value, b_value)
+        )
+    if a_type in ("variant", "maybe") and a_value is not None and b_value is not None:
+        return values_equal(a_value, b_value)
+    return a_value == b_value
+
+
+def gvariants_equal(a: str, b: str) -> bool:
+    try:
+        return values_equal(parse_gvariant(a), parse_gvariant(b))
+    except GVariantSyntaxError:
+        return a.strip() == b.strip()
+
+
+def split_key(key: str) -> Tuple[str, str]:
+    """
+    Example: '/org/gnome/mutter/dynamic-workspaces' -> ('/org/gnome/mutter/', 'dynamic-workspaces')
+    """
+    directory, _, name = key.rpartition("/")
+    return f"{directory}/", name
+
+
+def compute_dump_path(keys: List[str]) -> str:
+    """
+    The deepest directory that contains every key, so that a single dump reads all of them.
+    """
+    directories = [split_key(key)[0].strip("/").split("/") for key in keys]
+    common = os.path.commonprefix(directories) if directories else []
+    return "/" + "".join(f"{part}/" for part in common if part)
+
+
+def parse_dump_output(out: str, dump_path: str) -> Dict[str, str]:
+    """
+    Maps every key in a `dconf dump` to its value's GVariant text.
+    Sections are relative to the dumped path; '/' is the dumped path itself.
+    """
+    values = {}
+    section = None
+    for line in out.splitlines():
+        if line.startswith("[") and line.rstrip().endswith("]"):
+            relative = line.strip()[1:-1].strip("/")
+            section = dump_path + (f"{relative}/" if relative else "")
+        elif section is not None and "=" in line:
+            name, _, value = line.partition("=")
+            values[section + name.strip()] = value.strip()
+    return values
+
+
+def build_keyfile(changes: Dict[str, str]) -> str:
+    """
+    Groups the changed keys by directory, in the format `dconf load /` expects.
+    """
+    sections = {}
+    for key, value in changes.items():
+        directory, name = split_key(key)
+        sections.setdefault(directory.strip("/") or "/", []).append(f"{name}={value}")
+    return "\n".join(
+        f"[{directory}]\n" + "".join(f"{line}\n" for line in lines)
+        for directory, lines in sections.items()
+    )
+
+
+def compute_dbus_environment(module: AnsibleModule) -> Tuple[List[str], Dict[str, str]]:
+    """
+    dconf writes through the session bus. The user's running session is used when there is one,
+    otherwise a session of its own is started for the write.
+    """
+    if os.environ.get("DBUS_SESSION_BUS_ADDRESS"):
+        return [], {}
+    bus_path = os.path.join(RUNTIME_DIR_TEMPLATE.format(uid=os.getuid()), "bus")
+    if os.path.exists(bus_path):
+        return [], dict(DBUS_SESSION_BUS_ADDRESS=f"unix:path={bus_path}")
+    return [module.get_bin_path(DBUS_RUN_SESSION_EXECUTABLE, required=True), "--"], {}
+
+
+def run_module():
+    module_args = dict(
+        settings=dict(
+            type="list",
+            elements="dict",
+            required=True,
+            options=dict(
+                key=dict(type="str", required=True, no_log=False),
+                value=dict(type="raw", required=True),
+            ),
+        ),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    desired = {
+        setting["key"]: to_gvariant(setting["value"])
+        for setting in module.params["settings"]
+    }
+    for key in desired:
+        if not key.startswith("/") or key.endswith("/"):
+            module.fail_json(msg=f"Invalid dconf key: {key}")
+
+    dump_path = compute_dump_path(list(desired))
+    cmd = [DCONF_EXECUTABLE, "dump", dump_path]
+    rc, out, err = module.run_command(cmd)
+    if rc != 0:
+        module.fail_json(
+            msg=f"Error attempting to read dconf settings [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+    current = parse_dump_output(out, dump_path)
+
+    changes = {
+        key: value
+        for key, value in desired.items()
+        if key not in current or not gvariants_equal(current[key], value)
+    }
+    diff = [
+        dict(key=key, before=current.get(key), after=value)
+        for key, value in changes.items()
+    ]
+
+    if changes and not module.check_mode:
+        prefix, environ_update = compute_dbus_environment(module)
+        cmd = [*prefix, DCONF_EXECUTABLE, "load", "/"]
+        rc, out, err = module.run_command(
+            cmd, data=build_keyfile(changes), environ_update=environ_update
+        )
+        if rc != 0:
+            module.fail_json(
+                msg=f"Error attempting to write dconf settings [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+                changes=diff,
+            )
+
+    module.exit_json(
+        changed=bool(changes),
+        changes=diff,
+        diff=dict(
+            before="".join(
+                f"{change['key']}={change['before']}\n"
+                for change in diff
+                if change["before"] is not None
+            ),
+            after="".join(f"{change['key']}={change['after']}\n" for change in diff),
+        ),
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import json
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import dconf_settings
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+DUMP_OUTPUT = """\
+[desktop/interface]
+clock-format='24h'
+color-scheme='default'
+
+[shell]
+favorite-apps=['firefox.desktop', 'code.desktop']
+"""
+
+
+def run_module(args: Dict, dump_output: str = DUMP_OUTPUT):
+    set_module_args(args)
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(
+        AnsibleModule, "run_command", return_value=(0, dump_output, "")
+    ) as mock_run_command, patch.dict(
+        dconf_settings.os.environ, {"DBUS_SESSION_BUS_ADDRESS": "unix:path=/bus"}
+    ):
+        with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as exc_info:
+            dconf_settings.run_module()
+    return exc_info.value.args[0], mock_run_command
+
+
+@pytest.mark.parametrize(
+    ("a", "b", "expected"),
+    [
+        ("['a', \"b\"]", "['a','b']", True),
+        ("@as []", "[]", True),
+        ("[('xkb', 'us')]", "[('xkb','us')]", True),
+        ("{'a': <1>}", "{'a':<1>}", True),
+        ("uint32 5", "5", True),
+        ("[<uint32 5>]", "[<5>]", True),
+        ("double 2.5", "2.5", True),
+        ("uint32 5", "int64 5", False),
+        ("uint32 5", "6", False),
+        ("5", "5.0", False),
+        ("'24h'", "'12h'", False),
+    ],
+)
+def test_gvariants_equal__compares_values_not_text(
+    a: str, b: str, expected: bool
+) -> None:
+    assert dconf_settings.gvariants_equal(a, b) is expected
+
+
+def test_compute_dump_path__is_the_keys_common_directory() -> None:
+    assert (
+        dconf_settings.compute_dump_path(
+            [
+                "/org/gnome/desktop/interface/clock-format",
+                "/org/gnome/shell/favorite-apps",
+            ]
+        )
+        == "/org/gnome/"
+    )
+
+
+def test_run_module__when_every_key_matches__only_dumps() -> None:
+    result, mock_run_command = run_module(
+        dict(
+            settings=[
+                dict(key="/org/gnome/desktop/interface/clock-format", value='"24h"'),
+                dict(
+                    key="/org/gnome/shell/favorite-apps",
+                    value=["firefox.desktop", "code.desktop"],
+                ),
+            ]
+        )
+    )
+
+    assert result["changed"] is False
+    mock_run_command.assert_called_once()
+    assert mock_run_command.call_args.args[0] == ["dconf", "dump", "/org/gnome/"]
+
+
+def test_run_module__when_keys_differ__loads_only_the_changed_keys() -> None:
+    result, mock_run_command = run_module(
+        dict(
+            settings=[
+                dict(key="/org/gnome/desktop/interface/clock-format", value="'24h'"),
+                dict(
+                    key="/org/gnome/desktop/interface/color-scheme",
+                    value="'prefer-dark'",
+                ),
+                dict(key="/org/gnome/mutter/dynamic-workspaces", value=True),
+            ]
+        )
+    )
+
+    assert result["changed"] is True
+    assert result["changes"] == [
+        dict(
+            key="/org/gnome/desktop/interface/color-scheme",
+            before="'default'",
+            after="'prefer-dark'",
+        ),
+        dict(key="/org/gnome/mutter/dynamic-workspaces", before=None, after="true"),
+    ]
+    assert mock_run_command.call_count == 2
+    assert mock_run_command.call_args.args[0] == ["dconf", "load", "/"]
+    assert mock_run_command.call_args.kwargs["data"] == (
+        "[org/gnome/desktop/interface]\ncolor-scheme='prefer-dark'\n"
+        "\n[org/gnome/mutter]\ndynamic-workspaces=true\n"
+    )
@@ -0,0 +1,398 @@
+#!/usr/bin/python
+import fcntl
+import glob
+import gzip
+import json
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.urls import open_url
+
+__metaclass__ = type
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# VS Code installs extensions from the Marketplace, VSCodium from Open VSX
+GALLERY_URLS = {
+    "marketplace": "https://marketplace.visualstudio.com/_apis/public/gallery",
+    "open-vsx": "https://open-vsx.org/api",
+}
+# IncludeVersions | IncludeVersionProperties
+MARKETPLACE_QUERY_FLAGS = 0x1 | 0x10
+MARKETPLACE_FILTER_TYPE_EXTENSION_NAME = 7
+MARKETPLACE_PRE_RELEASE_PROPERTY = "Microsoft.VisualStudio.Code.PreRelease"
+
+
+def parse_extension(extension: str) -> Tuple[str, Optional[str]]:
+    """
+    Splits an extension into its (lower-cased) ID and optional pinned version.
+    Example: 'ms-python.python@2023.20.0' -> ('ms-python.python', '2023.20.0')
+    """
+    extension_id, _, version = extension.partition("@")
+    return extension_id.lower(), version or None
+
+
+def get_installed_extensions(
+    module: AnsibleModule, executable: str
+) -> Dict[str, Optional[str]]:
+    """
+    Lists the installed extensions and their versions with a single editor invocation.
+    """
+    cmd = [executable, "--list-extensions", "--show-versions"]
+    rc, out, err = module.run_command(cmd)
+    if rc != 0:
+        module.fail_json(
+            msg=f"Error attempting to list extensions [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+    return dict(
+        parse_extension(line.strip()) for line in out.splitlines() if line.strip()
+    )
+
+
+def compute_changes(
+    extensions: List[str],
+    uninstall: List[str],
+    installed: Dict[str, Optional[str]],
+) -> Tuple[List[str], List[str]]:
+    """
+    Determines which extensions need to be installed (missing or at another
+    version than the pinned one) and which ones need to be uninstalled.
+    """
+    to_install = []
+    for extension in extensions:
+        extension_id, version = parse_extension(extension)
+        if extension_id not in installed or (
+            version is not None and installed[extension_id] != version
+        ):
+            if extension not in to_install:
+                to_install.append(extension)
+    to_uninstall = []
+    for extension in uninstall:
+        extension_id, _ = parse_extension(extension)
+        if extension_id in installed and extension_id not in to_uninstall:
+            to_uninstall.append(extension_id)
+    return to_install, to_uninstall
+
+
+def compute_cached_vsix_path(
+    cache_path: str, gallery: str, extension_id: str, version: str
+) -> str:
+    """
+    VSIX files are cached per gallery: the Marketplace and Open VSX may serve different
+    packages for the same version, and the Marketplace's may only be used by VS Code.
+    Example: ('~/.cache/vsix', 'open-vsx', 'redhat.vscode-yaml', '1.14.0') -> '~/.cache/vsix/open-vsx/redhat.vscode-yaml@1.14.0.vsix'
+    """
+    return os.path.join(cache_path, gallery, f"{extension_id}@{version}.vsix")
+
+
+def resolve_open_vsx_extension(
+    gallery_url: str, extension_id: str, version: Optional[str]
+) -> Tuple[str, str]:
+    """
+    Looks an extension up in an Open VSX gallery, at its latest version unless pinned.
+    Returns the version and its VSIX's url.
+    """
+    publisher, _, name = extension_id.partition(".")
+    url = f"{gallery_url.rstrip('/')}/{publisher}/{name}"
+    if version is not None:
+        url += f"/{version}"
+    with open_url(url, timeout=60) as response:
+        metadata = json.load(response)
+    return metadata["version"], metadata["files"]["download"]
+
+
+def parse_marketplace_latest_version(response: Dict) -> str:
+    """
+    Picks the latest release out of a Marketplace query's versions, newest first.
+    Pre-releases are skipped, and so are platform-specific packages, which the cache can't share.
+    """
+    for extension in response["results"][0]["extensions"]:
+        for version in extension["versions"]:
+            properties = {p["key"]: p["value"] for p in version.get("properties") or []}
+            if (
+                not version.get("targetPlatform")
+                and properties.get(MARKETPLACE_PRE_RELEASE_PROPERTY) != "true"
+            ):
+                return version["version"]
+    raise ValueError("No release that is not platform-specific")
+
+
+def resolve_marketplace_extension(
+    gallery_url: str, extension_id: str, version: Optional[str]
+) -> Tuple[str, str]:
+    """
+    Looks an extension up in the Marketplace, at its latest release unless pinned.
+    Returns the version and its VSIX's url.
+    """
+    gallery_url = gallery_url.rstrip("/")
+    if version is None:
+        query = dict(
+            filters=[
+                dict(
+                    criteria=[
+                        dict(
+                            filterType=MARKETPLACE_FILTER_TYPE_EXTENSION_NAME,
+                            value=extension_id,
+                        )
+                    ],
+                    pageSize=1,
+                )
+            ],
+            flags=MARKETPLACE_QUERY_FLAGS,
+        )
+        with open_url(
+            f"{gallery_url}/extensionquery",
+            data=json.dumps(query),
+            method="POST",
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json;api-version=3.0-preview.1",
+            },
+            timeout=60,
+        ) as response:
+            version = parse_marketplace_latest_version(json.load(response))
+    publisher, _, name = extension_id.partition(".")
+    return (
+        version,
+        f"{gallery_url}/publishers/{publisher}/vsextensions/{name}/{version}/vspackage",
+    )
+
+
+GALLERY_RESOLVERS = {
+    "marketplace": resolve_marketplace_extension,
+    "open-vsx": resolve_open_vsx_extension,
+}
+
+
+def download_vsix(url: str, vsix_path: str) -> None:
+    """
+    Downloads a VSIX next to its final path, so that only complete packages end up in the cache.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(vsix_path), prefix=".")
+    try:
+        with os.fdopen(fd, "wb") as f, open_url(url, timeout=60) as response:
+            # The Marketplace serves its packages gzip-encoded
+            package = (
+                gzip.GzipFile(fileobj=response)
+                if response.headers.get("Content-Encoding") == "gzip"
+                else response
+            )
+            for chunk in iter(lambda: package.read(DOWNLOAD_CHUNK_SIZE), b""):
+                f.write(chunk)
+        if not zipfile.is_zipfile(temp_path):
+            raise ValueError(f"{url} is not a VSIX package")
+        os.replace(temp_path, vsix_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def prefetch_extension(
+    cache_path: str, gallery: str, gallery_url: str, extension: str
+) -> Tuple[str, str]:
+    """
+    Makes sure the extension's VSIX is in the gallery's cache.
+    A pinned version that is cached already needs no network access.
+    Returns the VSIX's path and how it was obtained: 'cached' or 'downloaded'.
+    """
+    resolve = GALLERY_RESOLVERS[gallery]
+    extension_id, version = parse_extension(extension)
+    download_url = None
+    if version is None:
+        version, download_url = resolve(gallery_url, extension_id, None)
+    vsix_path = compute_cached_vsix_path(cache_path, gallery, extension_id, version)
+    os.makedirs(os.path.dirname(vsix_path), exist_ok=True)
+    # Runs on the same host at the same time wait for each other's download
+    lock_path = os.path.join(cache_path, gallery, f".{extension_id}@{version}.lock")
+    with open(lock_path, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.isfile(vsix_path):
+            return vsix_path, "cached"
+        if download_url is None:
+            _, download_url = resolve(gallery_url, extension_id, version)
+        download_vsix(download_url, vsix_path)
+    return vsix_path, "downloaded"
+
+
+def prefetch_extensions(
+    cache_path: str,
+    gallery: str,
+    gallery_url: str,
+    extensions: List[str],
+    max_workers: int,
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Prefetches the extensions concurrently. Returns the cached VSIX of every extension
+    that could be prefetched, and how each extension was obtained or the error that prevented it.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            extension: executor.submit(
+                prefetch_extension, cache_path, gallery, gallery_url, extension
+            )
+            for extension in extensions
+        }
+    vsix_paths, outcomes = {}, {}
+    for extension, future in futures.items():
+        exception = future.exception()
+        if exception is None:
+            vsix_paths[extension], outcomes[extension] = future.result()
+        else:
+            outcomes[extension] = f"failed: {exception}"
+    return vsix_paths, outcomes
+
+
+def compute_version_key(version: str) -> Tuple[int, ...]:
+    """
+    Example: '1.10.0' -> (1, 10, 0)
+    """
+    return tuple(int(part) if part.isdigit() else 0 for part in version.split("."))
+
+
+def find_cached_extensions(
+    cache_path: str, gallery: str, extensions: List[str]
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Picks the extensions' VSIX out of the gallery's cache, without any network access:
+    the pinned version, or else the newest cached one.
+    Returns the cached VSIX of every extension that was found, and how each extension was obtained.
+    """
+    vsix_paths, outcomes = {}, {}
+    for extension in extensions:
+        extension_id, version = parse_extension(extension)
+        if version is not None:
+            candidates = [
+                compute_cached_vsix_path(cache_path, gallery, extension_id, version)
+            ]
+        else:
+            candidates = sorted(
+                glob.glob(
+                    compute_cached_vsix_path(cache_path, gallery, extension_id, "*")
+                ),
+                key=lambda path: compute_version_key(
+                    os.path.basename(path)[len(extension_id) + 1 : -len(".vsix")]
+                ),
+                reverse=True,
+            )
+        if candidates and os.path.isfile(candidates[0]):
+            vsix_paths[extension], outcomes[extension] = candidates[0], "cached"
+        else:
+            outcomes[extension] = "failed: not cached"
+    return vsix_paths, outcomes
+
+
+def build_command(
+    executable: str,
+    to_install: List[str],
+    to_uninstall: List[str],
+    vsix_paths: Optional[Dict[str, str]] = None,
+) -> List[str]:
+    """
+    Builds a single editor invocation that applies all changes.
+    Extensions with a cached VSIX are installed from it, the other ones by the editor itself.
+    `--force` lets pinned versions replace the installed ones.
+    """
+    vsix_paths = vsix_paths or {}
+    cmd = [executable]
+    for extension in to_uninstall:
+        cmd += ["--uninstall-extension", extension]
+    for extension in to_install:
+        cmd += ["--install-extension", vsix_paths.get(extension, extension)]
+    if any(parse_extension(extension)[1] for extension in to_install):
+        cmd.append("--force")
+    return cmd
+
+
+def run_module():
+    module_args = dict(
+        operation=dict(type="str", default="install", choices=["install", "prefetch"]),
+        executable=dict(type="str"),
+        extensions=dict(type="list", elements="str", default=[]),
+        uninstall=dict(type="list", elements="str", default=[]),
+        cache_path=dict(type="path"),
+        gallery=dict(type="str", default="open-vsx", choices=list(GALLERY_URLS)),
+        gallery_url=dict(type="str"),
+        max_concurrent_downloads=dict(type="int", default=4),
+        offline=dict(type="bool", default=False),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_if=[
+            ("operation", "install", ["executable"]),
+            ("operation", "prefetch", ["cache_path"]),
+        ],
+        supports_check_mode=True,
+    )
+
+    gallery = module.params["gallery"]
+    gallery_url = module.params["gallery_url"] or GALLERY_URLS[gallery]
+    if module.params["operation"] == "prefetch":
+        # Fills a cache that installs can then use offline, e.g. a bundle's
+        outcomes = {}
+        if not module.check_mode:
+            _, outcomes = prefetch_extensions(
+                module.params["cache_path"],
+                gallery,
+                gallery_url,
+                module.params["extensions"],
+                module.params["max_concurrent_downloads"],
+            )
+            failed = {e: o for e, o in outcomes.items() if o.startswith("failed")}
+            if failed:
+                module.fail_json(
+                    msg=f"Error attempting to prefetch extensions: {', '.join(f'{e} ({o})' for e, o in failed.items())}",
+                    outcomes=outcomes,
+                )
+        module.exit_json(
+            changed="downloaded" in outcomes.values(),
+            outcomes=outcomes,
+        )
+
+    executable = module.params["executable"]
+    installed = get_installed_extensions(module, executable)
+    to_install, to_uninstall = compute_changes(
+        module.params["extensions"], module.params["uninstall"], installed
+    )
+
+    outcomes = {}
+    if (to_install or to_uninstall) and not module.check_mode:
+        vsix_paths = {}
+        # Extensions that can't be prefetched are left to the editor, e.g. when they aren't in the gallery
+        if module.params["cache_path"] and to_install and module.params["offline"]:
+            vsix_paths, outcomes = find_cached_extensions(
+                module.params["cache_path"], gallery, to_install
+            )
+        elif module.params["cache_path"] and to_install:
+            vsix_paths, outcomes = prefetch_extensions(
+                module.params["cache_path"],
+                gallery,
+                gallery_url,
+                to_install,
+                module.params["max_concurrent_downloads"],
+            )
+        cmd = build_command(executable, to_install, to_uninstall, vsix_paths)
+        rc, out, err = module.run_command(cmd)
+        if rc != 0:
+            module.fail_json(
+                msg=f"Error attempting to change extensions [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+            )
+
+    module.exit_json(
+        changed=bool(to_install or to_uninstall),
+        installed=to_install,
+        uninstalled=to_uninstall,
+        outcomes=outcomes,
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+import gzip
+import io
+import json
+import os
+import zipfile
+from typing import Dict, List, Optional, Tuple
+from unittest.mock import call, patch
+import pytest
+import editor_extensions
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+@pytest.mark.parametrize(
+    ("extension", "expected"),
+    [
+        ("eamodio.gitlens", ("eamodio.gitlens", None)),
+        ("EditorConfig.EditorConfig@0.16.4", ("editorconfig.editorconfig", "0.16.4")),
+    ],
+)
+def test_parse_extension(extension: str, expected: Tuple[str, Optional[str]]) -> None:
+    assert editor_extensions.parse_extension(extension) == expected
+
+
+@pytest.mark.parametrize(
+    ("extensions", "uninstall", "expected"),
+    [
+        (["eamodio.gitlens", "redhat.vscode-yaml"], [], (["redhat.vscode-yaml"], [])),
+        (["ms-python.python@2023.20.0"], [], ([], [])),
+        (["ms-python.python@2023.22.0"], [], (["ms-python.python@2023.22.0"], [])),
+        ([], ["EAMODIO.gitlens", "hashicorp.terraform"], ([], ["eamodio.gitlens"])),
+    ],
+)
+def test_compute_changes(
+    extensions: List[str],
+    uninstall: List[str],
+    expected: Tuple[List[str], List[str]],
+) -> None:
+    installed = {"eamodio.gitlens": "14.5.0", "ms-python.python": "2023.20.0"}
+
+    assert (
+        editor_extensions.compute_changes(extensions, uninstall, installed) == expected
+    )
+
+
+def test_build_command() -> None:
+    assert editor_extensions.build_command(
+        "codium", ["redhat.vscode-yaml", "ms-python.python@2023.22.0"], ["a.b"]
+    ) == [
+        "codium",
+        "--uninstall-extension",
+        "a.b",
+        "--install-extension",
+        "redhat.vscode-yaml",
+        "--install-extension",
+        "ms-python.python@2023.22.0",
+        "--force",
+    ]
+
+
+def run_module(args: Dict, list_output: str):
+    set_module_args(args)
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(AnsibleModule, "run_command") as mock_run_command:
+        mock_run_command.return_value = 0, list_output, ""
+        with pytest.raises(AnsibleExitJson) as exc_info:
+            editor_extensions.run_module()
+    return exc_info.value.args[0], mock_run_command
+
+
+def test_run_module__installs_missing_extensions_in_one_invocation() -> None:
+    result, mock_run_command = run_module(
+        {
+            "executable": "codium",
+            "extensions": [
+                "eamodio.gitlens",
+                "redhat.vscode-yaml",
+                "hashicorp.terraform",
+            ],
+        },
+        "eamodio.gitlens@14.5.0\n",
+    )
+
+    assert result == {
+        "changed": True,
+        "installed": ["redhat.vscode-yaml", "hashicorp.terraform"],
+        "uninstalled": [],
+        "outcomes": {},
+    }
+    assert mock_run_command.call_args_list == [
+        call(["codium", "--list-extensions", "--show-versions"]),
+        call(
+            [
+                "codium",
+                "--install-extension",
+                "redhat.vscode-yaml",
+                "--install-extension",
+                "hashicorp.terraform",
+            ]
+        ),
+    ]
+
+
+def test_run_module__when_everything_is_installed__only_lists_extensions() -> None:
+    result, mock_run_command = run_module(
+        {"executable": "code", "extensions": ["eamodio.gitlens"]},
+        "eamodio.gitlens@14.5.0\n",
+    )
+
+    assert result["changed"] is False
+    assert mock_run_command.call_args_list == [
+        call(["code", "--list-extensions", "--show-versions"])
+    ]
+
+
+def make_response(content: bytes, headers: Optional[Dict] = None) -> io.BytesIO:
+    response = io.BytesIO(content)
+    response.headers = headers or {}
+    return response
+
+
+def build_vsix() -> bytes:
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w") as archive:
+        archive.writestr("extension.vsixmanifest", "<PackageManifest/>")
+    return content.getvalue()
+
+
+def test_prefetch_extension__when_the_pinned_version_is_cached__needs_no_network(
+    tmp_path,
+) -> None:
+    cached_path = tmp_path / "open-vsx" / "redhat.vscode-yaml@1.14.0.vsix"
+    cached_path.parent.mkdir()
+    cached_path.write_bytes(build_vsix())
+
+    with patch.object(editor_extensions, "open_url") as mock_open_url:
+        result = editor_extensions.prefetch_extension(
+            str(tmp_path),
+            "open-vsx",
+            "https://open-vsx.org/api",
+            "redhat.vscode-yaml@1.14.0",
+        )
+
+    assert result == (str(cached_path), "cached")
+    mock_open_url.assert_not_called()
+
+
+def test_prefetch_extension__resolves_the_latest_version_and_downloads_it(
+    tmp_path,
+) -> None:
+    metadata = {
+        "version": "1.14.0",
+        "files": {"download": "https://example.com/redhat.vscode-yaml-1.14.0.vsix"},
+    }
+    responses = {
+        "https://open-vsx.org/api/redhat/vscode-yaml": make_response(
+            json.dumps(metadata).encode()
+        ),
+        "https://example.com/redhat.vscode-yaml-1.14.0.vsix": make_response(
+            build_vsix()
+        ),
+    }
+
+    with patch.object(
+        editor_extensions, "open_url", side_effect=lambda url, **_: responses[url]
+    ):
+        result = editor_extensions.prefetch_extension(
+            str(tmp_path), "open-vsx", "https://open-vsx.org/api", "redhat.vscode-yaml"
+        )
+
+    vsix_path = str(tmp_path / "open-vsx" / "redhat.vscode-yaml@1.14.0.vsix")
+    assert result == (vsix_path, "downloaded")
+    assert zipfile.is_zipfile(vsix_path)
+    assert all(response.closed for response in responses.values())
+
+
+def test_prefetch_extension__when_the_download_is_no_vsix__leaves_the_cache_empty(
+    tmp_path,
+) -> None:
+    metadata = {"version": "1.14.0", "files": {"download": "https://example.com/x"}}
+    responses = {
+        "https://open-vsx.org/api/redhat/vscode-yaml/1.14.0": make_response(
+            json.dumps(metadata).encode()
+        ),
+        "https://example.com/x": make_response(b"<html>Not Found</html>"),
+    }
+
+    with patch.object(
+        editor_extensions, "open_url", side_effect=lambda url, **_: responses[url]
+    ), pytest.raises(ValueError):
+        editor_extensions.prefetch_extension(
+            str(tmp_path),
+            "open-vsx",
+            "https://open-vsx.org/api",
+            "redhat.vscode-yaml@1.14.0",
+        )
+
+    assert not any(name.endswith(".vsix") for name in os.listdir(tmp_path / "open-vsx"))
+
+
+def test_download_vsix__when_the_request_fails__closes_and_removes_the_temporary_file(
+    tmp_path,
+) -> None:
+    open_fds = set(os.listdir("/proc/self/fd"))
+
+    with patch.object(
+        editor_extensions, "open_url", side_effect=OSError("Connection refused")
+    ), pytest.raises(OSError):
+        editor_extensions.download_vsix(
+            "https://example.com/x", str(tmp_path / "redhat.vscode-yaml@1.14.0.vsix")
+        )
+
+    assert os.listdir(tmp_path) == []
+    assert set(os.listdir("/proc/self/fd")) <= open_fds
+
+
+def test_parse_marketplace_latest_version__skips_pre_releases_and_platform_packages() -> (
+    None
+):
+    response = {
+        "results": [
+            {
+                "extensions": [
+                    {
+                        "versions": [
+                            {
+                                "version": "2024.3.0",
+                                "properties": [
+                                    {
+                                        "key": "Microsoft.VisualStudio.Code.PreRelease",
+                                        "value": "true",
+                                    }
+                                ],
+                            },
+                            {"version": "2024.2.1", "targetPlatform": "linux-x64"},
+                            {"version": "2024.2.0", "properties": []},
+                        ]
+                    }
+                ]
+            }
+        ]
+    }
+
+    assert editor_extensions.parse_marketplace_latest_version(response) == "2024.2.0"
+
+
+def test_prefetch_extension__from_the_marketplace__decodes_the_gzipped_package(
+    tmp_path,
+) -> None:
+    gallery_url = "https://marketplace.visualstudio.com/_apis/public/gallery"
+    package_url = (
+        f"{gallery_url}/publishers/redhat/vsextensions/vscode-yaml/1.14.0/vspackage"
+    )
+
+    with patch.object(
+        editor_extensions,
+        "open_url",
+        return_value=make_response(
+            gzip.compress(build_vsix()), {"Content-Encoding": "gzip"}
+        ),
+    ) as mock_open_url:
+        result = editor_extensions.prefetch_extension(
+            str(tmp_path), "marketplace", gallery_url, "redhat.vscode-yaml@1.14.0"
+        )
+
+    vsix_path = str(tmp_path / "marketplace" / "redhat.vscode-yaml@1.14.0.vsix")
+    assert result == (vsix_path, "downloaded")
+    assert zipfile.is_zipfile(vsix_path)
+    assert mock_open_url.return_value.closed
+    assert mock_open_url.call_args == call(package_url, timeout=60)
+
+
+def test_run_module__when_cached__installs_from_the_vsix_and_falls_back_to_the_editor(
+    tmp_path,
+) -> None:
+    (tmp_path / "open-vsx").mkdir()
+    (tmp_path / "open-vsx" / "redhat.vscode-yaml@1.14.0.vsix").write_bytes(build_vsix())
+
+    with patch.object(editor_extensions, "open_url", side_effect=OSError("Not Found")):
+        result, mock_run_command = run_module(
+            {
+                "executable": "codium",
+                "extensions": ["redhat.vscode-yaml@1.14.0", "ms-vscode.cpptools"],
+                "cache_path": str(tmp_path),
+            },
+            "",
+        )
+
+    assert result["outcomes"] == {
+        "redhat.vscode-yaml@1.14.0": "cached",
+        "ms-vscode.cpptools": "failed: Not Found",
+    }
+    assert mock_run_command.call_args_list[1] == call(
+        [
+            "codium",
+            "--install-extension",
+            str(tmp_path / "open-vsx" / "redhat.vscode-yaml@1.14.0.vsix"),
+            "--install-extension",
+            "ms-vscode.cpptools",
+            "--force",
+        ]
+    )
+
+
+def test_prefetch_extension__keeps_the_galleries_packages_apart(tmp_path) -> None:
+    marketplace_path = tmp_path / "marketplace" / "redhat.vscode-yaml@1.14.0.vsix"
+    marketplace_path.parent.mkdir()
+    marketplace_path.write_bytes(build_vsix())
+    metadata = {"version": "1.14.0", "files": {"download": "https://example.com/x"}}
+    responses = {
+        "https://open-vsx.org/api/redhat/vscode-yaml/1.14.0": make_response(
+            json.dumps(metadata).encode()
+        ),
+        "https://example.com/x": make_response(build_vsix()),
+    }
+
+    with patch.object(
+        editor_extensions, "open_url", side_effect=lambda url, **_: responses[url]
+    ):
+        result = editor_extensions.prefetch_extension(
+            str(tmp_path),
+            "open-vsx",
+            "https://open-vsx.org/api",
+            "redhat.vscode-yaml@1.14.0",
+        )
+
+    assert result == (
+        str(tmp_path / "open-vsx" / "redhat.vscode-yaml@1.14.0.vsix"),
+        "downloaded",
+    )
+
+
+def test_find_cached_extensions__picks_the_pinned_or_the_newest_version(
+    tmp_path,
+) -> None:
+    (tmp_path / "open-vsx").mkdir()
+    for vsix in [
+        "redhat.vscode-yaml@1.9.0.vsix",
+        "redhat.vscode-yaml@1.14.0.vsix",
+        "ms-python.python@2023.20.0.vsix",
+    ]:
+        (tmp_path / "open-vsx" / vsix).write_bytes(build_vsix())
+
+    vsix_paths, outcomes = editor_extensions.find_cached_extensions(
+        str(tmp_path),
+        "open-vsx",
+        ["redhat.vscode-yaml", "ms-python.python@2023.20.0", "hashicorp.terraform"],
+    )
+
+    assert vsix_paths == {
+        "redhat.vscode-yaml": str(
+            tmp_path / "open-vsx" / "redhat.vscode-yaml@1.14.0.vsix"
+        ),
+        "ms-python.python@2023.20.0": str(
+            tmp_path / "open-vsx" / "ms-python.python@2023.20.0.vsix"
+        ),
+    }
+    assert outcomes["hashicorp.terraform"] == "failed: not cached"
+
+
+def test_run_module__when_offline__installs_from_the_cache_without_network_access(
+    tmp_path,
+) -> None:
+    (tmp_path / "open-vsx").mkdir()
+    (tmp_path / "open-vsx" / "redhat.vscode-yaml@1.14.0.vsix").write_bytes(build_vsix())
+
+    with patch.object(editor_extensions, "open_url") as mock_open_url:
+        result, mock_run_command = run_module(
+            {
+                "executable": "codium",
+                "extensions": ["redhat.vscode-yaml"],
+                "cache_path": str(tmp_path),
+                "offline": True,
+            },
+            "",
+        )
+
+    assert result["outcomes"] == {"redhat.vscode-yaml": "cached"}
+    assert mock_open_url.call_count == 0
+    assert mock_run_command.call_args_list[1] == call(
+        [
+            "codium",
+            "--install-extension",
+            str(tmp_path / "open-vsx" / "redhat.vscode-yaml@1.14.0.vsix"),
+        ]
+    )
+
+
+def test_run_module__prefetch__fills_the_cache_without_an_editor(tmp_path) -> None:
+    metadata = {"version": "1.14.0", "files": {"download": "https://example.com/x"}}
+    responses = {
+        "https://open-vsx.org/api/redhat/vscode-yaml": make_response(
+            json.dumps(metadata).encode()
+        ),
+        "https://example.com/x": make_response(build_vsix()),
+    }
+
+    with patch.object(
+        editor_extensions, "open_url", side_effect=lambda url, **_: responses[url]
+    ):
+        result, mock_run_command = run_module(
+            {
+                "operation": "prefetch",
+                "extensions": ["redhat.vscode-yaml"],
+                "cache_path": str(tmp_path),
+            },
+            "",
+        )
+
+    assert result["changed"] is True
+    assert result["outcomes"] == {"redhat.vscode-yaml": "downloaded"}
+    assert mock_run_command.call_count == 0
+    assert (tmp_path / "open-vsx" / "redhat.vscode-yaml@1.14.0.vsix").is_file()
@@ -0,0 +1,79 @@
+#!/usr/bin/python
+import os
+import shutil
+import tempfile
+from typing import List
+
+from ansible.module_utils.basic import AnsibleModule
+
+__metaclass__ = type
+
+APT_GET_EXECUTABLE = "apt-get"
+
+
+def stage_sources(sources: List[str], sourceparts_path: str) -> List[str]:
+    """
+    Copies the given sources files into a directory of their own, so that it can be used
+    as apt's `sourceparts` directory. Sources that no longer exist are skipped.
+
+    Returns the sources that were staged.
+    """
+    staged = []
+    for source in sources:
+        if source in staged or not os.path.isfile(source):
+            continue
+        shutil.copy(source, os.path.join(sourceparts_path, os.path.basename(source)))
+        staged.append(source)
+    return staged
+
+
+def build_update_command(sourceparts_path: str, lock_timeout: int) -> List[str]:
+    """
+    Builds an `apt-get update` which only downloads the indexes of the sources in
+    `sourceparts_path`, while keeping the lists of every other source.
+    """
+    return [
+        APT_GET_EXECUTABLE,
+        "update",
+        "-o",
+        "Dir::Etc::sourcelist=/dev/null",
+        "-o",
+        f"Dir::Etc::sourceparts={sourceparts_path}",
+        "-o",
+        "APT::Get::List-Cleanup=0",
+        "-o",
+        f"DPkg::Lock::Timeout={lock_timeout}",
+    ]
+
+
+def run_module():
+    module_args = dict(
+        sources=dict(type="list", elements="path", required=True),
+        lock_timeout=dict(type="int", default=60),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    sourceparts_path = tempfile.mkdtemp(dir=module.tmpdir)
+    sources = stage_sources(module.params["sources"], sourceparts_path)
+    if not sources:
+        module.exit_json(changed=False, msg="No sources to update", sources=[])
+
+    if not module.check_mode:
+        cmd = build_update_command(sourceparts_path, module.params["lock_timeout"])
+        rc, out, err = module.run_command(cmd)
+        if rc != 0:
+            module.fail_json(
+                msg=f"Error attempting to update sources [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+            )
+    module.exit_json(
+        changed=True, msg=f"Updated sources: {', '.join(sources)}", sources=sources
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/python
+import os
+from typing import Dict, List
+
+from ansible.module_utils.basic import AnsibleModule
+
+__metaclass__ = type
+
+APT_SOURCES_LIST_D = "/etc/apt/sources.list.d/"
+EXTREPO_FILENAME_PREFIX = "extrepo_"
+EXTREPO_FILENAME_EXT = ".sources"
+
+# These mirror the names of `SourceFileState` and `RepositoryState` in extrepo_repository.
+# Modules can't import each other, so the states are reported by name.
+SOURCE_FILE_STATE_TO_REPOSITORY_STATE = {
+    "ENABLED_IMPLICIT": "ENABLED",
+    "ENABLED_EXPLICIT": "ENABLED",
+    "BROKEN": "ENABLED",
+    "DISABLED": "DISABLED",
+}
+
+
+def compute_repository_name(filename: str) -> str:
+    return filename[len(EXTREPO_FILENAME_PREFIX) : -len(EXTREPO_FILENAME_EXT)]
+
+
+def get_source_file_state(enabled_values: List[str]) -> str:
+    """
+    Classifies a .sources file by its `Enabled:` values,
+    the same way extrepo_repository's `get_source_file_state` does.
+    """
+    if not enabled_values:
+        return "ENABLED_IMPLICIT"
+    elif len(enabled_values) > 1:
+        return "BROKEN"
+    elif enabled_values[0] == "yes":
+        return "ENABLED_EXPLICIT"
+    elif enabled_values[0] == "no":
+        return "DISABLED"
+    else:
+        return "BROKEN"
+
+
+def parse_source_file(content: str) -> Dict:
+    """
+    Describes an extrepo .sources file.
+
+    Multi-line (continued) field values are joined with spaces.
+    """
+    fields = {}
+    enabled_values = []
+    field_name = None
+    for line in content.splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        if line[0] in " \t":
+            if field_name is not None:
+                fields[field_name] = f"{fields[field_name]} {line.strip()}"
+            continue
+        name, _, value = line.partition(":")
+        field_name = name.strip().lower()
+        fields[field_name] = value.strip()
+        if line.startswith("Enabled: "):
+            enabled_values.append(line[len("Enabled: ") :].strip())
+
+    source_state = get_source_file_state(enabled_values)
+    return {
+        "source_state": source_state,
+        "state": SOURCE_FILE_STATE_TO_REPOSITORY_STATE[source_state],
+        "suites": fields.get("suites", "").split(),
+        "components": fields.get("components", "").split(),
+        "signed_by": fields.get("signed-by", "").split(),
+    }
+
+
+def scan_sources_list_d() -> Dict[str, Dict]:
+    """
+    Walks the apt sources directory once and describes every extrepo repository in it.
+    """
+    repositories = {}
+    try:
+        entries = list(os.scandir(APT_SOURCES_LIST_D))
+    except OSError:
+        return repositories
+
+    for entry in entries:
+        if not (
+            entry.name.startswith(EXTREPO_FILENAME_PREFIX)
+            and entry.name.endswith(EXTREPO_FILENAME_EXT)
+            and entry.is_file()
+        ):
+            continue
+        try:
+            with open(entry.path) as f:
+                content = f.read()
+        except OSError:
+            continue
+        repositories[compute_repository_name(entry.name)] = dict(
+            parse_source_file(content), path=entry.path
+        )
+    return repositories
+
+
+def run_module():
+    module = AnsibleModule(argument_spec={}, supports_check_mode=True)
+
+    repositories = scan_sources_list_d()
+    module.exit_json(
+        changed=False,
+        ansible_facts=dict(
+            extrepo_repositories=repositories,
+            # BROKEN files are left out, so that they get fixed by extrepo_repository
+            extrepo_enabled_repository_names=sorted(
+                name
+                for name, repository in repositories.items()
+                if repository["source_state"]
+                in ["ENABLED_IMPLICIT", "ENABLED_EXPLICIT"]
+            ),
+            extrepo_disabled_repository_names=sorted(
+                name
+                for name, repository in repositories.items()
+                if repository["state"] == "DISABLED"
+            ),
+        ),
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,23 @@
 #!/usr/bin/python
+import json
 import os
+import tempfile
 from enum import Enum, auto
+from typing import Dict, Iterable, List, Optional
 
 from ansible.module_utils.basic import AnsibleModule
 
+try:
+    import yaml
+
+    try:
+        from yaml import CSafeLoader as YamlLoader
+    except ImportError:
+        from yaml import SafeLoader as YamlLoader
+    HAS_YAML = True
+except ImportError:
+    HAS_YAML = False
+
 __metaclass__ = type
 
 APT_SOURCES_LIST_D = "/etc/apt/sources.list.d/"
@@ -11,6 +25,9 @@ EXTREPO_FILENAME_PREFIX = "extrepo_"
 EXTREPO_FILENAME_EXT = ".sources"
 
 EXTREPO_EXECUTABLE = "extrepo"
+EXTREPO_CONFIG_PATH = "/etc/extrepo/config.yaml"
+EXTREPO_OFFLINE_DATA_PATH = "/usr/share/extrepo/offline-data/"
+EXTREPO_INDEX_CACHE_PATH = "/var/cache/extrepo_repository/index.json"
 
 
 class ExtrepoModuleError(Exception):
@@ -21,6 +38,14 @@ class UnknownRepositoryName(ExtrepoModuleError):
     pass
 
 
+class InvalidRepositoryDefinition(ExtrepoModuleError):
+    pass
+
+
+class ExtrepoCommandError(ExtrepoModuleError):
+    pass
+
+
 class SourceFileState(Enum):
     NOT_PRESENT = auto()
     ENABLED_IMPLICIT = auto()
@@ -46,25 +71,195 @@ def compute_sources_filename(repository_name):
     return f"{EXTREPO_FILENAME_PREFIX}{repository_name}{EXTREPO_FILENAME_EXT}"
 
 
-def is_in_extrepo_metadata(module: AnsibleModule, repository_name: str) -> bool:
+def compute_sources_filepath(repository_name):
+    return os.path.join(APT_SOURCES_LIST_D, compute_sources_filename(repository_name))
+
+
+def parse_extrepo_search_output(out: str) -> Dict[str, Dict]:
     """
-    Searches based on a repository name and expects to find an _exact_ match.
+    Builds a name-keyed index out of `extrepo search` output.
+
+    Every match is printed as a 'Found <repository_name>:' line followed by the
+    repository's YAML definition. The definitions are only described when PyYAML
+    is available, otherwise just the names are indexed.
+    Raises InvalidRepositoryDefinition when a definition is not valid YAML.
+    """
+    index = {}
+    repository_name = None
+    definition_lines = []
+    for line in out.splitlines() + ["Found :"]:
+        if line.startswith("Found ") and line.endswith(":"):
+            if repository_name is not None:
+                index[repository_name] = (
+                    describe_repository(
+                        load_repository_definition(repository_name, definition_lines)
+                    )
+                    if HAS_YAML
+                    else {}
+                )
+            repository_name = line[len("Found ") : -len(":")]
+            definition_lines = []
+        else:
+            definition_lines.append(line)
+    return index
+
+
+def load_repository_definition(
+    repository_name: str, definition_lines: List[str]
+) -> Optional[Dict]:
+    try:
+        definition = yaml.safe_load("\n".join(definition_lines))
+    except yaml.YAMLError as e:
+        raise InvalidRepositoryDefinition(
+            f"Invalid definition for repository {repository_name}: {e}"
+        )
+    if definition is not None and not isinstance(definition, dict):
+        raise InvalidRepositoryDefinition(
+            f"Invalid definition for repository {repository_name}: expected a mapping"
+        )
+    return definition
+
+
+def search_extrepo_index(module: AnsibleModule) -> Dict[str, Dict]:
+    """
+    Indexes all repositories known to extrepo with a single search.
 
     Steps:
-    - Run `extrepo search <repositry_name>`
-    - Search for 'Found' line for the exactrepository name
-      Example: 'Found jellyfin:'
+    - Run `extrepo search .` (the search term is a regex matched against every entry)
+    - Index the repositories from all 'Found <repository_name>:' stanzas
     """
-    cmd = [EXTREPO_EXECUTABLE, "search", repository_name]
+    cmd = [EXTREPO_EXECUTABLE, "search", "."]
     rc, out, err = module.run_command(cmd)
     if rc != 0:
         module.fail_json(
             msg=f"Error attempting to search for repository [command: {' '.join(cmd)}]: ({rc}) {out + err}",
         )
-    repositories_found_stanzas = [
-        line for line in out.splitlines() if line.startswith("Found ")
-    ]
-    return f"Found {repository_name}:" in repositories_found_stanzas
+    try:
+        return parse_extrepo_search_output(out)
+    except InvalidRepositoryDefinition as e:
+        module.fail_json(msg=f"{e} [command: {' '.join(cmd)}]")
+
+
+def describe_repository(definition: Optional[Dict]) -> Dict:
+    """
+    Extracts the suites and policies offered by a repository's extrepo definition.
+    A definition has either a single `policy` or a `policies` mapping of component to policy.
+    """
+    definition = definition or {}
+    source = definition.get("source") or {}
+    if "policies" in definition:
+        policies = sorted(set(definition["policies"].values()))
+    else:
+        policies = [definition.get("policy", "main")]
+    return {
+        "suites": str(source.get("Suites", "")).split(),
+        "policies": policies,
+    }
+
+
+def get_local_metadata_path() -> Optional[str]:
+    """
+    Finds the index.yaml extrepo reads its metadata from, if it is available locally.
+
+    That is the case when extrepo is configured with a file:// url, or when the
+    extrepo-offline-data package is installed.
+    """
+    if not HAS_YAML:
+        return None
+    try:
+        with open(EXTREPO_CONFIG_PATH) as f:
+            config = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return None
+    dist = config.get("dist")
+    version = config.get("version")
+    if not dist or not version:
+        return None
+
+    url = config.get("url", "")
+    if url.startswith("file://"):
+        return os.path.join(url[len("file://") :], dist, version, "index.yaml")
+    offline_metadata_path = os.path.join(
+        EXTREPO_OFFLINE_DATA_PATH, dist, version, "index.yaml"
+    )
+    if os.path.exists(offline_metadata_path):
+        return offline_metadata_path
+    return None
+
+
+def load_local_extrepo_index(check_mode: bool = False) -> Optional[Dict[str, Dict]]:
+    """
+    Loads extrepo's local metadata into a name-keyed index.
+
+    The parsed index is cached on disk and re-used for as long as the
+    metadata file's mtime and size stay the same. In check mode, the cache is only read.
+    """
+    metadata_path = get_local_metadata_path()
+    if metadata_path is None:
+        return None
+    try:
+        metadata_stat = os.stat(metadata_path)
+    except OSError:
+        return None
+    fingerprint = {
+        "metadata_path": metadata_path,
+        "mtime_ns": metadata_stat.st_mtime_ns,
+        "size": metadata_stat.st_size,
+    }
+
+    try:
+        with open(EXTREPO_INDEX_CACHE_PATH) as f:
+            cache = json.load(f)
+        if all(cache.get(key) == value for key, value in fingerprint.items()):
+            return cache["repositories"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    try:
+        with open(metadata_path) as f:
+            metadata = yaml.load(f, Loader=YamlLoader) or {}
+    except (OSError, yaml.YAMLError):
+        return None
+    index = {
+        repository_name: describe_repository(definition)
+        for repository_name, definition in metadata.items()
+    }
+
+    if check_mode:
+        return index
+    # The cache is merely an optimisation, so failing to write it is not an error
+    try:
+        os.makedirs(os.path.dirname(EXTREPO_INDEX_CACHE_PATH), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(EXTREPO_INDEX_CACHE_PATH), delete=False
+        ) as f:
+            json.dump(dict(fingerprint, repositories=index), f)
+        os.replace(f.name, EXTREPO_INDEX_CACHE_PATH)
+    except OSError:
+        pass
+    return index
+
+
+def get_extrepo_index(
+    module: AnsibleModule, repository_names: Iterable[str]
+) -> Dict[str, Dict]:
+    """
+    Returns an index that covers all of the requested repository names (if extrepo knows them).
+
+    The local metadata is preferred. Since it may be missing or out of date,
+    extrepo itself is searched whenever a requested repository is not in it.
+    """
+    index = load_local_extrepo_index(module.check_mode) or {}
+    if any(repository_name not in index for repository_name in repository_names):
+        index = search_extrepo_index(module)
+    return index
+
+
+def is_in_extrepo_metadata(module: AnsibleModule, repository_name: str) -> bool:
+    """
+    Looks up a repository name and expects to find an _exact_ match.
+    """
+    return repository_name in get_extrepo_index(module, [repository_name])
 
 
 def get_source_file_state(source_filepath: str) -> SourceFileState:
@@ -100,6 +295,10 @@ def get_repository_details(module: AnsibleModule, repository_name: str):
             f"Repository {repository_name} is not present in extrepo's metadata"
         )
 
+    return build_repository_details(repository_name)
+
+
+def build_repository_details(repository_name: str):
     source_filepath = compute_sources_filename(repository_name)
     source_file_state = get_source_file_state(source_filepath)
 
@@ -153,42 +352,281 @@ def determine_action(
         return ExtrepoAction.NONE
 
 
-def do_action(
+def parse_sources_stanza(content: str) -> Optional[Dict[str, str]]:
+    """
+    Parses the content of a deb822 .sources file that is expected to hold a single stanza.
+    Field names are case-insensitive, so they are keyed in lower case.
+
+    Returns None when the content is not a single well-formed stanza.
+    """
+    fields = {}
+    field_name = None
+    stanza_ended = False
+    for line in content.splitlines():
+        if line.startswith("#"):
+            continue
+        if not line.strip():
+            stanza_ended = bool(fields)
+            continue
+        if stanza_ended:
+            return None
+        if line[0] in " \t":
+            if field_name is None:
+                return None
+            fields[field_name] = f"{fields[field_name]}\n{line.strip()}"
+            continue
+        name, separator, value = line.partition(":")
+        field_name = name.strip().lower()
+        if not separator or not field_name or field_name in fields:
+            return None
+        fields[field_name] = value.strip()
+    return fields or None
+
+
+def is_valid_sources_stanza(fields: Dict[str, str]) -> bool:
+    """
+    Checks that a stanza can be used by apt as-is. Namely that:
+    - Types, URIs and Suites are set
+    - Components are set, unless the suite is an exact path (ends with '/')
+    - the Signed-By key file exists, when it refers to one
+    """
+    if not all(fields.get(field_name) for field_name in ["types", "uris", "suites"]):
+        return False
+    if not fields["suites"].endswith("/") and not fields.get("components"):
+        return False
+    signed_by = fields.get("signed-by", "")
+    if signed_by.startswith("/") and not os.path.exists(signed_by):
+        return False
+    return True
+
+
+def set_source_file_enabled(
+    module: AnsibleModule, source_filepath: str, enabled: bool
+) -> bool:
+    """
+    Sets the `Enabled:` field of an existing .sources file in-process.
+    The file is written to a temporary file first, which then replaces the original.
+
+    Returns False, without touching the file, if it is not a valid stanza.
+    In that case extrepo should be left to (re-)write the file.
+    """
+    absolute_path = os.path.join(APT_SOURCES_LIST_D, source_filepath)
+    try:
+        with open(absolute_path) as f:
+            content = f.read()
+    except OSError:
+        return False
+    fields = parse_sources_stanza(content)
+    if fields is None or not is_valid_sources_stanza(fields):
+        return False
+
+    enabled_line = f"Enabled: {'yes' if enabled else 'no'}"
+    lines = content.splitlines()
+    for index, line in enumerate(lines):
+        if (
+            not line.startswith(("#", " ", "\t"))
+            and line.partition(":")[0].strip().lower() == "enabled"
+        ):
+            lines[index] = enabled_line
+            break
+    else:
+        while lines and not lines[-1].strip():
+            lines.pop()
+        lines.append(enabled_line)
+
+    fd, temp_path = tempfile.mkstemp(
+        dir=APT_SOURCES_LIST_D, prefix=f".{source_filepath}.", suffix=".tmp"
+    )
+    with os.fdopen(fd, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    module.atomic_move(temp_path, absolute_path)
+    return True
+
+
+def toggle_source_file(
+    module: AnsibleModule,
+    repository_name: str,
+    current_source_state: Optional[SourceFileState],
+    enabled: bool,
+) -> bool:
+    """
+    Takes the fast path of editing an existing, well-formed .sources file instead of calling extrepo.
+    Missing (NOT_PRESENT) and BROKEN files are always left to extrepo.
+    """
+    if current_source_state not in [
+        SourceFileState.ENABLED_IMPLICIT,
+        SourceFileState.ENABLED_EXPLICIT,
+        SourceFileState.DISABLED,
+    ]:
+        return False
+    return set_source_file_enabled(
+        module, compute_sources_filename(repository_name), enabled
+    )
+
+
+def apply_action(
     module: AnsibleModule,
     repository_name: str,
     action: ExtrepoAction,
-) -> None:
+    current_source_state: Optional[SourceFileState] = None,
+) -> Dict:
+    """
+    Performs the action on the repository and describes the outcome.
+    Unlike `do_action`, this does not exit the module: a failing extrepo command
+    raises ExtrepoCommandError.
+    """
     if action == ExtrepoAction.NONE:
-        module.exit_json(
+        return dict(
             changed=False, msg=f"Repository {repository_name} already in desired state"
         )
     elif action == ExtrepoAction.ENABLE_REPO:
-        if not module.check_mode:
+        if not module.check_mode and not toggle_source_file(
+            module, repository_name, current_source_state, enabled=True
+        ):
             cmd = [EXTREPO_EXECUTABLE, "enable", repository_name]
             rc, out, err = module.run_command(cmd)
             if rc != 0:
-                module.fail_json(
-                    msg=f"Error attempting to enable repository {repository_name} [command: {' '.join(cmd)}]: ({rc}) {out + err}"
+                raise ExtrepoCommandError(
+                    f"Error attempting to enable repository {repository_name} [command: {' '.join(cmd)}]: ({rc}) {out + err}"
                 )
-        module.exit_json(
-            changed=True, msg=f"Repository {repository_name} was (re-)enabled"
-        )
+        return dict(changed=True, msg=f"Repository {repository_name} was (re-)enabled")
     elif action == ExtrepoAction.DISABLE_REPO:
-        if not module.check_mode:
+        if not module.check_mode and not toggle_source_file(
+            module, repository_name, current_source_state, enabled=False
+        ):
             cmd = [EXTREPO_EXECUTABLE, "disable", repository_name]
             rc, out, err = module.run_command(cmd)
             if rc != 0:
-                module.fail_json(
-                    msg=f"Error attempting to disable repository {repository_name} [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+                raise ExtrepoCommandError(
+                    f"Error attempting to disable repository {repository_name} [command: {' '.join(cmd)}]: ({rc}) {out + err}"
                 )
-        module.exit_json(changed=True, msg=f"Repository {repository_name} was disabled")
+        return dict(changed=True, msg=f"Repository {repository_name} was disabled")
+    else:
+        raise AssertionError
+
+
+def do_action(
+    module: AnsibleModule,
+    repository_name: str,
+    action: ExtrepoAction,
+    current_source_state: Optional[SourceFileState] = None,
+) -> None:
+    try:
+        result = apply_action(module, repository_name, action, current_source_state)
+    except ExtrepoCommandError as e:
+        module.fail_json(msg=str(e))
+    module.exit_json(
+        **result,
+        changed_source_files=[compute_sources_filepath(repository_name)]
+        if result["changed"]
+        else [],
+    )
+
+
+def parse_state(state_param: str) -> RepositoryState:
+    if state_param == "enabled":
+        return RepositoryState.ENABLED
+    elif state_param == "disabled":
+        return RepositoryState.DISABLED
     else:
         raise AssertionError
 
 
+def normalize_repositories(
+    module: AnsibleModule, repositories: List, default_state: str
+) -> List[Dict]:
+    """
+    Turns the `repositories` parameter into a list of {name, state} dicts.
+
+    Entries may either be plain repository names, which get `default_state`,
+    or dicts with a `name` and an optional `state`.
+    Repeated entries are collapsed, unless they ask for conflicting states.
+    """
+    normalized = {}
+    for entry in repositories:
+        if isinstance(entry, str):
+            entry = dict(name=entry)
+        if not isinstance(entry, dict) or not isinstance(entry.get("name"), str):
+            module.fail_json(
+                msg=f"Invalid repository entry {entry!r}: expected a name or a dict with a 'name' key"
+            )
+        name = entry["name"]
+        state = entry.get("state") or default_state
+        if state not in ["enabled", "disabled"]:
+            module.fail_json(
+                msg=f"Invalid state {state!r} for repository {name}: expected one of enabled, disabled"
+            )
+        if normalized.get(name, state) != state:
+            module.fail_json(
+                msg=f"Repository {name} is requested as both enabled and disabled"
+            )
+        normalized[name] = state
+    return [dict(name=name, state=state) for name, state in normalized.items()]
+
+
+def reconcile_repositories(
+    module: AnsibleModule, repositories: List[Dict]
+) -> List[Dict]:
+    """
+    Brings every repository to its desired state within a single module run.
+
+    extrepo's metadata is only indexed once, and all repositories are validated
+    against it before any of them is changed. When changing a repository fails,
+    the changes already made are reported along with the error,
+    so that the indexes of the repositories changed so far can still be refreshed.
+    """
+    index = get_extrepo_index(
+        module, [repository["name"] for repository in repositories]
+    )
+    unknown_repositories = [
+        repository["name"]
+        for repository in repositories
+        if repository["name"] not in index
+    ]
+    if unknown_repositories:
+        module.fail_json(
+            msg=f"Repositories {', '.join(unknown_repositories)} are not present in extrepo's metadata"
+        )
+
+    results = []
+    for repository in repositories:
+        repository_details = build_repository_details(repository["name"])
+        action = determine_action(
+            desired_state=parse_state(repository["state"]),
+            current_state=repository_details["state"],
+            current_source_state=repository_details["source_state"],
+        )
+        try:
+            result = apply_action(
+                module, repository["name"], action, repository_details["source_state"]
+            )
+        except ExtrepoCommandError as e:
+            changed_repositories = [r["name"] for r in results if r["changed"]]
+            module.fail_json(
+                msg=str(e),
+                changed=bool(changed_repositories),
+                repositories=results,
+                changed_source_files=[
+                    compute_sources_filepath(name) for name in changed_repositories
+                ],
+            )
+        results.append(
+            dict(
+                name=repository["name"],
+                state=repository["state"],
+                action=action.name.lower(),
+                suites=index[repository["name"]].get("suites"),
+                policies=index[repository["name"]].get("policies"),
+                **result,
+            )
+        )
+    return results
+
+
 def run_module():
     module_args = dict(
-        repository_name=dict(type="str", required=True),
+        repository_name=dict(type="str"),
+        repositories=dict(type="list", elements="raw"),
         state=dict(
             type="str",
             default="enabled",
@@ -199,16 +637,35 @@ def run_module():
         ),
     )
 
-    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    module = AnsibleModule(
+        argument_spec=module_args,
+        mutually_exclusive=[("repository_name", "repositories")],
+        required_one_of=[("repository_name", "repositories")],
+        supports_check_mode=True,
+    )
 
-    repository_name = module.params["repository_name"]
     state_param = module.params["state"]
-    if state_param == "enabled":
-        desired_state = RepositoryState.ENABLED
-    elif state_param == "disabled":
-        desired_state = RepositoryState.DISABLED
-    else:
-        raise AssertionError
+    if module.params["repositories"] is not None:
+        repositories = normalize_repositories(
+            module, module.params["repositories"], state_param
+        )
+        results = reconcile_repositories(module, repositories)
+        changed_repositories = [
+            result["name"] for result in results if result["changed"]
+        ]
+        module.exit_json(
+            changed=bool(changed_repositories),
+            msg=f"Changed repositories: {', '.join(changed_repositories)}"
+            if changed_repositories
+            else "All repositories already in desired state",
+            repositories=results,
+            changed_source_files=[
+                compute_sources_filepath(name) for name in changed_repositories
+            ],
+        )
+
+    repository_name = module.params["repository_name"]
+    desired_state = parse_state(state_param)
 
     repository_details = get_repository_details(module, repository_name)
     current_state = repository_details["state"]
@@ -219,7 +676,7 @@ def run_module():
         current_state=current_state,
         current_source_state=current_source_state,
     )
-    do_action(module, repository_name, action)
+    do_action(module, repository_name, action, current_source_state)
 
 
 def main():
@@ -0,0 +1,127 @@
+import json
+from pathlib import Path
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import apt_update_sources
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+@pytest.fixture
+def sources(tmp_path: Path) -> Dict[str, Path]:
+    sources_list_d = tmp_path / "sources.list.d"
+    sources_list_d.mkdir()
+    jellyfin = sources_list_d / "extrepo_jellyfin.sources"
+    jellyfin.write_text("Types: deb\n")
+    yarnpkg = sources_list_d / "extrepo_yarnpkg.sources"
+    yarnpkg.write_text("Types: deb\n")
+    return {"jellyfin": jellyfin, "yarnpkg": yarnpkg}
+
+
+def test_stage_sources(tmp_path: Path, sources: Dict[str, Path]) -> None:
+    sourceparts_path = tmp_path / "sourceparts"
+    sourceparts_path.mkdir()
+
+    staged = apt_update_sources.stage_sources(
+        [
+            str(sources["jellyfin"]),
+            str(sources["jellyfin"]),
+            str(tmp_path / "extrepo_removed.sources"),
+        ],
+        str(sourceparts_path),
+    )
+
+    assert staged == [str(sources["jellyfin"])]
+    assert [path.name for path in sourceparts_path.iterdir()] == [
+        "extrepo_jellyfin.sources"
+    ]
+
+
+def test_build_update_command() -> None:
+    assert apt_update_sources.build_update_command("/tmp/sourceparts", 30) == [
+        "apt-get",
+        "update",
+        "-o",
+        "Dir::Etc::sourcelist=/dev/null",
+        "-o",
+        "Dir::Etc::sourceparts=/tmp/sourceparts",
+        "-o",
+        "APT::Get::List-Cleanup=0",
+        "-o",
+        "DPkg::Lock::Timeout=30",
+    ]
+
+
+def test_run_module__updates_only_the_given_sources(sources: Dict[str, Path]) -> None:
+    set_module_args({"sources": [str(sources["yarnpkg"])]})
+
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(AnsibleModule, "run_command") as mock_run_command:
+        mock_run_command.return_value = 0, "", ""
+        with pytest.raises(AnsibleExitJson) as exc_info:
+            apt_update_sources.run_module()
+
+    result = exc_info.value.args[0]
+    assert result["changed"] is True
+    assert result["sources"] == [str(sources["yarnpkg"])]
+    (cmd,) = mock_run_command.call_args.args
+    assert cmd[:2] == ["apt-get", "update"]
+    assert "Dir::Etc::sourcelist=/dev/null" in cmd
+
+
+def test_run_module__when_no_sources_exist__does_not_run_apt(tmp_path: Path) -> None:
+    set_module_args({"sources": [str(tmp_path / "extrepo_removed.sources")]})
+
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(AnsibleModule, "run_command") as mock_run_command:
+        with pytest.raises(AnsibleExitJson) as exc_info:
+            apt_update_sources.run_module()
+
+    assert exc_info.value.args[0]["changed"] is False
+    assert mock_run_command.call_count == 0
+
+
+def test_run_module__when_apt_fails__returns_an_error(sources: Dict[str, Path]) -> None:
+    set_module_args({"sources": [str(sources["jellyfin"])]})
+
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(AnsibleModule, "run_command") as mock_run_command:
+        mock_run_command.return_value = 100, "", "E: Could not get lock\n"
+        with pytest.raises(AnsibleFailJson) as exc_info:
+            apt_update_sources.run_module()
+
+    assert exc_info.value.args[0]["msg"].endswith("(100) E: Could not get lock\n")
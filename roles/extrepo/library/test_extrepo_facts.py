@@ -0,0 +1,119 @@
+import json
+from pathlib import Path
+from typing import Dict, List
+from unittest.mock import patch
+import pytest
+import extrepo_facts
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+@pytest.fixture
+def sources_list_d(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    monkeypatch.setattr(extrepo_facts, "APT_SOURCES_LIST_D", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    ("enabled_values", "expected"),
+    [
+        ([], "ENABLED_IMPLICIT"),
+        (["yes"], "ENABLED_EXPLICIT"),
+        (["no"], "DISABLED"),
+        (["bogus"], "BROKEN"),
+        (["no", "no"], "BROKEN"),
+    ],
+)
+def test_get_source_file_state(enabled_values: List[str], expected: str) -> None:
+    assert extrepo_facts.get_source_file_state(enabled_values) == expected
+
+
+def test_parse_source_file() -> None:
+    content = """\
+Components: main contrib
+Uris: https://deb.whonix.org
+Architectures: amd64
+  arm64
+Suites: bookworm-proposed-updates
+Types: deb deb-src
+Signed-By: /var/lib/extrepo/keys/whonix_proposed.asc
+Enabled: no
+"""
+    assert extrepo_facts.parse_source_file(content) == {
+        "source_state": "DISABLED",
+        "state": "DISABLED",
+        "suites": ["bookworm-proposed-updates"],
+        "components": ["main", "contrib"],
+        "signed_by": ["/var/lib/extrepo/keys/whonix_proposed.asc"],
+    }
+
+
+def test_scan_sources_list_d(sources_list_d: Path) -> None:
+    (sources_list_d / "extrepo_jellyfin.sources").write_text(
+        "Types: deb\nSuites: bookworm\nComponents: main\n"
+    )
+    (sources_list_d / "extrepo_yarnpkg.sources").write_text(
+        "Types: deb\nSuites: stable\nComponents: main\nEnabled: no\n"
+    )
+    (sources_list_d / "debian.sources").write_text("Types: deb\n")
+    (sources_list_d / "extrepo_vscode.list").write_text("")
+    (sources_list_d / "extrepo_directory.sources").mkdir()
+
+    repositories = extrepo_facts.scan_sources_list_d()
+
+    assert sorted(repositories) == ["jellyfin", "yarnpkg"]
+    assert repositories["jellyfin"]["state"] == "ENABLED"
+    assert repositories["jellyfin"]["path"] == str(
+        sources_list_d / "extrepo_jellyfin.sources"
+    )
+    assert repositories["yarnpkg"]["source_state"] == "DISABLED"
+
+
+def test_scan_sources_list_d__when_directory_does_not_exist__returns_nothing(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(extrepo_facts, "APT_SOURCES_LIST_D", str(tmp_path / "none"))
+
+    assert extrepo_facts.scan_sources_list_d() == {}
+
+
+def test_run_module(sources_list_d: Path) -> None:
+    (sources_list_d / "extrepo_jellyfin.sources").write_text("Types: deb\n")
+    (sources_list_d / "extrepo_i2pd.sources").write_text("Enabled: yes\nEnabled: no\n")
+    (sources_list_d / "extrepo_yarnpkg.sources").write_text("Enabled: no\n")
+    set_module_args({})
+
+    with patch.object(AnsibleModule, "exit_json", mock_exit_json):
+        with pytest.raises(AnsibleExitJson) as exc_info:
+            extrepo_facts.run_module()
+
+    result = exc_info.value.args[0]
+    assert result["changed"] is False
+    assert sorted(result["ansible_facts"]["extrepo_repositories"]) == [
+        "i2pd",
+        "jellyfin",
+        "yarnpkg",
+    ]
+    assert result["ansible_facts"]["extrepo_enabled_repository_names"] == ["jellyfin"]
+    assert result["ansible_facts"]["extrepo_disabled_repository_names"] == ["yarnpkg"]
@@ -39,6 +39,25 @@ def mock_fail_json(*args, **kwargs) -> None:
     raise AnsibleFailJson(kwargs)
 
 
+@pytest.fixture(autouse=True)
+def local_metadata_paths(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keeps the tests away from the host's extrepo configuration and index cache."""
+    monkeypatch.setattr(
+        extrepo_repository, "EXTREPO_CONFIG_PATH", str(tmp_path / "config.yaml")
+    )
+    monkeypatch.setattr(
+        extrepo_repository,
+        "EXTREPO_OFFLINE_DATA_PATH",
+        str(tmp_path / "offline-data"),
+    )
+    monkeypatch.setattr(
+        extrepo_repository,
+        "EXTREPO_INDEX_CACHE_PATH",
+        str(tmp_path / "cache" / "index.json"),
+    )
+    return tmp_path
+
+
 @pytest.fixture
 def module_instance() -> AnsibleModule:
     set_module_args({})
@@ -76,9 +95,7 @@ def test_is_in_extrepo_metadata(
             is expected
         )
 
-    assert mock_run_command.call_args_list == [
-        call(["extrepo", "search", repository_name])
-    ]
+    assert mock_run_command.call_args_list == [call(["extrepo", "search", "."])]
 
 
 def test_is_in_extrepo_metadata__when_extrepo_is_not_installed__returns_an_error(
@@ -93,14 +110,139 @@ def test_is_in_extrepo_metadata__when_extrepo_is_not_installed__returns_an_error
             )
         assert str(exc_info.value) == str(
             {
-                "msg": "Error attempting to search for repository [command: extrepo search a_repository_name]: (127) bash: extrepo: command not found\n",
+                "msg": "Error attempting to search for repository [command: extrepo search .]: (127) bash: extrepo: command not found\n",
                 "failed": True,
             }
         )
 
-    assert mock_run_command.call_args_list == [
-        call(["extrepo", "search", "a_repository_name"])
-    ]
+    assert mock_run_command.call_args_list == [call(["extrepo", "search", "."])]
+
+
+def test_search_extrepo_index(module_instance: AnsibleModule) -> None:
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        mock_run_command.return_value = 0, get_extrepo_search_output(), ""
+
+        index = extrepo_repository.search_extrepo_index(module_instance)
+
+    assert sorted(index) == sorted(get_extrepo_known_repositories())
+    assert index["yarnpkg"] == {"suites": ["stable"], "policies": ["main"]}
+    assert index["whonix_proposed"] == {
+        "suites": ["bookworm-proposed-updates"],
+        "policies": ["contrib", "main", "non-free"],
+    }
+    assert mock_run_command.call_args_list == [call(["extrepo", "search", "."])]
+
+
+def test_search_extrepo_index__when_a_definition_is_not_valid_yaml__returns_an_error(
+    module_instance: AnsibleModule,
+) -> None:
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        mock_run_command.return_value = (
+            0,
+            "Found jellyfin:\n---\nsource: [bookworm\n",
+            "",
+        )
+
+        with pytest.raises(AnsibleFailJson) as exc_info:
+            extrepo_repository.search_extrepo_index(module_instance)
+
+    assert exc_info.value.args[0]["msg"].startswith(
+        "Invalid definition for repository jellyfin: "
+    )
+
+
+def test_load_local_extrepo_index__when_extrepo_uses_a_file_url__indexes_its_metadata(
+    local_metadata_paths: Path,
+) -> None:
+    metadata_path = write_local_metadata(local_metadata_paths)
+
+    index = extrepo_repository.load_local_extrepo_index()
+
+    assert index == {
+        "jellyfin": {"suites": ["bookworm"], "policies": ["main"]},
+        "whonix_proposed": {
+            "suites": ["bookworm-proposed-updates"],
+            "policies": ["contrib", "main", "non-free"],
+        },
+    }
+    cache = json.loads((local_metadata_paths / "cache" / "index.json").read_text())
+    assert cache["metadata_path"] == str(metadata_path)
+    assert cache["repositories"] == index
+
+
+def test_load_local_extrepo_index__in_check_mode__does_not_write_the_cache(
+    local_metadata_paths: Path,
+) -> None:
+    write_local_metadata(local_metadata_paths)
+
+    index = extrepo_repository.load_local_extrepo_index(check_mode=True)
+
+    assert "jellyfin" in index
+    assert not (local_metadata_paths / "cache" / "index.json").exists()
+
+
+def test_load_local_extrepo_index__when_metadata_is_unchanged__uses_the_cache(
+    local_metadata_paths: Path,
+) -> None:
+    write_local_metadata(local_metadata_paths)
+    extrepo_repository.load_local_extrepo_index()
+    cache_path = local_metadata_paths / "cache" / "index.json"
+    cache = json.loads(cache_path.read_text())
+    cache["repositories"] = {"from_cache": {}}
+    cache_path.write_text(json.dumps(cache))
+
+    assert extrepo_repository.load_local_extrepo_index() == {"from_cache": {}}
+
+
+def test_load_local_extrepo_index__when_metadata_changed__invalidates_the_cache(
+    local_metadata_paths: Path,
+) -> None:
+    metadata_path = write_local_metadata(local_metadata_paths)
+    extrepo_repository.load_local_extrepo_index()
+    metadata_path.write_text(
+        metadata_path.read_text().replace("jellyfin:", "jellyfin_renamed:")
+    )
+
+    assert "jellyfin_renamed" in extrepo_repository.load_local_extrepo_index()
+
+
+def test_load_local_extrepo_index__when_extrepo_uses_a_remote_url__returns_none(
+    local_metadata_paths: Path,
+) -> None:
+    (local_metadata_paths / "config.yaml").write_text(
+        "url: https://extrepo-team.pages.debian.net/extrepo-data\n"
+        "dist: debian\n"
+        "version: bookworm\n"
+    )
+
+    assert extrepo_repository.load_local_extrepo_index() is None
+
+
+def test_get_extrepo_index__when_all_names_are_in_local_metadata__does_not_run_commands(
+    module_instance: AnsibleModule,
+    local_metadata_paths: Path,
+) -> None:
+    write_local_metadata(local_metadata_paths)
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        index = extrepo_repository.get_extrepo_index(module_instance, ["jellyfin"])
+
+    assert "jellyfin" in index
+    assert mock_run_command.call_count == 0
+
+
+def test_get_extrepo_index__when_a_name_is_missing_from_local_metadata__searches_extrepo(
+    module_instance: AnsibleModule,
+    local_metadata_paths: Path,
+) -> None:
+    write_local_metadata(local_metadata_paths)
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        mock_run_command.return_value = 0, get_extrepo_search_output(), ""
+        index = extrepo_repository.get_extrepo_index(
+            module_instance, ["jellyfin", "yarnpkg"]
+        )
+
+    assert "yarnpkg" in index
+    assert mock_run_command.call_args_list == [call(["extrepo", "search", "."])]
 
 
 @pytest.mark.parametrize(
@@ -299,6 +441,187 @@ def test_determine_action__when_desired_state_is_disabled(
         assert actual_action == expected_action
 
 
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        (
+            "Types: deb\nUris: https://example.org\nSuites: stable\nComponents: main\n",
+            {
+                "types": "deb",
+                "uris": "https://example.org",
+                "suites": "stable",
+                "components": "main",
+            },
+        ),
+        (
+            "# comment\nTypes: deb\nArchitectures: amd64\n  arm64\n\n",
+            {"types": "deb", "architectures": "amd64\narm64"},
+        ),
+        ("Types: deb\n\nTypes: deb-src\n", None),
+        ("Types: deb\ntypes: deb-src\n", None),
+        ("  continuation without a field\n", None),
+        ("Types deb\n", None),
+        ("", None),
+    ],
+)
+def test_parse_sources_stanza(content: str, expected: Dict) -> None:
+    assert extrepo_repository.parse_sources_stanza(content) == expected
+
+
+@pytest.mark.parametrize(
+    ("fields", "expected"),
+    [
+        ({"types": "deb", "uris": "u", "suites": "stable", "components": "main"}, True),
+        ({"types": "deb", "uris": "u", "suites": "./"}, True),
+        ({"types": "deb", "uris": "u", "suites": "stable"}, False),
+        ({"types": "deb", "suites": "stable", "components": "main"}, False),
+        (
+            {
+                "types": "deb",
+                "uris": "u",
+                "suites": "stable",
+                "components": "main",
+                "signed-by": "/nonexistent/key.asc",
+            },
+            False,
+        ),
+    ],
+)
+def test_is_valid_sources_stanza(fields: Dict, expected: bool) -> None:
+    assert extrepo_repository.is_valid_sources_stanza(fields) is expected
+
+
+@pytest.mark.parametrize(
+    ("state", "enabled", "expected_state"),
+    [
+        (SourceFileState.DISABLED, True, SourceFileState.ENABLED_EXPLICIT),
+        (SourceFileState.ENABLED_IMPLICIT, False, SourceFileState.DISABLED),
+        (SourceFileState.ENABLED_EXPLICIT, False, SourceFileState.DISABLED),
+    ],
+)
+def test_set_source_file_enabled(
+    module_instance: AnsibleModule,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    state: SourceFileState,
+    enabled: bool,
+    expected_state: SourceFileState,
+) -> None:
+    monkeypatch.setattr(extrepo_repository, "APT_SOURCES_LIST_D", str(tmp_path))
+    key_path = tmp_path / "brave_release.asc"
+    key_path.write_text("key")
+    source_filepath = "extrepo_brave_release.sources"
+    source_path = tmp_path / source_filepath
+    source_path.write_text(get_sources_file_content(state, signed_by=str(key_path)))
+
+    assert extrepo_repository.set_source_file_enabled(
+        module_instance, source_filepath, enabled
+    )
+
+    assert extrepo_repository.get_source_file_state(source_filepath) is expected_state
+    assert source_path.read_text() == get_sources_file_content(
+        expected_state, signed_by=str(key_path)
+    )
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "brave_release.asc",
+        source_filepath,
+    ]
+
+
+def test_set_source_file_enabled__when_signing_key_is_missing__leaves_the_file_alone(
+    module_instance: AnsibleModule,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(extrepo_repository, "APT_SOURCES_LIST_D", str(tmp_path))
+    source_filepath = "extrepo_brave_release.sources"
+    content = get_sources_file_content(
+        SourceFileState.DISABLED, signed_by=str(tmp_path / "missing.asc")
+    )
+    (tmp_path / source_filepath).write_text(content)
+
+    assert not extrepo_repository.set_source_file_enabled(
+        module_instance, source_filepath, True
+    )
+    assert (tmp_path / source_filepath).read_text() == content
+
+
+@pytest.mark.parametrize(
+    ("action", "source_state", "expected_state"),
+    [
+        (
+            ExtrepoAction.ENABLE_REPO,
+            SourceFileState.DISABLED,
+            SourceFileState.ENABLED_EXPLICIT,
+        ),
+        (
+            ExtrepoAction.DISABLE_REPO,
+            SourceFileState.ENABLED_IMPLICIT,
+            SourceFileState.DISABLED,
+        ),
+    ],
+)
+def test_apply_action__when_source_file_is_well_formed__edits_it_without_running_extrepo(
+    module_instance: AnsibleModule,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    action: ExtrepoAction,
+    source_state: SourceFileState,
+    expected_state: SourceFileState,
+) -> None:
+    monkeypatch.setattr(extrepo_repository, "APT_SOURCES_LIST_D", str(tmp_path))
+    key_path = tmp_path / "jellyfin.asc"
+    key_path.write_text("key")
+    (tmp_path / "extrepo_jellyfin.sources").write_text(
+        get_sources_file_content(source_state, signed_by=str(key_path))
+    )
+
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        result = extrepo_repository.apply_action(
+            module_instance, "jellyfin", action, source_state
+        )
+
+    assert result["changed"] is True
+    assert mock_run_command.call_count == 0
+    assert (
+        extrepo_repository.get_source_file_state("extrepo_jellyfin.sources")
+        is expected_state
+    )
+
+
+@pytest.mark.parametrize(
+    ("action", "source_state", "expected_action_cmd"),
+    [
+        (ExtrepoAction.ENABLE_REPO, SourceFileState.NOT_PRESENT, "enable"),
+        (ExtrepoAction.ENABLE_REPO, SourceFileState.BROKEN, "enable"),
+        (ExtrepoAction.DISABLE_REPO, SourceFileState.BROKEN, "disable"),
+    ],
+)
+def test_apply_action__when_source_file_is_missing_or_broken__runs_extrepo(
+    module_instance: AnsibleModule,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    action: ExtrepoAction,
+    source_state: SourceFileState,
+    expected_action_cmd: str,
+) -> None:
+    monkeypatch.setattr(extrepo_repository, "APT_SOURCES_LIST_D", str(tmp_path))
+    if source_state != SourceFileState.NOT_PRESENT:
+        (tmp_path / "extrepo_jellyfin.sources").write_text(
+            get_sources_file_content(source_state)
+        )
+
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        mock_run_command.return_value = 0, "", ""
+        extrepo_repository.apply_action(
+            module_instance, "jellyfin", action, source_state
+        )
+
+    assert mock_run_command.call_args_list == [
+        call(["extrepo", expected_action_cmd, "jellyfin"])
+    ]
+
+
 def test_do_action__when_action_is_none__does_nothing(
     module_instance: AnsibleModule,
 ) -> None:
@@ -309,7 +632,11 @@ def test_do_action__when_action_is_none__does_nothing(
             ExtrepoAction.NONE,
         )
     assert str(exc_info.value) == str(
-        {"changed": False, "msg": "Repository jellyfin already in desired state"}
+        {
+            "changed": False,
+            "msg": "Repository jellyfin already in desired state",
+            "changed_source_files": [],
+        }
     )
 
 
@@ -330,7 +657,15 @@ def test_do_action__when_action_requires_changes__and_module_is_in_check_mode__d
         mock_run_command.return_value = 0, "", ""
         with pytest.raises(AnsibleExitJson) as exc_info:
             extrepo_repository.do_action(module_instance, "jellyfin", action)
-        assert str(exc_info.value) == str({"changed": True, "msg": expected_msg})
+        assert str(exc_info.value) == str(
+            {
+                "changed": True,
+                "msg": expected_msg,
+                "changed_source_files": [
+                    "/etc/apt/sources.list.d/extrepo_jellyfin.sources"
+                ],
+            }
+        )
     assert mock_run_command.call_count == 0
 
 
@@ -351,20 +686,231 @@ def test_do_action__when_action_requires_changes__and_module_is_not_in_check_mod
         mock_run_command.return_value = 0, "", ""
         with pytest.raises(AnsibleExitJson) as exc_info:
             extrepo_repository.do_action(module_instance, "jellyfin", action)
-        assert str(exc_info.value) == str({"changed": True, "msg": expected_msg})
+        assert str(exc_info.value) == str(
+            {
+                "changed": True,
+                "msg": expected_msg,
+                "changed_source_files": [
+                    "/etc/apt/sources.list.d/extrepo_jellyfin.sources"
+                ],
+            }
+        )
     assert mock_run_command.call_args_list == [
         call(["extrepo", expected_action_cmd, "jellyfin"])
     ]
 
 
-def get_sources_file_content(state: SourceFileState):
-    content = """\
+def test_normalize_repositories(module_instance: AnsibleModule) -> None:
+    actual = extrepo_repository.normalize_repositories(
+        module_instance,
+        [
+            "jellyfin",
+            {"name": "yarnpkg", "state": "disabled"},
+            {"name": "i2pd"},
+            "jellyfin",
+        ],
+        "enabled",
+    )
+
+    assert actual == [
+        {"name": "jellyfin", "state": "enabled"},
+        {"name": "yarnpkg", "state": "disabled"},
+        {"name": "i2pd", "state": "enabled"},
+    ]
+
+
+@pytest.mark.parametrize(
+    ("repositories", "expected_msg"),
+    [
+        (
+            [{"state": "enabled"}],
+            "Invalid repository entry {'state': 'enabled'}: expected a name or a dict with a 'name' key",
+        ),
+        (
+            [{"name": "jellyfin", "state": "bogus"}],
+            "Invalid state 'bogus' for repository jellyfin: expected one of enabled, disabled",
+        ),
+        (
+            ["jellyfin", {"name": "jellyfin", "state": "disabled"}],
+            "Repository jellyfin is requested as both enabled and disabled",
+        ),
+    ],
+)
+def test_normalize_repositories__when_entries_are_invalid__returns_an_error(
+    module_instance: AnsibleModule,
+    repositories: List,
+    expected_msg: str,
+) -> None:
+    with pytest.raises(AnsibleFailJson) as exc_info:
+        extrepo_repository.normalize_repositories(
+            module_instance, repositories, "enabled"
+        )
+    assert str(exc_info.value) == str({"msg": expected_msg, "failed": True})
+
+
+def test_reconcile_repositories(
+    module_instance: AnsibleModule,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(extrepo_repository, "APT_SOURCES_LIST_D", str(tmp_path))
+    (tmp_path / "extrepo_jellyfin.sources").write_text(
+        get_sources_file_content(SourceFileState.ENABLED_EXPLICIT)
+    )
+    (tmp_path / "extrepo_yarnpkg.sources").write_text(
+        get_sources_file_content(SourceFileState.ENABLED_IMPLICIT)
+    )
+
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        mock_run_command.return_value = 0, get_extrepo_search_output(), ""
+
+        actual = extrepo_repository.reconcile_repositories(
+            module_instance,
+            [
+                {"name": "jellyfin", "state": "enabled"},
+                {"name": "yarnpkg", "state": "disabled"},
+                {"name": "i2pd", "state": "enabled"},
+            ],
+        )
+
+    assert actual == [
+        {
+            "name": "jellyfin",
+            "state": "enabled",
+            "action": "none",
+            "suites": ["bookworm"],
+            "policies": ["main"],
+            "changed": False,
+            "msg": "Repository jellyfin already in desired state",
+        },
+        {
+            "name": "yarnpkg",
+            "state": "disabled",
+            "action": "disable_repo",
+            "suites": ["stable"],
+            "policies": ["main"],
+            "changed": True,
+            "msg": "Repository yarnpkg was disabled",
+        },
+        {
+            "name": "i2pd",
+            "state": "enabled",
+            "action": "enable_repo",
+            "suites": ["bookworm"],
+            "policies": ["main"],
+            "changed": True,
+            "msg": "Repository i2pd was (re-)enabled",
+        },
+    ]
+    assert mock_run_command.call_args_list == [
+        call(["extrepo", "search", "."]),
+        call(["extrepo", "disable", "yarnpkg"]),
+        call(["extrepo", "enable", "i2pd"]),
+    ]
+
+
+def test_reconcile_repositories__when_some_are_not_in_extrepo_metadata__returns_an_error_before_changing_anything(
+    module_instance: AnsibleModule,
+) -> None:
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        mock_run_command.return_value = 0, get_extrepo_search_output(), ""
+
+        with pytest.raises(AnsibleFailJson) as exc_info:
+            extrepo_repository.reconcile_repositories(
+                module_instance,
+                [
+                    {"name": "jellyfin", "state": "enabled"},
+                    {"name": "unknown_repository", "state": "enabled"},
+                ],
+            )
+        assert str(exc_info.value) == str(
+            {
+                "msg": "Repositories unknown_repository are not present in extrepo's metadata",
+                "failed": True,
+            }
+        )
+
+    assert mock_run_command.call_args_list == [call(["extrepo", "search", "."])]
+
+
+def test_reconcile_repositories__when_a_repository_fails__reports_the_changes_made_so_far(
+    module_instance: AnsibleModule,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(extrepo_repository, "APT_SOURCES_LIST_D", str(tmp_path))
+
+    with patch.object(module_instance, "run_command") as mock_run_command:
+        mock_run_command.side_effect = [
+            (0, get_extrepo_search_output(), ""),
+            (0, "", ""),
+            (1, "", "Could not download the key\n"),
+        ]
+
+        with pytest.raises(AnsibleFailJson) as exc_info:
+            extrepo_repository.reconcile_repositories(
+                module_instance,
+                [
+                    {"name": "i2pd", "state": "enabled"},
+                    {"name": "jellyfin", "state": "enabled"},
+                    {"name": "yarnpkg", "state": "enabled"},
+                ],
+            )
+
+    result = exc_info.value.args[0]
+    assert result["msg"] == (
+        "Error attempting to enable repository jellyfin [command: extrepo enable jellyfin]: "
+        "(1) Could not download the key\n"
+    )
+    assert result["changed"] is True
+    assert [r["name"] for r in result["repositories"]] == ["i2pd"]
+    assert result["changed_source_files"] == [str(tmp_path / "extrepo_i2pd.sources")]
+    assert len(mock_run_command.call_args_list) == 3
+
+
+@patch.object(extrepo_repository, "reconcile_repositories", autospec=True)
+def test_run_module__when_repositories_are_given__reconciles_them_in_one_run(
+    mock_reconcile_repositories: MagicMock,
+) -> None:
+    set_module_args(
+        {"repositories": ["jellyfin", {"name": "yarnpkg", "state": "disabled"}]}
+    )
+    mock_reconcile_repositories.return_value = [
+        {"name": "jellyfin", "changed": False},
+        {"name": "yarnpkg", "changed": True},
+    ]
+
+    with patch.multiple(
+        AnsibleModule, fail_json=mock_fail_json, exit_json=mock_exit_json
+    ):
+        with pytest.raises(AnsibleExitJson) as exc_info:
+            extrepo_repository.run_module()
+
+    assert str(exc_info.value) == str(
+        {
+            "changed": True,
+            "msg": "Changed repositories: yarnpkg",
+            "repositories": mock_reconcile_repositories.return_value,
+            "changed_source_files": ["/etc/apt/sources.list.d/extrepo_yarnpkg.sources"],
+        }
+    )
+    assert mock_reconcile_repositories.call_args.args[1] == [
+        {"name": "jellyfin", "state": "enabled"},
+        {"name": "yarnpkg", "state": "disabled"},
+    ]
+
+
+def get_sources_file_content(
+    state: SourceFileState,
+    signed_by: str = "/var/lib/extrepo/keys/brave_release.asc",
+):
+    content = f"""\
 Components: main
 Uris: https://brave-browser-apt-release.s3.brave.com
 Architectures: amd64
 Suites: stable
 Types: deb
-Signed-By: /var/lib/extrepo/keys/brave_release.asc
+Signed-By: {signed_by}
 """
     if state == SourceFileState.ENABLED_IMPLICIT:
         state_value = None
@@ -381,6 +927,45 @@ Signed-By: /var/lib/extrepo/keys/brave_release.asc
     return content
 
 
+def write_local_metadata(base_path: Path) -> Path:
+    """Configures extrepo with a file:// url and writes a small index.yaml there."""
+    (base_path / "config.yaml").write_text(
+        f"url: file://{base_path / 'extrepo-data'}\n"
+        "dist: debian\n"
+        "version: bookworm\n"
+        "enabled_policies:\n"
+        "- main\n"
+    )
+    metadata_path = base_path / "extrepo-data" / "debian" / "bookworm" / "index.yaml"
+    metadata_path.parent.mkdir(parents=True)
+    metadata_path.write_text(
+        """\
+jellyfin:
+  description: Jellyfin Free Software Media System APT repository
+  gpg-key-file: jellyfin.asc
+  policy: main
+  source:
+    Components: main
+    Suites: bookworm
+    Types: deb
+    URIs: https://repo.jellyfin.org/debian
+whonix_proposed:
+  description: Whonix APT Repository
+  gpg-key-file: whonix_proposed.asc
+  policies:
+    contrib: contrib
+    main: main
+    non-free: non-free
+  source:
+    Components: <COMPONENTS>
+    Suites: bookworm-proposed-updates
+    Types: deb deb-src
+    URIs: https://deb.whonix.org
+"""
+    )
+    return metadata_path
+
+
 def get_extrepo_known_repositories() -> List[str]:
     return [
         "torproject",
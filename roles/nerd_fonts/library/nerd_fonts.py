@@ -0,0 +1,254 @@
+#!/usr/bin/python
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.urls import open_url
+
+__metaclass__ = type
+
+# Written into every font's directory to record which archive it was installed from
+STATE_FILENAME = ".nerd_fonts.json"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+class HashingReader:
+    """
+    Wraps a stream and hashes everything that is read through it.
+    """
+
+    def __init__(self, stream: BinaryIO, algorithm: str):
+        self._stream = stream
+        self.hash = hashlib.new(algorithm)
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self.hash.update(data)
+        return data
+
+    def drain(self) -> None:
+        while self.read(DOWNLOAD_CHUNK_SIZE):
+            pass
+
+
+def parse_checksum(checksum: str):
+    """
+    Example: 'sha256:76c1...' -> ('sha256', '76c1...')
+    """
+    algorithm, _, digest = checksum.partition(":")
+    return algorithm, digest.lower()
+
+
+def compute_archive_url(
+    release_url: str, font: Dict, bundle_files_url: Optional[str] = None
+) -> str:
+    """
+    Offline bundles store archives under their digest, see filter_plugins/bundle.py
+    """
+    if bundle_files_url:
+        return f"{bundle_files_url.rstrip('/')}/{parse_checksum(font['hash'])[1]}"
+    return f"{release_url.rstrip('/')}/{font['name']}.tar.xz"
+
+
+def read_font_state(font_path: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(font_path, STATE_FILENAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_font_up_to_date(fonts_path: str, font: Dict) -> bool:
+    """
+    A font only needs to be (re-)installed when its archive changed,
+    so a release bump leaves fonts with identical archives alone.
+    """
+    state = read_font_state(os.path.join(fonts_path, font["name"]))
+    return state is not None and state.get("hash") == font["hash"]
+
+
+def is_legacy_install(font_path: str) -> bool:
+    """
+    Fonts used to be extracted loose into the fonts directory, next to an empty directory named after the font.
+    Such a directory has no state file.
+    """
+    return os.path.isdir(font_path) and read_font_state(font_path) is None
+
+
+def remove_legacy_files(fonts_path: str, staging_path: str, name: str) -> None:
+    """
+    Removes the loose files of a legacy install, so that the font isn't installed twice:
+    the files the archive lists, and the font's files of other releases (e.g. 'FiraCodeNerdFont-Regular.ttf').
+    """
+    paths = set(glob.glob(os.path.join(glob.escape(fonts_path), f"{name}NerdFont*")))
+    for directory, _, filenames in os.walk(staging_path):
+        paths.update(
+            os.path.join(fonts_path, os.path.relpath(directory, staging_path), filename)
+            for filename in filenames
+        )
+    for path in paths:
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+def extract_members(archive: tarfile.TarFile, dest: str) -> None:
+    """
+    Extracts the regular files and directories of a streamed archive,
+    refusing any member that would end up outside of `dest`.
+    """
+    dest = os.path.realpath(dest)
+    for member in archive:
+        target = os.path.realpath(os.path.join(dest, member.name))
+        if os.path.commonpath([dest, target]) != dest:
+            raise tarfile.TarError(
+                f"Refusing to extract {member.name} outside of {dest}"
+            )
+        if member.isdir():
+            os.makedirs(target, exist_ok=True)
+        elif member.isfile():
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                shutil.copyfileobj(archive.extractfile(member), f)
+            os.chmod(target, 0o644)
+
+
+def install_font(
+    fonts_path: str,
+    font: Dict,
+    release: str,
+    release_url: str,
+    bundle_files_url: Optional[str] = None,
+) -> None:
+    """
+    Streams a font's archive, decompressing it while verifying its checksum.
+
+    The archive is extracted into a staging directory next to the font's directory,
+    which only replaces the font once the checksum matched. No archive is kept on disk.
+    """
+    algorithm, expected_digest = parse_checksum(font["hash"])
+    font_path = os.path.join(fonts_path, font["name"])
+    legacy = is_legacy_install(font_path)
+    staging_path = tempfile.mkdtemp(dir=fonts_path, prefix=f".{font['name']}.")
+    try:
+        response = open_url(
+            compute_archive_url(release_url, font, bundle_files_url), timeout=60
+        )
+        reader = HashingReader(response, algorithm)
+        with tarfile.open(fileobj=reader, mode="r|xz") as archive:
+            extract_members(archive, staging_path)
+        reader.drain()
+        if reader.hash.hexdigest() != expected_digest:
+            raise ChecksumMismatch(
+                f"Checksum mismatch for {font['name']}: expected {expected_digest}, got {reader.hash.hexdigest()}"
+            )
+        if legacy:
+            remove_legacy_files(fonts_path, staging_path, font["name"])
+
+        with open(os.path.join(staging_path, STATE_FILENAME), "w") as f:
+            json.dump(dict(release=release, hash=font["hash"]), f)
+        os.chmod(staging_path, 0o775)
+        if os.path.exists(font_path):
+            shutil.rmtree(font_path)
+        os.rename(staging_path, font_path)
+    finally:
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+
+def install_fonts(
+    fonts_path: str,
+    fonts: List[Dict],
+    release: str,
+    release_url: str,
+    max_workers: int,
+    bundle_files_url: Optional[str] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Installs the fonts concurrently. Returns the error of each font, if any.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            font["name"]: executor.submit(
+                install_font, fonts_path, font, release, release_url, bundle_files_url
+            )
+            for font in fonts
+        }
+    errors = {}
+    for name, future in futures.items():
+        exception = future.exception()
+        errors[name] = None if exception is None else str(exception)
+    return errors
+
+
+def run_module():
+    module_args = dict(
+        fonts=dict(
+            type="list",
+            elements="dict",
+            required=True,
+            options=dict(
+                name=dict(type="str", required=True),
+                hash=dict(type="str", required=True),
+            ),
+        ),
+        path=dict(type="path", required=True),
+        release=dict(type="str", required=True),
+        release_url=dict(type="str", required=True),
+        max_workers=dict(type="int", default=4),
+        bundle_files_url=dict(type="str"),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    fonts_path = module.params["path"]
+    fonts = module.params["fonts"]
+    outdated = [font for font in fonts if not is_font_up_to_date(fonts_path, font)]
+
+    if outdated and not module.check_mode:
+        os.makedirs(fonts_path, mode=0o775, exist_ok=True)
+        errors = install_fonts(
+            fonts_path,
+            outdated,
+            module.params["release"],
+            module.params["release_url"],
+            module.params["max_workers"],
+            module.params["bundle_files_url"],
+        )
+        failed = {name: error for name, error in errors.items() if error is not None}
+
+        # Even if some fonts failed, the ones that got installed need to be picked up
+        fc_cache = module.get_bin_path("fc-cache")
+        if fc_cache and len(failed) < len(outdated):
+            module.run_command([fc_cache, "-f", fonts_path], check_rc=False)
+        if failed:
+            module.fail_json(
+                msg=f"Error attempting to install fonts: {', '.join(f'{name} ({error})' for name, error in failed.items())}",
+            )
+
+    outdated_names = [font["name"] for font in outdated]
+    module.exit_json(
+        changed=bool(outdated),
+        installed=outdated_names,
+        results=[
+            dict(name=font["name"], changed=font["name"] in outdated_names)
+            for font in fonts
+        ],
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import hashlib
+import io
+import json
+import tarfile
+from pathlib import Path
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import nerd_fonts
+
+
+__metaclass__ = type
+
+RELEASE_URL = "https://github.com/ryanoasis/nerd-fonts/releases/download/v3.0.2"
+
+
+def build_archive(files: Dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:xz") as archive:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def compute_hash(content: bytes) -> str:
+    return f"sha256:{hashlib.sha256(content).hexdigest()}"
+
+
+@pytest.fixture
+def archive() -> bytes:
+    return build_archive(
+        {
+            "FiraCodeNerdFont-Regular.ttf": b"regular",
+            "FiraCodeNerdFont-Bold.ttf": b"bold",
+        }
+    )
+
+
+def serve(archives: Dict[str, bytes]):
+    def mock_open_url(url, **kwargs):
+        return io.BytesIO(archives[url])
+
+    return patch.object(nerd_fonts, "open_url", side_effect=mock_open_url)
+
+
+def test_install_font(tmp_path: Path, archive: bytes) -> None:
+    font = {"name": "FiraCode", "hash": compute_hash(archive)}
+
+    with serve({f"{RELEASE_URL}/FiraCode.tar.xz": archive}):
+        nerd_fonts.install_font(str(tmp_path), font, "v3.0.2", RELEASE_URL)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["FiraCode"]
+    assert (tmp_path / "FiraCode" / "FiraCodeNerdFont-Bold.ttf").read_bytes() == b"bold"
+    assert json.loads((tmp_path / "FiraCode" / ".nerd_fonts.json").read_text()) == {
+        "release": "v3.0.2",
+        "hash": font["hash"],
+    }
+    assert nerd_fonts.is_font_up_to_date(str(tmp_path), font)
+
+
+def test_install_font__when_checksum_does_not_match__leaves_the_installed_font_alone(
+    tmp_path: Path, archive: bytes
+) -> None:
+    (tmp_path / "FiraCode").mkdir()
+    (tmp_path / "FiraCode" / "FiraCodeNerdFont-Old.ttf").write_bytes(b"old")
+    font = {"name": "FiraCode", "hash": compute_hash(b"something else")}
+
+    with serve({f"{RELEASE_URL}/FiraCode.tar.xz": archive}):
+        with pytest.raises(nerd_fonts.ChecksumMismatch):
+            nerd_fonts.install_font(str(tmp_path), font, "v3.0.2", RELEASE_URL)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["FiraCode"]
+    assert [path.name for path in (tmp_path / "FiraCode").iterdir()] == [
+        "FiraCodeNerdFont-Old.ttf"
+    ]
+
+
+def test_install_font__when_installed_loose_by_earlier_versions__removes_the_loose_files(
+    tmp_path: Path, archive: bytes
+) -> None:
+    (tmp_path / "FiraCode").mkdir()
+    (tmp_path / "FiraCodeNerdFont-Regular.ttf").write_bytes(b"regular")
+    (tmp_path / "FiraCodeNerdFontMono-Regular.ttf").write_bytes(b"mono")
+    (tmp_path / "JetBrainsMonoNerdFont-Regular.ttf").write_bytes(b"other font")
+    font = {"name": "FiraCode", "hash": compute_hash(archive)}
+
+    with serve({f"{RELEASE_URL}/FiraCode.tar.xz": archive}):
+        nerd_fonts.install_font(str(tmp_path), font, "v3.0.2", RELEASE_URL)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "FiraCode",
+        "JetBrainsMonoNerdFont-Regular.ttf",
+    ]
+    assert sorted(path.name for path in (tmp_path / "FiraCode").iterdir()) == [
+        ".nerd_fonts.json",
+        "FiraCodeNerdFont-Bold.ttf",
+        "FiraCodeNerdFont-Regular.ttf",
+    ]
+
+
+def test_install_font__when_a_member_escapes_the_font_directory__refuses_it(
+    tmp_path: Path,
+) -> None:
+    archive = build_archive({"../escaped.ttf": b"bad"})
+    font = {"name": "FiraCode", "hash": compute_hash(archive)}
+
+    with serve({f"{RELEASE_URL}/FiraCode.tar.xz": archive}):
+        with pytest.raises(tarfile.TarError):
+            nerd_fonts.install_font(str(tmp_path), font, "v3.0.2", RELEASE_URL)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_is_font_up_to_date__when_only_the_release_changed__is_true(
+    tmp_path: Path,
+) -> None:
+    (tmp_path / "FiraCode").mkdir()
+    (tmp_path / "FiraCode" / ".nerd_fonts.json").write_text(
+        json.dumps({"release": "v3.0.1", "hash": "sha256:abc"})
+    )
+
+    assert nerd_fonts.is_font_up_to_date(
+        str(tmp_path), {"name": "FiraCode", "hash": "sha256:abc"}
+    )
+    assert not nerd_fonts.is_font_up_to_date(
+        str(tmp_path), {"name": "FiraCode", "hash": "sha256:def"}
+    )
+    assert not nerd_fonts.is_font_up_to_date(
+        str(tmp_path), {"name": "JetBrainsMono", "hash": "sha256:abc"}
+    )
+
+
+def test_install_fonts__installs_concurrently_and_reports_errors(
+    tmp_path: Path, archive: bytes
+) -> None:
+    fonts = [
+        {"name": "FiraCode", "hash": compute_hash(archive)},
+        {"name": "JetBrainsMono", "hash": compute_hash(b"something else")},
+    ]
+
+    with serve(
+        {
+            f"{RELEASE_URL}/FiraCode.tar.xz": archive,
+            f"{RELEASE_URL}/JetBrainsMono.tar.xz": archive,
+        }
+    ):
+        errors = nerd_fonts.install_fonts(
+            str(tmp_path), fonts, "v3.0.2", RELEASE_URL, max_workers=2
+        )
+
+    assert errors["FiraCode"] is None
+    assert errors["JetBrainsMono"].startswith("Checksum mismatch for JetBrainsMono")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["FiraCode"]
+
+
+def test_install_font__when_provisioning_from_a_bundle__reads_the_bundled_archive(
+    tmp_path: Path, archive: bytes
+) -> None:
+    font = {"name": "FiraCode", "hash": compute_hash(archive)}
+    digest = font["hash"].partition(":")[2]
+
+    with serve({f"file:///srv/bundle/files/{digest}": archive}):
+        nerd_fonts.install_font(
+            str(tmp_path), font, "v3.0.2", RELEASE_URL, "file:///srv/bundle/files"
+        )
+
+    assert (tmp_path / "FiraCode" / "FiraCodeNerdFont-Bold.ttf").read_bytes() == b"bold"
@@ -0,0 +1,320 @@
+#!/usr/bin/python
+import hashlib
+import os
+import platform
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.urls import open_url
+
+__metaclass__ = type
+
+TAR_EXECUTABLE = "tar"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# platform.machine() -> the architecture in Node's tarball names
+NODE_ARCHS = {
+    "x86_64": "x64",
+    "aarch64": "arm64",
+    "armv7l": "armv7l",
+    "ppc64le": "ppc64le",
+    "s390x": "s390x",
+}
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+def normalize_version(version: str) -> str:
+    """
+    Example: '20.11.0' -> 'v20.11.0'
+    """
+    return version if version.startswith("v") else f"v{version}"
+
+
+def compute_tarball_name(version: str, arch: str) -> str:
+    return f"node-{version}-linux-{arch}.tar.xz"
+
+
+def get_installed_versions(nvm_path: str) -> List[str]:
+    """
+    Reads the versions nvm knows about straight from its directory, without sourcing nvm.sh.
+    """
+    try:
+        return sorted(
+            entry.name
+            for entry in os.scandir(os.path.join(nvm_path, "versions", "node"))
+            if entry.name.startswith("v") and entry.is_dir()
+        )
+    except OSError:
+        return []
+
+
+def parse_shasums(content: str) -> Dict[str, str]:
+    """
+    Example: '9556...  node-v20.11.0-linux-x64.tar.xz' -> {'node-v20.11.0-linux-x64.tar.xz': '9556...'}
+    """
+    shasums = {}
+    for line in content.splitlines():
+        digest, _, filename = line.strip().partition("  ")
+        if digest and filename:
+            shasums[filename] = digest.lower()
+    return shasums
+
+
+def compute_download_url(
+    url: str,
+    bundle_files_url: Optional[str] = None,
+    bundle_checksums: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    Bundles store artifacts under their digest, see filter_plugins/bundle.py
+    Example: 'https://nodejs.org/dist/v20.11.0/SHASUMS256.txt' -> 'file:///srv/bundle/files/a4f1...'
+    """
+    checksum = (bundle_checksums or {}).get(url)
+    if bundle_files_url and checksum:
+        return f"{bundle_files_url.rstrip('/')}/{checksum.partition(':')[2].lower()}"
+    return url
+
+
+def get_shasums(
+    cache_path: str,
+    mirror_url: str,
+    version: str,
+    bundle_files_url: Optional[str] = None,
+    bundle_checksums: Optional[Dict[str, str]] = None,
+) -> Dict[str, str]:
+    """
+    Every release's SHASUMS256.txt is kept in the cache,
+    so that cached tarballs can be found and verified without network access.
+    """
+    shasums_path = os.path.join(cache_path, "shasums", f"{version}.txt")
+    try:
+        with open(shasums_path) as f:
+            return parse_shasums(f.read())
+    except OSError:
+        pass
+    url = compute_download_url(
+        f"{mirror_url.rstrip('/')}/{version}/SHASUMS256.txt",
+        bundle_files_url,
+        bundle_checksums,
+    )
+    content = open_url(url, timeout=60).read().decode()
+    os.makedirs(os.path.dirname(shasums_path), exist_ok=True)
+    with open(shasums_path, "w") as f:
+        f.write(content)
+    return parse_shasums(content)
+
+
+def compute_cached_tarball_path(cache_path: str, digest: str) -> str:
+    return os.path.join(cache_path, "sha256", digest)
+
+
+def download_tarball(cache_path: str, url: str, digest: str) -> str:
+    """
+    Downloads a tarball into the content-addressed cache, verifying its checksum on the way.
+    """
+    tarball_path = compute_cached_tarball_path(cache_path, digest)
+    os.makedirs(os.path.dirname(tarball_path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(tarball_path), prefix=".")
+    try:
+        tarball_digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as f:
+            response = open_url(url, timeout=60)
+            for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK_SIZE), b""):
+                tarball_digest.update(chunk)
+                f.write(chunk)
+        if tarball_digest.hexdigest() != digest:
+            raise ChecksumMismatch(
+                f"Checksum mismatch for {url}: expected {digest}, got {tarball_digest.hexdigest()}"
+            )
+        os.replace(temp_path, tarball_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return tarball_path
+
+
+def install_version(
+    module: AnsibleModule,
+    nvm_path: str,
+    cache_path: str,
+    mirror_url: str,
+    version: str,
+    arch: str,
+    bundle_files_url: Optional[str] = None,
+    bundle_checksums: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    Unpacks a release's official tarball into nvm's directory, the same way `nvm install` would.
+    Returns how the tarball was obtained: 'cached' or 'downloaded'.
+    """
+    tarball_name = compute_tarball_name(version, arch)
+    digest = get_shasums(
+        cache_path, mirror_url, version, bundle_files_url, bundle_checksums
+    ).get(tarball_name)
+    if digest is None:
+        raise ChecksumMismatch(f"{tarball_name} is not listed in SHASUMS256.txt")
+    tarball_path = compute_cached_tarball_path(cache_path, digest)
+    outcome = "cached" if os.path.isfile(tarball_path) else "downloaded"
+    if outcome == "downloaded":
+        download_tarball(
+            cache_path,
+            compute_download_url(
+                f"{mirror_url.rstrip('/')}/{version}/{tarball_name}",
+                bundle_files_url,
+                bundle_checksums,
+            ),
+            digest,
+        )
+
+    versions_path = os.path.join(nvm_path, "versions", "node")
+    os.makedirs(versions_path, exist_ok=True)
+    staging_path = tempfile.mkdtemp(dir=versions_path, prefix=f".{version}.")
+    try:
+        cmd = [
+            TAR_EXECUTABLE,
+            "-xJf",
+            tarball_path,
+            "--strip-components=1",
+            "-C",
+            staging_path,
+        ]
+        rc, out, err = module.run_command(cmd)
+        if rc != 0:
+            raise RuntimeError(
+                f"Error attempting to unpack Node {version} [command: {' '.join(cmd)}]: ({rc}) {out + err}"
+            )
+        os.chmod(staging_path, 0o755)
+        os.rename(staging_path, os.path.join(versions_path, version))
+    finally:
+        shutil.rmtree(staging_path, ignore_errors=True)
+    return outcome
+
+
+def install_versions(
+    module: AnsibleModule,
+    nvm_path: str,
+    cache_path: str,
+    mirror_url: str,
+    missing: List[str],
+    arch: str,
+    max_workers: int,
+    bundle_files_url: Optional[str] = None,
+    bundle_checksums: Optional[Dict[str, str]] = None,
+) -> Dict[str, str]:
+    """
+    Installs the versions concurrently. Returns how each version's tarball was obtained,
+    or the error that prevented installing it.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            version: executor.submit(
+                install_version,
+                module,
+                nvm_path,
+                cache_path,
+                mirror_url,
+                version,
+                arch,
+                bundle_files_url,
+                bundle_checksums,
+            )
+            for version in missing
+        }
+    outcomes = {}
+    for version, future in futures.items():
+        exception = future.exception()
+        outcomes[version] = (
+            future.result() if exception is None else f"failed: {exception}"
+        )
+    return outcomes
+
+
+def set_default_alias(nvm_path: str, version: Optional[str]) -> bool:
+    """
+    Writes nvm's `default` alias the way `nvm alias default` does.
+    Returns whether it changed.
+    """
+    if not version:
+        return False
+    alias_path = os.path.join(nvm_path, "alias", "default")
+    try:
+        with open(alias_path) as f:
+            if f.read().strip() == version:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(alias_path), exist_ok=True)
+    with open(alias_path, "w") as f:
+        f.write(f"{version}\n")
+    return True
+
+
+def run_module():
+    module_args = dict(
+        versions=dict(type="list", elements="str", required=True),
+        nvm_path=dict(type="path", required=True),
+        cache_path=dict(type="path", required=True),
+        mirror_url=dict(type="str", default="https://nodejs.org/dist"),
+        default_version=dict(type="str"),
+        max_concurrent_downloads=dict(type="int", default=4),
+        bundle_files_url=dict(type="str"),
+        bundle_checksums=dict(type="dict"),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    nvm_path = module.params["nvm_path"]
+    versions = [normalize_version(version) for version in module.params["versions"]]
+    default_version = module.params["default_version"]
+    if default_version:
+        default_version = normalize_version(default_version)
+    installed_versions = get_installed_versions(nvm_path)
+    missing = [version for version in versions if version not in installed_versions]
+
+    arch = NODE_ARCHS.get(platform.machine())
+    if missing and arch is None:
+        module.fail_json(msg=f"Node has no official builds for {platform.machine()}")
+
+    outcomes = {}
+    default_changed = False
+    if not module.check_mode:
+        if missing:
+            outcomes = install_versions(
+                module,
+                nvm_path,
+                module.params["cache_path"],
+                module.params["mirror_url"],
+                missing,
+                arch,
+                module.params["max_concurrent_downloads"],
+                module.params["bundle_files_url"],
+                module.params["bundle_checksums"],
+            )
+            failed = {v: o for v, o in outcomes.items() if o.startswith("failed")}
+            if failed:
+                module.fail_json(
+                    msg=f"Error attempting to install Node versions: {', '.join(f'{v} ({o})' for v, o in failed.items())}",
+                    outcomes=outcomes,
+                )
+        default_changed = set_default_alias(nvm_path, default_version)
+
+    module.exit_json(
+        changed=bool(missing) or default_changed,
+        installed=missing,
+        outcomes=outcomes,
+        versions=sorted(set(installed_versions + missing)),
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
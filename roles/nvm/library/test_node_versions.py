@@ -0,0 +1,210 @@
+import hashlib
+import io
+import json
+import subprocess
+import tarfile
+from pathlib import Path
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import node_versions
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+def build_node_tarball(version: str) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:xz") as tar:
+        content = b"#!/bin/sh\n"
+        info = tarfile.TarInfo(f"node-{version}-linux-x64/bin/node")
+        info.size = len(content)
+        info.mode = 0o755
+        tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def mirror(monkeypatch: pytest.MonkeyPatch) -> Dict[str, bytes]:
+    """Serves v20.11.0's tarball and SHASUMS256.txt, recording every requested URL."""
+    tarball = build_node_tarball("v20.11.0")
+    files = {
+        "https://nodejs.org/dist/v20.11.0/node-v20.11.0-linux-x64.tar.xz": tarball,
+        "https://nodejs.org/dist/v20.11.0/SHASUMS256.txt": (
+            f"{'0' * 64}  node-v20.11.0-linux-arm64.tar.xz\n"
+            f"{hashlib.sha256(tarball).hexdigest()}  node-v20.11.0-linux-x64.tar.xz\n"
+        ).encode(),
+    }
+    requested = []
+
+    def mock_open_url(url, **kwargs):
+        requested.append(url)
+        return io.BytesIO(files[url])
+
+    monkeypatch.setattr(node_versions, "open_url", mock_open_url)
+    monkeypatch.setattr(node_versions.platform, "machine", lambda: "x86_64")
+    files["requested"] = requested
+    return files
+
+
+def run_tar(cmd, **kwargs):
+    completed = subprocess.run(cmd, capture_output=True, text=True)
+    return completed.returncode, completed.stdout, completed.stderr
+
+
+def run_module(args: Dict):
+    set_module_args(args)
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(
+        AnsibleModule, "run_command", side_effect=run_tar
+    ) as mock_run_command:
+        with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as exc_info:
+            node_versions.run_module()
+    return exc_info.value.args[0], mock_run_command
+
+
+def test_parse_shasums__maps_filenames_to_digests() -> None:
+    assert node_versions.parse_shasums(
+        "ABC  node-v20.11.0-linux-x64.tar.xz\n\ndef  node-v20.11.0.tar.gz\n"
+    ) == {"node-v20.11.0-linux-x64.tar.xz": "abc", "node-v20.11.0.tar.gz": "def"}
+
+
+def test_run_module__when_versions_are_installed__does_no_io(
+    tmp_path: Path, mirror: Dict
+) -> None:
+    (tmp_path / "nvm" / "versions" / "node" / "v20.11.0").mkdir(parents=True)
+
+    result, mock_run_command = run_module(
+        dict(
+            versions=["20.11.0"],
+            nvm_path=str(tmp_path / "nvm"),
+            cache_path=str(tmp_path / "cache"),
+        )
+    )
+
+    assert result["changed"] is False
+    assert result["versions"] == ["v20.11.0"]
+    assert mirror["requested"] == []
+    mock_run_command.assert_not_called()
+
+
+def test_run_module__when_version_is_missing__downloads_verifies_and_unpacks(
+    tmp_path: Path, mirror: Dict
+) -> None:
+    result, _ = run_module(
+        dict(
+            versions=["20.11.0"],
+            nvm_path=str(tmp_path / "nvm"),
+            cache_path=str(tmp_path / "cache"),
+            default_version="20.11.0",
+        )
+    )
+
+    assert result["changed"] is True
+    assert result["outcomes"] == {"v20.11.0": "downloaded"}
+    assert (
+        tmp_path / "nvm" / "versions" / "node" / "v20.11.0" / "bin" / "node"
+    ).is_file()
+    assert (tmp_path / "nvm" / "alias" / "default").read_text() == "v20.11.0\n"
+    digest = hashlib.sha256(
+        mirror["https://nodejs.org/dist/v20.11.0/node-v20.11.0-linux-x64.tar.xz"]
+    ).hexdigest()
+    assert (tmp_path / "cache" / "sha256" / digest).is_file()
+
+
+def test_run_module__when_tarball_is_cached__does_not_download(
+    tmp_path: Path, mirror: Dict
+) -> None:
+    args = dict(
+        versions=["v20.11.0"],
+        nvm_path=str(tmp_path / "nvm"),
+        cache_path=str(tmp_path / "cache"),
+    )
+    run_module(args)
+    (tmp_path / "nvm").rename(tmp_path / "old-nvm")
+    mirror["requested"].clear()
+
+    result, _ = run_module(args)
+
+    assert result["outcomes"] == {"v20.11.0": "cached"}
+    assert mirror["requested"] == []
+
+
+def test_run_module__when_checksum_does_not_match__fails_without_installing(
+    tmp_path: Path, mirror: Dict
+) -> None:
+    mirror["https://nodejs.org/dist/v20.11.0/node-v20.11.0-linux-x64.tar.xz"] = b"evil"
+
+    result, _ = run_module(
+        dict(
+            versions=["20.11.0"],
+            nvm_path=str(tmp_path / "nvm"),
+            cache_path=str(tmp_path / "cache"),
+        )
+    )
+
+    assert result["failed"] is True
+    assert "Checksum mismatch" in result["outcomes"]["v20.11.0"]
+    assert not (tmp_path / "nvm" / "versions" / "node" / "v20.11.0").exists()
+    assert not list((tmp_path / "cache" / "sha256").iterdir())
+
+
+def test_run_module__when_provisioning_from_a_bundle__reads_the_bundled_files(
+    tmp_path: Path, mirror: Dict
+) -> None:
+    shasums_url = "https://nodejs.org/dist/v20.11.0/SHASUMS256.txt"
+    tarball_url = "https://nodejs.org/dist/v20.11.0/node-v20.11.0-linux-x64.tar.xz"
+    bundle_checksums = {
+        url: f"sha256:{hashlib.sha256(mirror[url]).hexdigest()}"
+        for url in (shasums_url, tarball_url)
+    }
+    for url, checksum in bundle_checksums.items():
+        mirror[f"file:///srv/bundle/files/{checksum[len('sha256:'):]}"] = mirror.pop(
+            url
+        )
+
+    result, _ = run_module(
+        dict(
+            versions=["20.11.0"],
+            nvm_path=str(tmp_path / "nvm"),
+            cache_path=str(tmp_path / "cache"),
+            bundle_files_url="file:///srv/bundle/files/",
+            bundle_checksums=bundle_checksums,
+        )
+    )
+
+    assert result["outcomes"] == {"v20.11.0": "downloaded"}
+    assert all(url.startswith("file:///srv/bundle/") for url in mirror["requested"])
+    assert (
+        tmp_path / "nvm" / "versions" / "node" / "v20.11.0" / "bin" / "node"
+    ).is_file()
@@ -0,0 +1,115 @@
+#!/usr/bin/python
+from typing import List, Optional, Set
+
+from ansible.module_utils.basic import AnsibleModule
+
+__metaclass__ = type
+
+FLATPAK_EXECUTABLE = "flatpak"
+
+
+def compute_application_id(ref: str) -> str:
+    """
+    Reduces a ref to its application ID.
+    Example: 'app/com.slack.Slack/x86_64/stable' -> 'com.slack.Slack'
+    """
+    parts = ref.split("/")
+    if len(parts) > 1 and parts[0] == "app":
+        return parts[1]
+    return parts[0]
+
+
+def get_installed_applications(module: AnsibleModule, method: str) -> Set[str]:
+    """
+    Lists the application IDs of all installed apps with a single `flatpak list`.
+    """
+    cmd = [
+        FLATPAK_EXECUTABLE,
+        "list",
+        f"--{method}",
+        "--app",
+        "--columns=application",
+    ]
+    rc, out, err = module.run_command(cmd)
+    if rc != 0:
+        module.fail_json(
+            msg=f"Error attempting to list installed apps [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+    return {line.strip() for line in out.splitlines() if line.strip()}
+
+
+def compute_missing_refs(refs: List[str], installed: Set[str]) -> List[str]:
+    missing = []
+    for ref in refs:
+        if compute_application_id(ref) not in installed and ref not in missing:
+            missing.append(ref)
+    return missing
+
+
+def install_refs(
+    module: AnsibleModule,
+    refs: List[str],
+    remote: str,
+    method: str,
+    sideload_repos: Optional[List[str]] = None,
+) -> None:
+    """
+    Installs all refs in a single flatpak transaction, so that shared runtimes
+    and OSTree objects are only fetched once.
+    Refs found in a sideload repository (e.g. a bundle's) are copied from it, without network access.
+    """
+    cmd = [
+        FLATPAK_EXECUTABLE,
+        "install",
+        f"--{method}",
+        "-y",
+        *(f"--sideload-repo={repo}" for repo in sideload_repos or []),
+        remote,
+        *refs,
+    ]
+    rc, out, err = module.run_command(cmd)
+    if rc != 0:
+        module.fail_json(
+            msg=f"Error attempting to install apps [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+
+
+def run_module():
+    module_args = dict(
+        name=dict(type="list", elements="str", required=True),
+        remote=dict(type="str", default="flathub"),
+        method=dict(type="str", default="user", choices=["user", "system"]),
+        sideload_repos=dict(type="list", elements="path", default=[]),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    refs = module.params["name"]
+    installed = get_installed_applications(module, module.params["method"])
+    missing = compute_missing_refs(refs, installed)
+    if missing and not module.check_mode:
+        install_refs(
+            module,
+            missing,
+            module.params["remote"],
+            module.params["method"],
+            module.params["sideload_repos"],
+        )
+
+    results = [dict(name=ref, changed=ref in missing) for ref in refs]
+    module.exit_json(
+        changed=bool(missing),
+        msg=f"Installed apps: {', '.join(missing)}"
+        if missing
+        else "All apps already installed",
+        installed=missing,
+        results=results,
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import json
+from typing import Dict, List
+from unittest.mock import call, patch
+import pytest
+import flatpak_apps
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+@pytest.mark.parametrize(
+    ("ref", "expected"),
+    [
+        ("com.slack.Slack", "com.slack.Slack"),
+        ("app/com.slack.Slack/x86_64/stable", "com.slack.Slack"),
+    ],
+)
+def test_compute_application_id(ref: str, expected: str) -> None:
+    assert flatpak_apps.compute_application_id(ref) == expected
+
+
+@pytest.mark.parametrize(
+    ("refs", "expected"),
+    [
+        (["com.slack.Slack", "org.remmina.Remmina"], ["org.remmina.Remmina"]),
+        (
+            ["app/org.remmina.Remmina/x86_64/stable"],
+            ["app/org.remmina.Remmina/x86_64/stable"],
+        ),
+        (["org.remmina.Remmina", "org.remmina.Remmina"], ["org.remmina.Remmina"]),
+        (["com.slack.Slack"], []),
+    ],
+)
+def test_compute_missing_refs(refs: List[str], expected: List[str]) -> None:
+    assert flatpak_apps.compute_missing_refs(refs, {"com.slack.Slack"}) == expected
+
+
+def run_module(args: Dict, list_output: str, check_mode: bool = False):
+    set_module_args(dict(args, _ansible_check_mode=check_mode))
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(AnsibleModule, "run_command") as mock_run_command:
+        mock_run_command.return_value = 0, list_output, ""
+        with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as exc_info:
+            flatpak_apps.run_module()
+    return exc_info.value.args[0], mock_run_command
+
+
+def test_run_module__installs_all_missing_apps_in_one_transaction() -> None:
+    result, mock_run_command = run_module(
+        {"name": ["com.slack.Slack", "org.remmina.Remmina", "org.gimp.GIMP"]},
+        "com.slack.Slack\n",
+    )
+
+    assert result["changed"] is True
+    assert result["results"] == [
+        {"name": "com.slack.Slack", "changed": False},
+        {"name": "org.remmina.Remmina", "changed": True},
+        {"name": "org.gimp.GIMP", "changed": True},
+    ]
+    assert mock_run_command.call_args_list == [
+        call(["flatpak", "list", "--user", "--app", "--columns=application"]),
+        call(
+            [
+                "flatpak",
+                "install",
+                "--user",
+                "-y",
+                "flathub",
+                "org.remmina.Remmina",
+                "org.gimp.GIMP",
+            ]
+        ),
+    ]
+
+
+def test_run_module__installs_from_the_sideload_repos() -> None:
+    result, mock_run_command = run_module(
+        {
+            "name": ["org.remmina.Remmina"],
+            "sideload_repos": ["/var/tmp/dev-pc-bundle/flatpak/.ostree/repo"],
+        },
+        "",
+    )
+
+    assert result["changed"] is True
+    assert mock_run_command.call_args_list[-1] == call(
+        [
+            "flatpak",
+            "install",
+            "--user",
+            "-y",
+            "--sideload-repo=/var/tmp/dev-pc-bundle/flatpak/.ostree/repo",
+            "flathub",
+            "org.remmina.Remmina",
+        ]
+    )
+
+
+def test_run_module__when_everything_is_installed__only_lists_apps() -> None:
+    result, mock_run_command = run_module(
+        {"name": ["com.slack.Slack"]}, "com.slack.Slack\norg.remmina.Remmina\n"
+    )
+
+    assert result["changed"] is False
+    assert mock_run_command.call_count == 1
+
+
+def test_run_module__in_check_mode__does_not_install() -> None:
+    result, mock_run_command = run_module(
+        {"name": ["org.remmina.Remmina"]}, "", check_mode=True
+    )
+
+    assert result["changed"] is True
+    assert mock_run_command.call_count == 1
+
+
+def test_run_module__when_flatpak_fails__returns_an_error() -> None:
+    set_module_args({"name": ["org.remmina.Remmina"]})
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(AnsibleModule, "run_command") as mock_run_command:
+        mock_run_command.return_value = 127, "", "bash: flatpak: command not found\n"
+        with pytest.raises(AnsibleFailJson) as exc_info:
+            flatpak_apps.run_module()
+
+    assert exc_info.value.args[0]["msg"] == (
+        "Error attempting to list installed apps [command: flatpak list --user --app --columns=application]: "
+        "(127) bash: flatpak: command not found\n"
+    )
@@ -0,0 +1,94 @@
+import os
+import tempfile
+from typing import Dict
+
+from ansible.errors import AnsibleActionFail
+from ansible.plugins.action import ActionBase
+
+__metaclass__ = type
+
+
+class ActionModule(ActionBase):
+    """
+    Installs Python versions with the pyenv_python module.
+
+    With `store_path`, the interpreter tarballs are cached on the controller:
+    cached tarballs are pushed to the target before installing,
+    and tarballs of freshly built interpreters are fetched back into the store.
+    Without it, the module's `cache_path` (e.g. a shared directory) is used as is.
+    """
+
+    TRANSFERS_FILES = True
+
+    def run(self, tmp=None, task_vars=None):
+        result = super().run(tmp, task_vars)
+        del tmp
+
+        module_args = dict(self._task.args)
+        store_path = module_args.pop("store_path", None)
+        if not store_path:
+            result.update(self._run_pyenv_python(module_args, task_vars))
+            return result
+        if module_args.get("cache_path"):
+            raise AnsibleActionFail("store_path and cache_path are mutually exclusive")
+        store_path = os.path.expanduser(store_path)
+
+        try:
+            result.update(self._install_with_store(store_path, module_args, task_vars))
+        finally:
+            self._remove_tmp_path(self._connection._shell.tmpdir)
+        return result
+
+    def _run_pyenv_python(self, module_args: Dict, task_vars) -> Dict:
+        module_result = self._execute_module(
+            module_name="pyenv_python", module_args=module_args, task_vars=task_vars
+        )
+        if module_result.get("failed"):
+            raise AnsibleActionFail(module_result.get("msg"), result=module_result)
+        return module_result
+
+    def _install_with_store(
+        self, store_path: str, module_args: Dict, task_vars
+    ) -> Dict:
+        planned = self._run_pyenv_python(
+            dict(module_args, operation="plan"), task_vars
+        )["versions"]
+        hits = [
+            version
+            for version in planned
+            if not version["installed"]
+            and os.path.isfile(os.path.join(store_path, version["tarball"]))
+        ]
+        if self._play_context.check_mode:
+            return self._run_pyenv_python(module_args, task_vars)
+
+        staging_path = self._make_tmp_path()
+        remote_paths = []
+        for version in hits:
+            remote_path = self._connection._shell.join_path(
+                staging_path, version["tarball"]
+            )
+            self._transfer_file(
+                os.path.join(store_path, version["tarball"]), remote_path
+            )
+            remote_paths.append(remote_path)
+        self._fixup_perms2([staging_path] + remote_paths, execute=False)
+
+        module_result = self._run_pyenv_python(
+            dict(module_args, cache_path=staging_path), task_vars
+        )
+
+        os.makedirs(store_path, exist_ok=True)
+        for tarball in module_result.get("packed", []):
+            fd, temp_path = tempfile.mkstemp(dir=store_path, prefix=".")
+            os.close(fd)
+            try:
+                self._connection.fetch_file(
+                    self._connection._shell.join_path(staging_path, tarball),
+                    temp_path,
+                )
+                os.replace(temp_path, os.path.join(store_path, tarball))
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        return module_result
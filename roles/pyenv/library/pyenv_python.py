@@ -0,0 +1,302 @@
+#!/usr/bin/python
+import hashlib
+import os
+import platform
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ansible.module_utils.basic import AnsibleModule
+
+__metaclass__ = type
+
+OS_RELEASE_PATH = "/etc/os-release"
+TAR_EXECUTABLE = "tar"
+
+
+def read_distro_release() -> str:
+    """
+    Example: 'debian12'
+    """
+    os_release = {}
+    try:
+        with open(OS_RELEASE_PATH) as f:
+            for line in f:
+                key, separator, value = line.strip().partition("=")
+                if separator:
+                    os_release[key] = value.strip("\"'")
+    except OSError:
+        pass
+    return f"{os_release.get('ID', 'linux')}{os_release.get('VERSION_ID', '')}"
+
+
+def compute_build_flags(optimizations: bool, lto: bool) -> str:
+    return "-".join(
+        [flag for flag, enabled in (("pgo", optimizations), ("lto", lto)) if enabled]
+        or ["default"]
+    )
+
+
+def compute_tarball_name(
+    version: str, distro_release: str, arch: str, build_flags: str, root: str
+) -> str:
+    """
+    CPython can't be relocated, so the installation prefix is part of the key as well.
+    Example: 'python-3.12.1-debian12-x86_64-pgo-lto-1a2b3c4d.tar.gz'
+    """
+    prefix_hash = hashlib.sha256(root.encode()).hexdigest()[:8]
+    return (
+        f"python-{version}-{distro_release}-{arch}-{build_flags}-{prefix_hash}.tar.gz"
+    )
+
+
+def compute_version_path(root: str, version: str) -> str:
+    return os.path.join(root, "versions", version)
+
+
+def plan(root: str, versions: List[str], optimizations: bool, lto: bool) -> List[Dict]:
+    distro_release = read_distro_release()
+    arch = platform.machine()
+    build_flags = compute_build_flags(optimizations, lto)
+    return [
+        dict(
+            version=version,
+            installed=os.path.isdir(compute_version_path(root, version)),
+            tarball=compute_tarball_name(
+                version, distro_release, arch, build_flags, root
+            ),
+        )
+        for version in versions
+    ]
+
+
+def compute_make_jobs(make_jobs: int, concurrent_builds: int) -> int:
+    """
+    By default, the CPUs are split among the builds that run at the same time.
+    """
+    if make_jobs > 0:
+        return make_jobs
+    return max(1, (os.cpu_count() or 1) // max(1, concurrent_builds))
+
+
+def run(module: AnsibleModule, cmd: List[str], description: str, **kwargs) -> None:
+    rc, out, err = module.run_command(cmd, **kwargs)
+    if rc != 0:
+        raise RuntimeError(
+            f"Error attempting to {description} [command: {' '.join(cmd)}]: ({rc}) {out + err}"
+        )
+
+
+def unpack(module: AnsibleModule, root: str, version: str, tarball_path: str) -> None:
+    """
+    Unpacks into a staging directory next to the version's directory,
+    so that a failed unpack never leaves a partial interpreter behind.
+    """
+    versions_path = os.path.join(root, "versions")
+    os.makedirs(versions_path, exist_ok=True)
+    staging_path = tempfile.mkdtemp(dir=versions_path, prefix=f".{version}.")
+    try:
+        run(
+            module,
+            [TAR_EXECUTABLE, "-xzf", tarball_path, "-C", staging_path],
+            f"unpack Python {version}",
+        )
+        os.rename(
+            os.path.join(staging_path, version), compute_version_path(root, version)
+        )
+    finally:
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+
+def build(
+    module: AnsibleModule,
+    root: str,
+    version: str,
+    make_jobs: int,
+    optimizations: bool,
+    lto: bool,
+    mirror_url: Optional[str] = None,
+) -> None:
+    """
+    Builds a version with `pyenv install`. python-build looks the sources up
+    by their checksum in `mirror_url` (e.g. a bundle's files) before downloading them.
+    """
+    configure_opts = [
+        opt
+        for opt, enabled in (
+            ("--enable-optimizations", optimizations),
+            ("--with-lto", lto),
+        )
+        if enabled
+    ]
+    run(
+        module,
+        [os.path.join(root, "bin", "pyenv"), "install", "--skip-existing", version],
+        f"build Python {version}",
+        environ_update=dict(
+            PYENV_ROOT=root,
+            MAKE_OPTS=f"-j{make_jobs}",
+            PYTHON_CONFIGURE_OPTS=" ".join(configure_opts),
+            **(dict(PYTHON_BUILD_MIRROR_URL=mirror_url) if mirror_url else {}),
+        ),
+    )
+
+
+def pack(module: AnsibleModule, root: str, version: str, tarball_path: str) -> None:
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(tarball_path), prefix=".", suffix=".tar.gz"
+    )
+    os.close(fd)
+    try:
+        run(
+            module,
+            [
+                TAR_EXECUTABLE,
+                "-czf",
+                temp_path,
+                "-C",
+                os.path.join(root, "versions"),
+                version,
+            ],
+            f"pack Python {version}",
+        )
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, tarball_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def install_version(
+    module: AnsibleModule,
+    root: str,
+    planned: Dict,
+    cache_path: Optional[str],
+    make_jobs: int,
+    optimizations: bool,
+    lto: bool,
+    mirror_url: Optional[str] = None,
+) -> str:
+    """
+    Unpacks a cached interpreter, or builds one and adds it to the cache.
+    Returns how the version got installed: 'unpacked' or 'built'.
+    """
+    tarball_path = os.path.join(cache_path, planned["tarball"]) if cache_path else None
+    if tarball_path and os.path.isfile(tarball_path):
+        unpack(module, root, planned["version"], tarball_path)
+        return "unpacked"
+    build(module, root, planned["version"], make_jobs, optimizations, lto, mirror_url)
+    if tarball_path:
+        pack(module, root, planned["version"], tarball_path)
+    return "built"
+
+
+def install_versions(
+    module: AnsibleModule,
+    root: str,
+    missing: List[Dict],
+    cache_path: Optional[str],
+    make_jobs: int,
+    optimizations: bool,
+    lto: bool,
+    max_workers: int,
+    mirror_url: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Installs the versions concurrently. Returns how each version got installed,
+    or the error that prevented it.
+    """
+    make_jobs = compute_make_jobs(make_jobs, min(max_workers, len(missing)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            planned["version"]: executor.submit(
+                install_version,
+                module,
+                root,
+                planned,
+                cache_path,
+                make_jobs,
+                optimizations,
+                lto,
+                mirror_url,
+            )
+            for planned in missing
+        }
+    outcomes = {}
+    for version, future in futures.items():
+        exception = future.exception()
+        outcomes[version] = (
+            future.result() if exception is None else f"failed: {exception}"
+        )
+    return outcomes
+
+
+def run_module():
+    module_args = dict(
+        operation=dict(type="str", default="install", choices=["plan", "install"]),
+        versions=dict(type="list", elements="str", required=True),
+        root=dict(type="path", required=True),
+        cache_path=dict(type="path"),
+        optimizations=dict(type="bool", default=False),
+        lto=dict(type="bool", default=False),
+        make_jobs=dict(type="int", default=0),
+        max_concurrent_builds=dict(type="int", default=2),
+        mirror_url=dict(type="str"),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    root = module.params["root"]
+    planned = plan(
+        root,
+        module.params["versions"],
+        module.params["optimizations"],
+        module.params["lto"],
+    )
+    if module.params["operation"] == "plan":
+        module.exit_json(changed=False, versions=planned)
+
+    missing = [version for version in planned if not version["installed"]]
+    outcomes = {}
+    if missing and not module.check_mode:
+        cache_path = module.params["cache_path"]
+        if cache_path:
+            os.makedirs(cache_path, exist_ok=True)
+        outcomes = install_versions(
+            module,
+            root,
+            missing,
+            cache_path,
+            module.params["make_jobs"],
+            module.params["optimizations"],
+            module.params["lto"],
+            module.params["max_concurrent_builds"],
+            module.params["mirror_url"],
+        )
+        failed = {v: o for v, o in outcomes.items() if o.startswith("failed")}
+        if failed:
+            module.fail_json(
+                msg=f"Error attempting to install Python versions: {', '.join(f'{v} ({o})' for v, o in failed.items())}",
+                outcomes=outcomes,
+            )
+
+    module.exit_json(
+        changed=bool(missing),
+        installed=[version["version"] for version in missing],
+        outcomes=outcomes,
+        packed=[
+            version["tarball"]
+            for version in missing
+            if outcomes.get(version["version"]) == "built"
+            and module.params["cache_path"]
+        ],
+    )
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
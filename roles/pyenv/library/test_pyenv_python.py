@@ -0,0 +1,167 @@
+import json
+import subprocess
+from pathlib import Path
+from typing import Dict
+from unittest.mock import patch
+import pytest
+import pyenv_python
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+@pytest.fixture(autouse=True)
+def os_release(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    os_release_path = tmp_path / "os-release"
+    os_release_path.write_text('ID=debian\nVERSION_ID="12"\n')
+    monkeypatch.setattr(pyenv_python, "OS_RELEASE_PATH", str(os_release_path))
+
+
+def mock_pyenv_install(cmd, environ_update=None, **kwargs):
+    """Runs tar for real, and fakes `pyenv install` by creating the version's directory."""
+    if cmd[0] == "tar":
+        completed = subprocess.run(cmd, capture_output=True, text=True)
+        return completed.returncode, completed.stdout, completed.stderr
+    root = Path(environ_update["PYENV_ROOT"])
+    (root / "versions" / cmd[-1] / "bin").mkdir(parents=True)
+    (root / "versions" / cmd[-1] / "bin" / "python").write_text("#!/bin/sh\n")
+    return 0, "", ""
+
+
+def run_module(args: Dict):
+    set_module_args(args)
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(
+        AnsibleModule, "run_command", side_effect=mock_pyenv_install
+    ) as mock_run_command:
+        with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as exc_info:
+            pyenv_python.run_module()
+    return exc_info.value.args[0], mock_run_command
+
+
+def test_compute_tarball_name__depends_on_the_build_flags_and_prefix() -> None:
+    name = pyenv_python.compute_tarball_name(
+        "3.12.1", "debian12", "x86_64", "pgo-lto", "/home/dev/.local/share/pyenv"
+    )
+
+    assert name.startswith("python-3.12.1-debian12-x86_64-pgo-lto-")
+    assert name != pyenv_python.compute_tarball_name(
+        "3.12.1", "debian12", "x86_64", "pgo-lto", "/home/other/.local/share/pyenv"
+    )
+    assert pyenv_python.compute_build_flags(False, False) == "default"
+
+
+def test_run_module__builds_missing_versions_and_packs_them(tmp_path: Path) -> None:
+    root = tmp_path / "pyenv"
+    (root / "versions" / "3.11.7").mkdir(parents=True)
+
+    result, mock_run_command = run_module(
+        {
+            "versions": ["3.11.7", "3.12.1"],
+            "root": str(root),
+            "cache_path": str(tmp_path / "cache"),
+            "optimizations": True,
+            "make_jobs": 4,
+        }
+    )
+
+    assert result["changed"] is True
+    assert result["installed"] == ["3.12.1"]
+    assert result["outcomes"] == {"3.12.1": "built"}
+    (tarball,) = result["packed"]
+    assert (tmp_path / "cache" / tarball).is_file()
+    build_call = mock_run_command.call_args_list[0]
+    assert build_call.args[0][1:] == ["install", "--skip-existing", "3.12.1"]
+    assert build_call.kwargs["environ_update"]["MAKE_OPTS"] == "-j4"
+    assert (
+        build_call.kwargs["environ_update"]["PYTHON_CONFIGURE_OPTS"]
+        == "--enable-optimizations"
+    )
+
+
+def test_run_module__with_a_mirror_url__looks_the_sources_up_in_it(
+    tmp_path: Path,
+) -> None:
+    result, mock_run_command = run_module(
+        {
+            "versions": ["3.12.1"],
+            "root": str(tmp_path / "pyenv"),
+            "mirror_url": "file:///var/tmp/dev-pc-bundle/files",
+        }
+    )
+
+    assert result["outcomes"] == {"3.12.1": "built"}
+    assert (
+        mock_run_command.call_args_list[0].kwargs["environ_update"][
+            "PYTHON_BUILD_MIRROR_URL"
+        ]
+        == "file:///var/tmp/dev-pc-bundle/files"
+    )
+
+
+def test_run_module__when_the_interpreter_is_cached__unpacks_it(
+    tmp_path: Path,
+) -> None:
+    cache_path = tmp_path / "cache"
+    root = tmp_path / "pyenv"
+    run_module(
+        {"versions": ["3.12.1"], "root": str(root), "cache_path": str(cache_path)}
+    )
+    (root / "versions" / "3.12.1" / "bin" / "python").unlink()
+    (root / "versions" / "3.12.1" / "bin").rmdir()
+    (root / "versions" / "3.12.1").rmdir()
+
+    result, mock_run_command = run_module(
+        {"versions": ["3.12.1"], "root": str(root), "cache_path": str(cache_path)}
+    )
+
+    assert result["outcomes"] == {"3.12.1": "unpacked"}
+    assert result["packed"] == []
+    assert [c.args[0][0] for c in mock_run_command.call_args_list] == ["tar"]
+    assert (root / "versions" / "3.12.1" / "bin" / "python").is_file()
+    assert [path.name for path in (root / "versions").iterdir()] == ["3.12.1"]
+
+
+def test_run_module__when_a_build_fails__returns_an_error(tmp_path: Path) -> None:
+    set_module_args({"versions": ["3.99.0"], "root": str(tmp_path)})
+
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(AnsibleModule, "run_command") as mock_run_command:
+        mock_run_command.return_value = 1, "", "python-build: definition not found\n"
+        with pytest.raises(AnsibleFailJson) as exc_info:
+            pyenv_python.run_module()
+
+    assert exc_info.value.args[0]["msg"].startswith(
+        "Error attempting to install Python versions: 3.99.0 (failed: Error attempting to build Python 3.99.0"
+    )
@@ -0,0 +1,202 @@
+#!/usr/bin/python
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from ansible.module_utils.basic import AnsibleModule
+
+__metaclass__ = type
+
+APT_GET_EXECUTABLE = "apt-get"
+
+# The apt module's upgrade modes, mapped to apt-get's (aptitude is never used)
+UPGRADE_ARGS = {
+    "safe": ["upgrade", "--with-new-pkgs"],
+    "yes": ["upgrade"],
+    "full": ["dist-upgrade"],
+    "dist": ["dist-upgrade"],
+}
+
+# Example: Inst htop [3.2.2-1] (3.2.2-2 Debian:12.5/stable [amd64])
+# New packages have no current version: Inst linux-image-6.1.0-18-amd64 (6.1.76-1 Debian-Security:12/stable-security [amd64])
+SIMULATION_INST_REGEX = re.compile(
+    r"^Inst (?P<name>\S+)(?: \[(?P<current>[^\]]+)\])? \((?P<candidate>\S+) .*?(?:\[(?P<arch>[^\]]+)\])?\)"
+)
+# Example: Remv libfoo1 [1.0-1]
+SIMULATION_REMV_REGEX = re.compile(r"^Remv (?P<name>\S+)(?: \[(?P<current>[^\]]+)\])?")
+
+# Example: 'http://deb.debian.org/debian/pool/main/h/htop/htop_3.2.2-2_amd64.deb' htop_3.2.2-2_amd64.deb 152840 SHA256:5a3c...
+PRINT_URIS_LINE_REGEX = re.compile(
+    r"^'(?P<uri>[^']+)' (?P<filename>\S+\.deb) (?P<size>\d+) \S+$"
+)
+
+
+def parse_simulation_output(out: str) -> Dict[str, List[Dict]]:
+    """
+    Lists the packages `apt-get -s` would upgrade, newly install and remove.
+    """
+    upgrades, installs, removals = [], [], []
+    for line in out.splitlines():
+        match = SIMULATION_INST_REGEX.match(line)
+        if match:
+            package = dict(
+                name=match["name"],
+                current=match["current"],
+                candidate=match["candidate"],
+                arch=match["arch"],
+            )
+            (upgrades if match["current"] else installs).append(package)
+            continue
+        match = SIMULATION_REMV_REGEX.match(line)
+        if match:
+            removals.append(dict(name=match["name"], current=match["current"]))
+    return dict(upgrades=upgrades, installs=installs, removals=removals)
+
+
+def parse_print_uris_output(out: str) -> List[Dict]:
+    return [
+        dict(filename=match["filename"], size=int(match["size"]))
+        for match in map(PRINT_URIS_LINE_REGEX.match, out.splitlines())
+        if match
+    ]
+
+
+def build_sources_args(sources_list: Optional[str]) -> List[str]:
+    """
+    Restricts apt to a single sources file, e.g. a bundle's when provisioning offline.
+    """
+    if not sources_list:
+        return []
+    return [
+        "-o",
+        f"Dir::Etc::SourceList={sources_list}",
+        "-o",
+        "Dir::Etc::SourceParts=/dev/null",
+    ]
+
+
+def run_apt_get(
+    module: AnsibleModule, args: List[str], description: str, lock_timeout: int = 0
+) -> str:
+    cmd = [
+        APT_GET_EXECUTABLE,
+        "-q",
+        "-y",
+        "-o",
+        f"DPkg::Lock::Timeout={lock_timeout}",
+        "-o",
+        "Dpkg::Options::=--force-confdef",
+        "-o",
+        "Dpkg::Options::=--force-confold",
+        *args,
+    ]
+    rc, out, err = module.run_command(
+        cmd, environ_update=dict(DEBIAN_FRONTEND="noninteractive")
+    )
+    if rc != 0:
+        module.fail_json(
+            msg=f"Error attempting to {description} [command: {' '.join(cmd)}]: ({rc}) {out + err}",
+        )
+    return out
+
+
+def plan(module: AnsibleModule, upgrade_args: List[str]) -> Dict:
+    """
+    Simulates the upgrade, without taking any lock.
+    The archives apt still has to download are listed with their sizes.
+    """
+    planned = parse_simulation_output(
+        run_apt_get(module, ["-s", *upgrade_args], "simulate the upgrade")
+    )
+    debs = (
+        parse_print_uris_output(
+            run_apt_get(module, ["--print-uris", *upgrade_args], "plan the downloads")
+        )
+        if planned["upgrades"] or planned["installs"]
+        else []
+    )
+    planned.update(
+        pending=bool(planned["upgrades"] or planned["installs"] or planned["removals"]),
+        debs=debs,
+        download_bytes=sum(deb["size"] for deb in debs),
+    )
+    return planned
+
+
+def write_report(report_path: str, report: Dict) -> None:
+    """
+    Appends the run's report to a JSON Lines file.
+    """
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, "a") as f:
+        f.write(json.dumps(report) + "\n")
+
+
+def run_module():
+    module_args = dict(
+        operation=dict(
+            type="str", required=True, choices=["plan", "download", "install"]
+        ),
+        mode=dict(type="str", default="safe", choices=list(UPGRADE_ARGS)),
+        lock_timeout=dict(type="int", default=60),
+        downloaded_bytes=dict(type="int", default=0),
+        report_path=dict(type="path"),
+        sources_list=dict(type="path"),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+
+    operation = module.params["operation"]
+    upgrade_args = [
+        *build_sources_args(module.params["sources_list"]),
+        *UPGRADE_ARGS[module.params["mode"]],
+    ]
+    planned = plan(module, upgrade_args)
+    if operation == "plan" or not planned["pending"]:
+        module.exit_json(changed=False, **planned)
+
+    if operation == "download":
+        # Only takes apt's archives lock, so the dpkg lock stays free meanwhile
+        if not module.check_mode and planned["debs"]:
+            run_apt_get(
+                module, ["--download-only", *upgrade_args], "download the upgrades"
+            )
+        module.exit_json(
+            changed=bool(planned["debs"]),
+            downloaded_bytes=planned["download_bytes"],
+            **planned,
+        )
+    elif operation == "install":
+        started_at = time.time()
+        if not module.check_mode:
+            run_apt_get(
+                module,
+                upgrade_args,
+                "upgrade the packages",
+                module.params["lock_timeout"],
+            )
+        report = dict(
+            started_at=started_at,
+            duration=round(time.time() - started_at, 3),
+            mode=module.params["mode"],
+            upgraded=planned["upgrades"],
+            installed=planned["installs"],
+            removed=planned["removals"],
+            # Archives the download phase missed are fetched while installing
+            fetched_bytes=module.params["downloaded_bytes"] + planned["download_bytes"],
+        )
+        if module.params["report_path"] and not module.check_mode:
+            write_report(module.params["report_path"], report)
+        module.exit_json(changed=True, report=report, **planned)
+    else:
+        raise AssertionError
+
+
+def main():
+    run_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import json
+from pathlib import Path
+from typing import Dict, List
+from unittest.mock import patch
+import pytest
+import apt_upgrade
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+
+__metaclass__ = type
+
+
+def set_module_args(args: Dict) -> None:
+    args["_ansible_remote_tmp"] = "/tmp"
+    args["_ansible_keep_remote_files"] = False
+
+    args = json.dumps({"ANSIBLE_MODULE_ARGS": args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def mock_exit_json(*args, **kwargs) -> None:
+    raise AnsibleExitJson(kwargs)
+
+
+def mock_fail_json(*args, **kwargs) -> None:
+    kwargs["failed"] = True
+    raise AnsibleFailJson(kwargs)
+
+
+SIMULATION_OUTPUT = """\
+NOTE: This is only a simulation!
+      apt-get needs root privileges for real execution.
+Reading package lists...
+Inst htop [3.2.2-1] (3.2.2-2 Debian:12.5/stable [amd64])
+Inst linux-image-6.1.0-18-amd64 (6.1.76-1 Debian-Security:12/stable-security [amd64])
+Remv libfoo1 [1.0-1]
+Conf htop (3.2.2-2 Debian:12.5/stable [amd64])
+"""
+
+PRINT_URIS_OUTPUT = """\
+'http://deb.debian.org/debian/pool/main/h/htop/htop_3.2.2-2_amd64.deb' htop_3.2.2-2_amd64.deb 152840 SHA256:5a3c
+'http://security.debian.org/pool/l/linux/linux-image_6.1.76-1_amd64.deb' linux-image_6.1.76-1_amd64.deb 68000000 SHA256:7b4d
+"""
+
+
+def mock_apt_get(simulation_output: str, print_uris_output: str):
+    def run_command(cmd, **kwargs):
+        if "-s" in cmd:
+            return 0, simulation_output, ""
+        if "--print-uris" in cmd:
+            return 0, print_uris_output, ""
+        return 0, "", ""
+
+    return run_command
+
+
+def run_module(
+    args: Dict,
+    simulation_output: str = SIMULATION_OUTPUT,
+    print_uris_output: str = PRINT_URIS_OUTPUT,
+):
+    set_module_args(args)
+    with patch.multiple(
+        AnsibleModule, exit_json=mock_exit_json, fail_json=mock_fail_json
+    ), patch.object(
+        AnsibleModule,
+        "run_command",
+        side_effect=mock_apt_get(simulation_output, print_uris_output),
+    ) as mock_run_command:
+        with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as exc_info:
+            apt_upgrade.run_module()
+    return exc_info.value.args[0], mock_run_command
+
+
+def commands(mock_run_command) -> List[List[str]]:
+    return [c.args[0] for c in mock_run_command.call_args_list]
+
+
+def test_parse_simulation_output__splits_upgrades_installs_and_removals() -> None:
+    assert apt_upgrade.parse_simulation_output(SIMULATION_OUTPUT) == dict(
+        upgrades=[
+            dict(name="htop", current="3.2.2-1", candidate="3.2.2-2", arch="amd64")
+        ],
+        installs=[
+            dict(
+                name="linux-image-6.1.0-18-amd64",
+                current=None,
+                candidate="6.1.76-1",
+                arch="amd64",
+            )
+        ],
+        removals=[dict(name="libfoo1", current="1.0-1")],
+    )
+
+
+def test_run_module__plan__reports_pending_packages_and_download_size() -> None:
+    result, _ = run_module(dict(operation="plan"))
+
+    assert result["changed"] is False
+    assert result["pending"] is True
+    assert result["download_bytes"] == 68152840
+
+
+@pytest.mark.parametrize("operation", ["download", "install"])
+def test_run_module__when_nothing_is_pending__skips_apt(operation: str) -> None:
+    result, mock_run_command = run_module(
+        dict(operation=operation), simulation_output="Reading package lists...\n"
+    )
+
+    assert result["changed"] is False
+    assert result["pending"] is False
+    assert len(commands(mock_run_command)) == 1
+
+
+def test_run_module__download__only_downloads() -> None:
+    result, mock_run_command = run_module(dict(operation="download", mode="full"))
+
+    assert result["changed"] is True
+    assert result["downloaded_bytes"] == 68152840
+    assert commands(mock_run_command)[-1][-2:] == ["--download-only", "dist-upgrade"]
+
+
+def test_run_module__with_a_sources_list__only_upgrades_from_it() -> None:
+    _, mock_run_command = run_module(
+        dict(
+            operation="download",
+            sources_list="/etc/apt/sources.list.d/dev-pc-bundle.sources",
+        )
+    )
+
+    for cmd in commands(mock_run_command):
+        assert (
+            "Dir::Etc::SourceList=/etc/apt/sources.list.d/dev-pc-bundle.sources" in cmd
+        )
+        assert "Dir::Etc::SourceParts=/dev/null" in cmd
+
+
+def test_run_module__install__upgrades_and_appends_to_report(tmp_path: Path) -> None:
+    report_path = tmp_path / "log" / "upgrades.jsonl"
+
+    result, mock_run_command = run_module(
+        dict(
+            operation="install",
+            downloaded_bytes=1000,
+            report_path=str(report_path),
+        ),
+        print_uris_output="",
+    )
+
+    assert result["changed"] is True
+    assert commands(mock_run_command)[-1][-2:] == ["upgrade", "--with-new-pkgs"]
+    assert "DPkg::Lock::Timeout=60" in commands(mock_run_command)[-1]
+    report = json.loads(report_path.read_text())
+    assert report["fetched_bytes"] == 1000
+    assert [package["name"] for package in report["upgraded"]] == ["htop"]
@@ -0,0 +1,59 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+build_bundle() {
+    local bundlePath="${1}"
+    local tarball="${2}"
+
+    [ -d "venv" ] && source venv/bin/activate
+
+    mkdir -p "${bundlePath}"
+    bundlePath="$(realpath "${bundlePath}")"
+    ansible-playbook --extra-vars "bundle_path=${bundlePath}" bundle.yml
+
+    if [[ "${tarball}" == true ]]
+    then
+        tar --create --gzip --file "${bundlePath}.tar.gz" --directory "${bundlePath}" .
+        echo "Bundle written to ${bundlePath}.tar.gz"
+    fi
+}
+
+helpFunc() {
+  echo "Usage: build-bundle.sh [options] [path]
+Download everything a run fetches (APT packages, extrepo's metadata, Flatpak
+apps, editor extensions, git mirrors of pyenv, nvm and the dotfiles, Nerd
+Fonts, Starship and the sources of python_versions and node_versions) into a
+bundle at 'path' (default: ./bundle), to provision without network access.
+Needs apt-get, flatpak and git. Re-running it only downloads what is missing.
+
+Provision from the bundle with: ./scripts/setup.sh --bundle path
+
+Options:
+  -t, --tarball        Also pack the bundle into 'path.tar.gz'
+  -h, --help           Show this help dialog"
+  exit 0
+}
+
+main() {
+    local LONGOPTS=tarball,help
+    local OPTIONS=th
+
+    local PARSED
+    PARSED=$(getopt --options=$OPTIONS --longoptions=$LONGOPTS --name "$0" -- "$@")
+    eval set -- "${PARSED}"
+
+    local tarball=false
+    while true
+    do
+    case "${1}" in
+        "-t" | "--tarball" ) tarball=true; shift;;
+        "-h" | "--help" ) helpFunc;;
+        "--") shift; break;;
+        *) echo "Mismatch between options"; exit 1;;
+    esac
+    done
+
+    build_bundle "${1:-bundle}" "${tarball}"
+}
+
+main "${@}"
@@ -2,6 +2,11 @@
 set -euo pipefail
 
 REMOTE_INVENTORY_FILENAME="inventory.remote"
+# Ansible's wheels and the Galaxy requirements are cached here, so that a new venv
+# or a fresh checkout can be set up without network access
+DEPS_CACHE_PATH="${DEPS_CACHE_PATH:-.deps-cache}"
+# Records what the Galaxy requirements were installed from, and what got installed
+DEPS_STAMP_FILENAME=".collections/.requirements.sha256"
 
 setup_remote_env() {
     if ! [[ -f "${REMOTE_INVENTORY_FILENAME}" ]];
@@ -34,17 +39,61 @@ setup_local_env() {
     source venv/bin/activate
     if ! command -v ansible &> /dev/null
     then
-        pip3 install ansible
+        install_ansible
     fi
 }
 
+install_ansible() {
+    local wheelsPath="${DEPS_CACHE_PATH}/wheels"
+
+    if ! pip3 install --no-index --find-links "${wheelsPath}" ansible &> /dev/null
+    then
+        pip3 wheel --wheel-dir "${wheelsPath}" ansible
+        pip3 install --no-index --find-links "${wheelsPath}" ansible
+    fi
+}
+
+# Read from its package rather than from `ansible-galaxy --version`, which takes a lot longer to start
+ansible_core_version() {
+    python3 -c 'import ansible.release; print(ansible.release.__version__)' 2> /dev/null || echo "unknown"
+}
+
+# The installed collections' and roles' versions
+installed_deps_hash() {
+    cat .collections/ansible_collections/*/*/MANIFEST.json .roles/*/meta/.galaxy_install_info 2> /dev/null \
+        | sha256sum | cut -d " " -f 1
+}
+
 install_deps() {
-    ansible-galaxy collection install -r requirements.yml
-    ansible-galaxy role install -r requirements.yml
+    local requirementsHash
+    requirementsHash=$(cat requirements.yml <(ansible_core_version) | sha256sum | cut -d " " -f 1)
+    local archive="${DEPS_CACHE_PATH}/galaxy/${requirementsHash}.tar.gz"
+
+    if [[ -f "${DEPS_STAMP_FILENAME}" && "$(cat "${DEPS_STAMP_FILENAME}")" == "${requirementsHash} $(installed_deps_hash)" ]]
+    then
+        echo "Galaxy requirements are up to date"
+        return
+    fi
+
+    if [[ -f "${archive}" ]]
+    then
+        rm -rf .collections .roles
+        tar --extract --gzip --file "${archive}"
+    else
+        ansible-galaxy collection install --force -r requirements.yml
+        ansible-galaxy role install --force -r requirements.yml
+        mkdir -p "$(dirname "${archive}")"
+        tar --create --gzip --file "${archive}.tmp" --exclude "${DEPS_STAMP_FILENAME}" .collections .roles
+        mv "${archive}.tmp" "${archive}"
+    fi
+    echo "${requirementsHash} $(installed_deps_hash)" > "${DEPS_STAMP_FILENAME}"
 }
 
 setup() {
     local remote="${1}"
+    local bundle="${2}"
+    local force="${3}"
+    local parallel="${4}"
 
     local extraArgs=""
     if [[ "${remote}" == true ]]
@@ -54,6 +103,27 @@ setup() {
         extraArgs="--ask-become-pass"
     fi
 
+    if [[ -n "${bundle}" ]]
+    then
+        extraArgs="${extraArgs} --extra-vars bundle_path=$(realpath "${bundle}")"
+    fi
+
+    if [[ "${force}" == true ]]
+    then
+        extraArgs="${extraArgs} --extra-vars journal_force=true"
+    fi
+
+    # Fleet mode: every host goes through the Playbook at its own pace, at most `parallel` hosts at a time
+    if [[ -n "${parallel}" ]]
+    then
+        export ANSIBLE_STRATEGY=free
+        export ANSIBLE_FORKS="${parallel}"
+        export PROFILE_TIMELINE_FLEET=true
+        # Only what changed or failed is shown next to the hosts' progress
+        export ANSIBLE_DISPLAY_OK_HOSTS=false
+        export ANSIBLE_DISPLAY_SKIPPED_HOSTS=false
+    fi
+
     if [[ "${remote}" == true ]]
     then
         setup_remote_env
@@ -76,28 +146,49 @@ See README.md for more detailed information.
 Options:
   -r, --remote         Run plays on the remote target(s) specified in
                        intentory.remote and uses 'vars/vault.yml'.
+  -b, --bundle PATH    Use the downloads in a bundle built by
+                       scripts/build-bundle.sh
+  -f, --force          Run every role, including the ones the provisioning
+                       journal would skip as unchanged
+  -p, --parallel N     Provision the remote targets independently of each
+                       other, N at a time, with a progress line per host and
+                       a summary table at the end. Implies --remote
   -h, --help           Show this help dialog"
   exit 0
 }
 
 main() {
-    local LONGOPTS=remote,help
-    local OPTIONS=rh
+    local LONGOPTS=remote,bundle:,force,parallel:,help
+    local OPTIONS=rb:fp:h
 
-    local PARSED=$(getopt --options=$OPTIONS --longoptions=$LONGOPTS --name "$0" -- "$@")
+    local PARSED
+    PARSED=$(getopt --options=$OPTIONS --longoptions=$LONGOPTS --name "$0" -- "$@")
+    eval set -- "${PARSED}"
 
     local remote=false;
-    for var in ${PARSED}
+    local bundle=""
+    local force=false
+    local parallel=""
+    while true
     do
-    case "${var}" in
-        "-r" | "--remote" ) remote=true;;
+    case "${1}" in
+        "-r" | "--remote" ) remote=true; shift;;
+        "-b" | "--bundle" ) bundle="${2}"; shift 2;;
+        "-f" | "--force" ) force=true; shift;;
+        "-p" | "--parallel" ) parallel="${2}"; remote=true; shift 2;;
         "-h" | "--help" ) helpFunc;;
-        "--") ;;
+        "--") shift; break;;
         *) echo "Mismatch between options"; exit 1;;
     esac
     done
 
-    setup "${remote}"
+    if [[ -n "${parallel}" && ! "${parallel}" =~ ^[1-9][0-9]*$ ]]
+    then
+        echo "--parallel expects a number of hosts, got '${parallel}'"
+        exit 1
+    fi
+
+    setup "${remote}" "${bundle}" "${force}" "${parallel}"
 }
 
 main "${@}"
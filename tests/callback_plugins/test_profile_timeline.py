@@ -0,0 +1,168 @@
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+import profile_timeline
+
+
+__metaclass__ = type
+
+
+def make_entry(
+    task: str, duration: float, role: Optional[str] = None, items=()
+) -> Dict:
+    return dict(
+        host="localhost",
+        play="Dev PC",
+        role=role,
+        task=task,
+        duration=duration,
+        items=list(items),
+    )
+
+
+def test_summarize() -> None:
+    entries = [
+        make_entry("Update APT cache", 4.0),
+        make_entry("Enable repositories", 1.5, role="extrepo"),
+        make_entry("Enable repositories", 0.5, role="extrepo"),
+    ]
+
+    assert profile_timeline.summarize(entries) == {
+        "tasks": {
+            "localhost | Update APT cache": 4.0,
+            "localhost | extrepo : Enable repositories": 2.0,
+        },
+        "roles": {"localhost | (play)": 4.0, "localhost | extrepo": 2.0},
+        "hosts": {"localhost": 6.0},
+    }
+
+
+def test_build_folded_stacks__splits_loops_into_items() -> None:
+    entries = [
+        make_entry("Update APT cache", 4.0),
+        make_entry(
+            "Install; configure",
+            0.75,
+            role="extrepo",
+            items=[
+                dict(label="jellyfin", duration=0.5),
+                dict(label="yarnpkg", duration=0.25),
+            ],
+        ),
+    ]
+
+    assert profile_timeline.build_folded_stacks(entries) == [
+        "localhost;Dev PC;(play);Update APT cache 4000",
+        "localhost;Dev PC;extrepo;Install, configure;jellyfin 500",
+        "localhost;Dev PC;extrepo;Install, configure;yarnpkg 250",
+    ]
+
+
+def test_find_regressions() -> None:
+    previous = {"a": 10.0, "b": 1.0, "c": 10.0, "d": 5.0}
+    current = {"a": 20.0, "b": 2.5, "c": 12.0, "d": 15.0, "new": 60.0}
+
+    assert profile_timeline.find_regressions(previous, current, 1.5, 2.0) == [
+        {"task": "a", "previous": 10.0, "current": 20.0},
+        {"task": "d", "previous": 5.0, "current": 15.0},
+    ]
+
+
+def test_find_regressions__sorts_by_the_seconds_lost() -> None:
+    previous = {"slowest": 100.0, "lost_most": 10.0}
+    current = {"slowest": 160.0, "lost_most": 80.0}
+
+    assert [
+        regression["task"]
+        for regression in profile_timeline.find_regressions(previous, current, 1.5, 2.0)
+    ] == ["lost_most", "slowest"]
+
+
+def test_find_previous_timeline__skips_runs_without_a_timeline(
+    tmp_path: Path,
+) -> None:
+    for name, timeline in (
+        ("20240101T100000", {"run": "20240101T100000"}),
+        ("20240102T100000", None),
+        ("20240103T100000", {"run": "20240103T100000"}),
+    ):
+        (tmp_path / name).mkdir()
+        if timeline is not None:
+            (tmp_path / name / "timeline.json").write_text(json.dumps(timeline))
+
+    previous = profile_timeline.find_previous_timeline(str(tmp_path), "20240103T100000")
+
+    assert previous == {"run": "20240101T100000"}
+    assert (
+        profile_timeline.find_previous_timeline(str(tmp_path / "missing"), "x") is None
+    )
+
+
+def test_format_duration() -> None:
+    assert profile_timeline.format_duration(83.4) == "1:23"
+    assert profile_timeline.format_duration(3725) == "62:05"
+
+
+def test_build_fleet_summary__lists_the_slowest_host_first() -> None:
+    entries = [
+        dict(make_entry("Update APT cache", 4.0), host="lab-1", start=0.0, end=4.0),
+        dict(
+            make_entry("Install extensions", 50.0, role="dev_tools"),
+            host="lab-1",
+            start=4.0,
+            end=54.0,
+        ),
+        dict(
+            make_entry("Install fonts", 30.0, role="nerd_fonts"),
+            host="lab-1",
+            start=54.0,
+            end=84.0,
+        ),
+        dict(make_entry("Update APT cache", 2.0), host="lab-2", start=0.0, end=2.0),
+    ]
+    host_stats = {
+        "lab-1": {"changed": 2, "failures": 0, "unreachable": 0},
+        "lab-2": {"changed": 0, "failures": 1, "unreachable": 0},
+        "lab-3": {"changed": 0, "failures": 0, "unreachable": 1},
+    }
+
+    assert profile_timeline.build_fleet_summary(entries, host_stats, 2) == [
+        "Host   Duration  Changed  Failed  Slowest roles",
+        "lab-1  1:24      2        0       dev_tools (0:50), nerd_fonts (0:30)",
+        "lab-2  0:02      0        1       (play) (0:02)",
+        "lab-3  0:00      0        1",
+    ]
+
+
+def test_compute_run_name__tells_runs_started_in_the_same_second_apart() -> None:
+    first = profile_timeline.compute_run_name(1704272400.25, 4242)
+    second = profile_timeline.compute_run_name(1704272400.75, 4243)
+
+    assert first != second
+    assert first < second
+    assert profile_timeline.compute_run_name(1704272400.25, 4243) != first
+
+
+def test_find_previous_timeline__with_runs_started_in_the_same_second__picks_the_earlier_one(
+    tmp_path: Path,
+) -> None:
+    first = profile_timeline.compute_run_name(1704272400.25, 4242)
+    second = profile_timeline.compute_run_name(1704272400.75, 4243)
+    (tmp_path / first).mkdir()
+    (tmp_path / first / "timeline.json").write_text(json.dumps({"run": first}))
+
+    assert profile_timeline.find_previous_timeline(str(tmp_path), second) == {
+        "run": first
+    }
+
+
+def test_resolve_runs_path() -> None:
+    assert (
+        profile_timeline.resolve_runs_path(".profile", "/srv/helper")
+        == "/srv/helper/.profile"
+    )
+    assert (
+        profile_timeline.resolve_runs_path("/var/tmp/runs", "/srv/helper")
+        == "/var/tmp/runs"
+    )
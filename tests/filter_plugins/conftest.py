@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Ansible loads every file below filter_plugins/ as a plugin, so its tests live here
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "..", "filter_plugins"
+    ),
+)
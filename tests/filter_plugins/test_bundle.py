@@ -0,0 +1,58 @@
+import bundle
+
+
+__metaclass__ = type
+
+
+def test_bundled__when_not_provisioning_from_a_bundle__keeps_the_url() -> None:
+    assert (
+        bundle.bundled("https://example.com/install.sh", "sha256:AB12", "")
+        == "https://example.com/install.sh"
+    )
+
+
+def test_bundled__points_at_the_bundled_file() -> None:
+    assert (
+        bundle.bundled(
+            "https://example.com/install.sh", "sha256:AB12", "file:///srv/bundle/files/"
+        )
+        == "file:///srv/bundle/files/ab12"
+    )
+
+
+def test_bundle_checksums__maps_urls_to_checksums() -> None:
+    assert bundle.bundle_checksums(
+        {
+            "artifacts": [
+                {
+                    "url": "https://example.com/install.sh",
+                    "checksum": "sha256:ab12",
+                    "filename": "files/ab12",
+                }
+            ]
+        }
+    ) == {"https://example.com/install.sh": "sha256:ab12"}
+
+
+def test_python_build_artifacts__lists_the_checksummed_packages() -> None:
+    definition = (
+        "prefer_openssl3\n"
+        'install_package "openssl-3.1.4" "https://www.openssl.org/source/openssl-3.1.4.tar.gz#'
+        + "84" * 32
+        + '" mac_openssl --if has_broken_mac_openssl\n'
+        'install_package "Python-3.12.1" "https://www.python.org/ftp/python/3.12.1/Python-3.12.1.tar.xz#'
+        + "8d" * 32
+        + '" standard verify_py312 copy_python_gdb ensurepip\n'
+        'install_git "Python-3.13-dev" "https://github.com/python/cpython" 3.13 standard\n'
+    )
+
+    assert bundle.python_build_artifacts(definition) == [
+        {
+            "url": "https://www.openssl.org/source/openssl-3.1.4.tar.gz",
+            "checksum": "sha256:" + "84" * 32,
+        },
+        {
+            "url": "https://www.python.org/ftp/python/3.12.1/Python-3.12.1.tar.xz",
+            "checksum": "sha256:" + "8d" * 32,
+        },
+    ]